@@ -0,0 +1,211 @@
+"""Бенчмарк конвеєра parse → map → generate → package.
+
+    cd codegen
+    python -m bench.run                              # 10 / 1k / 10k / 100k пристроїв
+    python -m bench.run --sizes 10,1000 --repeat 5
+    python -m bench.run --compare bench/results/<base>.json
+
+Для кожного розміру графа й кожного етапу — медіана та мінімум часу з
+--repeat запусків і пікова пам'ять (tracemalloc, окремий запуск — під
+трасуванням Python працює повільніше). Результат зберігається в JSON разом
+з комітом git, щоб порівнювати регресії між комітами.
+"""
+from __future__ import annotations
+
+import argparse
+import base64
+import gc
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from generator.archive import iter_zip
+from generator.generators.db_mechs import generate_db_mechs
+from generator.generators.db_sim_config import generate_db_sim_config
+from generator.generators.db_sim_mechs import generate_db_sim_mechs
+from generator.generators.mechs_csv import generate_mechs_csv
+from generator.mapper import map_devices
+from generator.pipeline import build_ctx, emit_members, load_graph, render_members
+
+from .synth import make_graph_bytes
+
+DEFAULT_SIZES = [10, 1_000, 10_000, 100_000]
+RESULTS_DIR = Path(__file__).parent / "results"
+
+_GENERATORS = [
+    ("generate_db_mechs",      generate_db_mechs),
+    ("generate_db_sim_config", generate_db_sim_config),
+    ("generate_db_sim_mechs",  generate_db_sim_mechs),
+    ("generate_mechs_csv",     generate_mechs_csv),
+]
+
+
+# ---------------------------------------------------------------------------
+# Вимірювання
+# ---------------------------------------------------------------------------
+
+def measure(fn: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    """Час (мс) і пікова пам'ять (КБ) одного етапу."""
+    times = []
+    for _ in range(repeat):
+        gc.collect()
+        started = time.perf_counter()
+        fn()
+        times.append((time.perf_counter() - started) * 1000)
+
+    gc.collect()
+    tracemalloc.start()
+    try:
+        fn()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    return {
+        "median_ms": round(statistics.median(times), 3),
+        "min_ms": round(min(times), 3),
+        "peak_kb": round(peak / 1024, 1),
+    }
+
+
+def bench_size(count: int, repeat: int, client: Any) -> Dict[str, Any]:
+    content = make_graph_bytes(count)
+    parse_result = load_graph(content)
+    map_result = map_devices(parse_result.devices)
+    ctx = build_ctx("Bench", "1.0.0", "graph.json")
+    members = list(render_members(map_result, ctx, parse_result.warnings))
+
+    stages: List[Tuple[str, Callable[[], Any]]] = [
+        ("parse_graph", lambda: load_graph(content)),
+        ("map_devices", lambda: map_devices(parse_result.devices)),
+        *[(name, lambda fn=fn: fn(map_result, ctx)) for name, fn in _GENERATORS],
+        ("zip_base64",  lambda: base64.b64encode(b"".join(iter_zip(members)))),
+        # Рендеринг усіх файлів прямо в ZIP (як у /generate)
+        ("emit_zip",    lambda: b"".join(iter_zip(emit_members(map_result, ctx, parse_result.warnings)))),
+    ]
+    if client is not None:
+        stages.append(("request", lambda: _post_generate(client, content)))
+
+    results = {}
+    for name, fn in stages:
+        results[name] = measure(fn, repeat)
+        print(f"  {name:<24} {results[name]['median_ms']:>10.2f} ms  {results[name]['peak_kb']:>10.0f} KB")
+    return {
+        "devices": count,
+        "mechanisms": len(map_result.devices),
+        "input_bytes": len(content),
+        "stages": results,
+    }
+
+
+def _post_generate(client: Any, content: bytes) -> None:
+    import main
+    main._cache.clear()   # вимірюємо генерацію, а не кеш
+    resp = client.post("/generate", files={"file": ("graph.json", content, "application/json")})
+    if resp.status_code != 200:
+        raise RuntimeError(f"/generate → HTTP {resp.status_code}: {resp.text[:200]}")
+
+
+def _make_client() -> Optional[Any]:
+    """TestClient для повного запиту /generate (потрібен httpx)."""
+    try:
+        from fastapi.testclient import TestClient
+    except ImportError:   # pragma: no cover
+        print("fastapi/httpx не встановлено — етап request пропущено", file=sys.stderr)
+        return None
+    # Синтетичні графи на 100k пристроїв більші за стандартний ліміт завантаження
+    os.environ.setdefault("MAX_UPLOAD_SIZE_MB", "1024")
+    import main
+    return TestClient(main.app)
+
+
+# ---------------------------------------------------------------------------
+# Результати
+# ---------------------------------------------------------------------------
+
+def git_commit() -> str:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True, cwd=Path(__file__).parent,
+        ).stdout.strip()
+        dirty = subprocess.run(
+            ["git", "status", "--porcelain", "--untracked-files=no"],
+            capture_output=True, text=True, check=True, cwd=Path(__file__).parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+    return out + ("-dirty" if dirty else "")
+
+
+def compare(base: Dict[str, Any], current: Dict[str, Any]) -> None:
+    """Друкує зміну медіани часу й піку пам'яті відносно base."""
+    print(f"\nПорівняння з {base.get('commit')} → {current.get('commit')}")
+    base_sizes = {run["devices"]: run for run in base["runs"]}
+    for run in current["runs"]:
+        prev = base_sizes.get(run["devices"])
+        if prev is None:
+            continue
+        print(f"{run['devices']} пристроїв:")
+        for name, stage in run["stages"].items():
+            old = prev["stages"].get(name)
+            if old is None:
+                continue
+            print(f"  {name:<24} {_delta(old['median_ms'], stage['median_ms']):>8} час"
+                  f"  {_delta(old['peak_kb'], stage['peak_kb']):>8} пам'ять")
+
+
+def _delta(old: float, new: float) -> str:
+    if not old:
+        return "—"
+    return f"{(new - old) / old * 100:+.1f}%"
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m bench.run", description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES),
+                        help="Розміри графів через кому (за замовч.: 10,1000,10000,100000)")
+    parser.add_argument("--repeat", type=int, default=3, help="Запусків на етап (за замовч.: 3)")
+    parser.add_argument("--no-request", action="store_true", help="Не вимірювати повний запит /generate")
+    parser.add_argument("-o", "--output", type=Path, default=None,
+                        help="JSON з результатами (за замовч.: bench/results/<час>_<коміт>.json)")
+    parser.add_argument("--compare", type=Path, default=None, help="Попередній JSON для порівняння")
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s.strip()]
+    client = None if args.no_request else _make_client()
+    commit = git_commit()
+
+    runs = []
+    for count in sizes:
+        print(f"{count} пристроїв:")
+        runs.append(bench_size(count, max(1, args.repeat), client))
+
+    result = {
+        "commit": commit,
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeat": args.repeat,
+        "runs": runs,
+    }
+    output = args.output or RESULTS_DIR / f"{datetime.now():%Y%m%d_%H%M%S}_{commit}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(result, indent=2, ensure_ascii=False), encoding="utf-8")
+    print(f"\nЗбережено: {output}")
+
+    if args.compare is not None:
+        compare(json.loads(args.compare.read_text(encoding="utf-8")), result)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
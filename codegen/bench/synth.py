@@ -0,0 +1,95 @@
+"""Синтетичні graph.json для бенчмарків.
+
+Граф схожий на реальний: суміш типів як на елеваторі (редлери й засувки
+переважають), прогалини в id, не-механізми (Silo), порти, внутрішні
+з'єднання та з'єднання між сусідніми пристроями.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+from pathlib import Path
+from typing import Any, Dict, List
+
+# (тип у graph.json, вага у суміші)
+TYPE_MIX = [
+    ("redler",       30),
+    ("gate2P",       28),
+    ("noria",        14),
+    ("Fan",           8),
+    ("valve3P",       6),
+    ("receivingPit",  3),
+    ("separator",     3),
+    ("silos",         3),
+    ("sushka",        2),
+    ("Silo",          3),   # не-механізм → [WARN]
+]
+
+GAP_RATIO = 0.03   # частка пропущених id (порожні слоти у Mechs[])
+
+_PORTS = [("in", "Вхід"), ("out", "Вихід"), ("in", "Засувка"), ("out", "Вихід 2")]
+
+
+def make_graph(count: int, seed: int = 0, gap_ratio: float = GAP_RATIO) -> Dict[str, Any]:
+    """Граф з count пристроїв; однаковий seed — однаковий граф."""
+    rng = random.Random(seed)
+    types = [name for name, _ in TYPE_MIX]
+    weights = [weight for _, weight in TYPE_MIX]
+
+    devices: List[Dict[str, Any]] = []
+    connections: List[Dict[str, str]] = []
+    next_id = 1
+    for i in range(count):
+        while rng.random() < gap_ratio:
+            next_id += 1
+        dev_type = rng.choices(types, weights)[0]
+        name = f"{dev_type} {next_id}"
+        ports = [
+            {"direction": direction, "name": port, "port_order": order}
+            for order, (direction, port) in enumerate(_PORTS[:rng.randint(2, len(_PORTS))])
+        ]
+        devices.append({
+            "name": name,
+            "id": str(next_id),
+            "type": dev_type,
+            "description": None,
+            # Редактор зберігає координати дробовими — як і в реальних експортах
+            "pos_x": round(rng.uniform(-5000, 5000), 3),
+            "pos_y": round(rng.uniform(-5000, 5000), 3),
+            "ports": ports,
+            "internal_connections": [{"in_port": "Вхід", "out_port": "Вихід"}],
+        })
+        if i:
+            connections.append({
+                "source_device": devices[i - 1]["name"],
+                "source_port": "Вихід",
+                "target_device": name,
+                "target_port": "Вхід",
+            })
+        next_id += 1
+
+    rng.shuffle(devices)   # у реальних файлах пристрої не відсортовані за id
+    return {
+        "deviceTypes": [{"name": name, "label": name} for name in types],
+        "devices": devices,
+        "connections": connections,
+    }
+
+
+def make_graph_bytes(count: int, seed: int = 0) -> bytes:
+    return json.dumps(make_graph(count, seed), ensure_ascii=False).encode("utf-8")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Згенерувати синтетичний graph.json")
+    parser.add_argument("count", type=int, help="Кількість пристроїв")
+    parser.add_argument("-o", "--output", type=Path, default=Path("graph_synth.json"))
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+    args.output.write_bytes(make_graph_bytes(args.count, args.seed))
+    print(f"{args.output}: {args.count} пристроїв")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,6 @@
+"""python -m generator — див. generator/cli.py."""
+import sys
+
+from .cli import main
+
+sys.exit(main())
@@ -0,0 +1,106 @@
+"""Потокове пакування згенерованих файлів у ZIP-архів."""
+from __future__ import annotations
+
+import io
+import zipfile
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, Optional, Tuple, Union
+
+from .metrics import Timings, span
+
+# Вміст члена архіву: готові байти або функція, що пише їх у відкритий потік
+Member = Tuple[str, Union[bytes, Callable[[BinaryIO], None]]]
+
+# Режим архіву → (метод стиснення, рівень; None — стандартний рівень zlib)
+ZIP_MODES: Dict[str, Tuple[int, Optional[int]]] = {
+    "stored":  (zipfile.ZIP_STORED, None),
+    "fast":    (zipfile.ZIP_DEFLATED, 1),
+    "deflate": (zipfile.ZIP_DEFLATED, None),
+    "max":     (zipfile.ZIP_DEFLATED, 9),
+}
+
+# Рівень стиснення ZipInfo, який читає ZipFile.open(info, "w"): публічний
+# compress_level є лише з Python 3.13, до того — тільки _compresslevel
+_INFO_LEVEL = "compress_level" if "compress_level" in zipfile.ZipInfo.__slots__ else "_compresslevel"
+
+
+class _ChunkSink(io.RawIOBase):
+    """Непозиціонований (non-seekable) приймач байтів для ZipFile.
+
+    zipfile сам перемикається у режим data descriptor, тож архів можна
+    віддавати клієнту частинами, не тримаючи його повністю в пам'яті.
+    """
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._chunks: list[bytes] = []
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, b) -> int:
+        self._chunks.append(bytes(b))
+        return len(b)
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+class _TimedWriter:
+    """Потік члена ZIP, що рахує час запису (стиснення) як етап "zip"."""
+
+    def __init__(self, dest: BinaryIO, timings: Timings) -> None:
+        self._dest = dest
+        self._timings = timings
+
+    def write(self, data: bytes) -> int:
+        with self._timings.span("zip"):
+            return self._dest.write(data)
+
+
+def iter_zip(
+    members: Iterable[Member],
+    compression: int = zipfile.ZIP_DEFLATED,
+    timings: Optional[Timings] = None,
+    compresslevel: Optional[int] = None,
+    date_time: Optional[Tuple[int, int, int, int, int, int]] = None,
+) -> Iterator[bytes]:
+    """Пакує пари (ім'я, вміст) у ZIP і віддає архів шматками.
+
+    members може бути лінивим генератором — кожен файл рендериться лише тоді,
+    коли до нього доходить черга. Якщо вміст — функція запису (generator.emitter),
+    текст кодується й стискається шматками прямо в потік члена архіву, без
+    повної копії файлу в пам'яті.
+    date_time — однакова дата всіх членів (відтворюваний архів); інакше
+    zipfile ставить поточний час.
+    """
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, "w", compression, compresslevel=compresslevel) as zf:
+        for name, data in members:
+            member = _member_info(zf, name, date_time) if date_time is not None else name
+            with span(timings, "zip"):
+                if callable(data):
+                    with zf.open(member, "w") as dest:
+                        data(_TimedWriter(dest, timings) if timings is not None else dest)
+                else:
+                    zf.writestr(member, data, compresslevel=zf.compresslevel)
+            chunk = sink.drain()
+            if chunk:
+                yield chunk
+    tail = sink.drain()
+    if tail:
+        yield tail
+
+
+def _member_info(zf: zipfile.ZipFile, name: str, date_time: Tuple[int, ...]) -> zipfile.ZipInfo:
+    """ZipInfo з фіксованою датою; решта — як для члена, доданого за ім'ям.
+
+    Для bytes рівень передає writestr(compresslevel=…); для потокового запису
+    ZipFile.open приймає лише ZipInfo, тож рівень ставиться в ньому.
+    """
+    info = zipfile.ZipInfo(name, date_time)
+    info.compress_type = zf.compression
+    setattr(info, _INFO_LEVEL, zf.compresslevel)
+    info.external_attr = 0o600 << 16
+    return info
@@ -0,0 +1,95 @@
+"""LRU-кеш результатів генерації, адресований вмістом графа."""
+from __future__ import annotations
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Dict, Iterable, Optional
+
+
+@dataclass
+class CachedGeneration:
+    archive: bytes              # готовий ZIP (або сам файл у режимі raw)
+    summary: Dict[str, Any]     # counts / constants / gap_ranges / gap_count (main._build_counts)
+    zip_filename: str           # ім'я завантаження
+
+
+def cache_key(devices: Iterable, warnings: Iterable[str], params: Dict[str, Any]) -> str:
+    """SHA-256 від канонізованого списку пристроїв + параметрів генерації.
+
+    Порядок пристроїв у graph.json та службові поля (pos_x, ports, …) на ключ
+    не впливають. ctx['timestamp'] до ключа не входить — при влучанні
+    повертається архів із часом першої генерації.
+    """
+    canonical = {
+        # Перевизначення симулятора — лише якщо є: ключі графів без них не змінюються
+        "devices": sorted(
+            (d.id, d.name, d.type_key, d.raw_type) + ((d.sim_config,) if d.sim_config else ())
+            for d in devices
+        ),
+        "warnings": list(warnings),
+        "params": params,
+    }
+    payload = json.dumps(canonical, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class GenerationCache:
+    """Потокобезпечний LRU з обмеженням за кількістю записів і сумарним розміром архівів."""
+
+    def __init__(self, max_entries: int = 32, max_bytes: int = 64 * 1024 * 1024) -> None:
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._bytes = 0
+        self._items: "OrderedDict[str, CachedGeneration]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.max_bytes > 0
+
+    def get(self, key: str) -> Optional[CachedGeneration]:
+        with self._lock:
+            entry = self._items.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return entry
+
+    def put(self, key: str, entry: CachedGeneration) -> bool:
+        """Додає запис; повертає False, якщо архів більший за весь бюджет."""
+        size = len(entry.archive)
+        if not self.enabled or size > self.max_bytes:
+            return False
+        with self._lock:
+            old = self._items.pop(key, None)
+            if old is not None:
+                self._bytes -= len(old.archive)
+            self._items[key] = entry
+            self._bytes += size
+            while len(self._items) > self.max_entries or self._bytes > self.max_bytes:
+                _, evicted = self._items.popitem(last=False)
+                self._bytes -= len(evicted.archive)
+        return True
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "entries": len(self._items),
+                "bytes": self._bytes,
+                "max_entries": self.max_entries,
+                "max_bytes": self.max_bytes,
+            }
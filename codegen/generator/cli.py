@@ -0,0 +1,321 @@
+"""Командний рядок: python -m generator graph.json [...] (ТЗ, розділ 9)."""
+from __future__ import annotations
+
+import argparse
+import glob
+import io
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from .cache import cache_key
+from .incremental import IncrementalGenerator
+from .mapper import map_devices
+from .emitter import Writer
+from .manifest import with_manifest
+from .pipeline import (
+    SOURCE_DATE_EPOCH_ENV, GraphError, GraphValidationError, build_ctx, emit_members, load_graph,
+    load_sim_overrides, reproducible_time,
+)
+
+# Коди завершення
+EXIT_OK = 0
+EXIT_INPUT = 1        # файл не знайдено / невалідний JSON
+EXIT_VALIDATION = 2   # дублікати id, некоректна структура
+EXIT_WRITE = 3        # помилка запису вихідних файлів
+
+_DEFAULT_PROJECT_NAME = "Elevator_System"
+
+
+@dataclass
+class FileOutcome:
+    source: Path
+    out_dir: Path
+    code: int = EXIT_OK
+    errors: List[str] = field(default_factory=list)
+    warnings: List[str] = field(default_factory=list)
+    written: List[str] = field(default_factory=list)
+    devices: int = 0
+    elapsed_ms: float = 0.0
+    key: str = ""         # хеш вмісту (для пропуску повторних збережень у --watch)
+
+
+def generate_file(
+    source: Path,
+    out_dir: Path,
+    project_name: str,
+    version: str,
+    incremental: Optional[IncrementalGenerator] = None,
+    skip_key: str = "",
+    sim_overrides: Optional[Path] = None,
+    reproducible: bool = False,
+) -> FileOutcome:
+    """Генерує файли одного графа прямо на диск (без ZIP).
+
+    З incremental записуються лише змінені файли; якщо хеш вмісту збігся зі
+    skip_key — нічого не генерується. sim_overrides — side-car JSON
+    перевизначень симулятора, читається при кожній генерації. reproducible —
+    фіксований час у заголовках (SOURCE_DATE_EPOCH) і MANIFEST.sha256 поруч.
+    """
+    started = time.perf_counter()
+    outcome = FileOutcome(source=source, out_dir=out_dir)
+    try:
+        content = source.read_bytes()
+    except OSError as exc:
+        outcome.code = EXIT_INPUT
+        outcome.errors = [f"Не вдалося прочитати файл: {exc.strerror or exc}"]
+        return outcome
+
+    try:
+        parse_result = load_graph(content)
+        if sim_overrides is not None:
+            load_sim_overrides(parse_result, _read_overrides(sim_overrides))
+    except GraphValidationError as exc:
+        outcome.code, outcome.errors, outcome.warnings = EXIT_VALIDATION, exc.errors, exc.warnings or []
+        return outcome
+    except GraphError as exc:
+        outcome.code, outcome.errors = EXIT_INPUT, exc.errors
+        return outcome
+
+    outcome.warnings = parse_result.warnings
+    outcome.devices = len(parse_result.devices)
+    ctx = build_ctx(project_name, version, source.name, reproducible_time() if reproducible else None)
+    outcome.key = cache_key(
+        parse_result.devices,
+        parse_result.warnings,
+        {k: ctx[k] for k in ("project_name", "version", "source")},
+    )
+    if skip_key and outcome.key == skip_key:
+        outcome.elapsed_ms = (time.perf_counter() - started) * 1000
+        return outcome
+
+    map_result = map_devices(parse_result.devices)
+    files = None
+    unchanged: set = set()
+    if incremental is not None:
+        inc = incremental.generate(map_result, ctx)
+        files = inc.files
+        unchanged = {name for name, flag in inc.changed.items() if not flag}
+
+    try:
+        out_dir.mkdir(parents=True, exist_ok=True)
+        members = emit_members(map_result, ctx, parse_result.warnings, files)
+        if reproducible:
+            members = with_manifest(members)
+        for name, write in members:
+            if name in unchanged:
+                if reproducible:
+                    write(io.BytesIO())   # лише для хешу в маніфесті
+                continue
+            _write_atomic(out_dir / name, write)
+            outcome.written.append(name)
+    except OSError as exc:
+        if incremental is not None:
+            # Відбитки вже оновлено — без скидання незаписані файли вважались би незміненими
+            incremental.reset()
+        outcome.code = EXIT_WRITE
+        outcome.errors = [f"Помилка запису у {out_dir}: {exc.strerror or exc}"]
+
+    outcome.elapsed_ms = (time.perf_counter() - started) * 1000
+    return outcome
+
+
+def _read_overrides(path: Path) -> bytes:
+    try:
+        return path.read_bytes()
+    except OSError as exc:
+        raise GraphError([f"Не вдалося прочитати файл перевизначень: {exc.strerror or exc}"])
+
+
+def _write_atomic(path: Path, write: Writer) -> None:
+    """Запис через тимчасовий файл — TIA Portal ніколи не бачить напівзаписаний SCL."""
+    tmp = path.with_name(path.name + ".tmp")
+    with open(tmp, "wb") as f:
+        write(f)
+    os.replace(tmp, path)
+
+
+# ---------------------------------------------------------------------------
+# Розбір аргументів
+# ---------------------------------------------------------------------------
+
+def _build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        prog="python -m generator",
+        description="Генерація SCL-файлів TIA Portal з graph.json.",
+    )
+    parser.add_argument("inputs", nargs="+", metavar="GRAPH",
+                        help="graph.json або glob-шаблон (напр. 'sites/*.json')")
+    parser.add_argument("--output-dir", type=Path, default=None,
+                        help="Директорія для SCL файлів (за замовч.: поруч з graph.json; "
+                             "для кількох файлів — підкаталог з ім'ям файлу)")
+    parser.add_argument("--project-name", default=None,
+                        help=f'Назва проєкту (за замовч.: "{_DEFAULT_PROJECT_NAME}"; '
+                             "для кількох файлів — ім'я файлу)")
+    parser.add_argument("--version", default="1.0.0", help='Версія проєкту (за замовч.: "1.0.0")')
+    parser.add_argument("--sim-overrides", type=Path, default=None, metavar="JSON",
+                        help="Перевизначення DB_SimConfig для окремих пристроїв: {id: {поле: значення}}")
+    parser.add_argument("--reproducible", action="store_true",
+                        default=bool(os.environ.get(SOURCE_DATE_EPOCH_ENV, "").strip()),
+                        help="Відтворюваний вивід: час із SOURCE_DATE_EPOCH (або 1980-01-01) "
+                             "і MANIFEST.sha256 (за замовч.: якщо задано SOURCE_DATE_EPOCH)")
+    parser.add_argument("-j", "--jobs", type=int, default=os.cpu_count() or 1,
+                        help="Кількість паралельних процесів (за замовч.: кількість ядер)")
+    parser.add_argument("--watch", action="store_true",
+                        help="Стежити за змінами файлів і перегенеровувати інкрементально")
+    parser.add_argument("--interval", type=float, default=0.1,
+                        help="Період опитування файлів у --watch, секунди (за замовч.: 0.1)")
+    parser.add_argument("--no-color", action="store_true", help="Вимкнути кольоровий вивід у консоль")
+    return parser
+
+
+def _expand_inputs(patterns: Sequence[str]) -> Tuple[List[Path], List[str]]:
+    """Розгортає glob-шаблони (на Windows оболонка цього не робить)."""
+    paths: List[Path] = []
+    missing: List[str] = []
+    seen = set()
+    for pattern in patterns:
+        if glob.has_magic(pattern):
+            matches = sorted(glob.glob(pattern, recursive=True))
+        else:
+            matches = [pattern] if Path(pattern).exists() else []
+        if not matches:
+            missing.append(pattern)
+        for match in matches:
+            path = Path(match).resolve()
+            if path not in seen:
+                seen.add(path)
+                paths.append(path)
+    return paths, missing
+
+
+def _targets(paths: List[Path], args: argparse.Namespace) -> List[Tuple[Path, Path, str]]:
+    """(граф, вихідна директорія, назва проекту) для кожного вхідного файлу."""
+    many = len(paths) > 1
+    targets = []
+    for path in paths:
+        base = args.output_dir if args.output_dir is not None else path.parent
+        out_dir = base / path.stem if many else base
+        project = args.project_name or (path.stem if many else _DEFAULT_PROJECT_NAME)
+        targets.append((path, out_dir, project))
+    return targets
+
+
+# ---------------------------------------------------------------------------
+# Вивід
+# ---------------------------------------------------------------------------
+
+class _Printer:
+    def __init__(self, color: bool) -> None:
+        self._color = color
+
+    def _paint(self, text: str, code: str) -> str:
+        return f"\033[{code}m{text}\033[0m" if self._color else text
+
+    def outcome(self, out: FileOutcome) -> None:
+        if out.code == EXIT_OK:
+            if out.written:
+                files = ", ".join(out.written)
+                print(self._paint("✅", "32"), f"{out.source.name} → {out.out_dir}  "
+                      f"({out.devices} механізмів, {out.elapsed_ms:.0f} ms): {files}")
+            else:
+                print(self._paint("=", "2"), f"{out.source.name}: без змін ({out.elapsed_ms:.0f} ms)")
+        else:
+            print(self._paint("❌", "31"), f"{out.source.name}:")
+            for err in out.errors:
+                print("  ", self._paint(f"✕ {err}", "31"))
+        for warn in out.warnings:
+            print("  ", self._paint(f"[WARN] {warn}", "33"))
+
+    def missing(self, pattern: str) -> None:
+        print(self._paint("❌", "31"), f"{pattern}: файл не знайдено")
+
+
+# ---------------------------------------------------------------------------
+# Точка входу
+# ---------------------------------------------------------------------------
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    args = _build_parser().parse_args(argv)
+    printer = _Printer(color=sys.stdout.isatty() and not args.no_color)
+    if args.reproducible:
+        try:
+            reproducible_time()
+        except ValueError as exc:
+            print(f"❌ {exc}", file=sys.stderr)
+            return EXIT_INPUT
+
+    paths, missing = _expand_inputs(args.inputs)
+    for pattern in missing:
+        printer.missing(pattern)
+    code = EXIT_INPUT if missing else EXIT_OK
+    targets = _targets(paths, args)
+
+    if args.watch:
+        return _watch(targets, args, printer)
+
+    for outcome in _run_all(targets, args.version, args.jobs, args.sim_overrides, args.reproducible):
+        printer.outcome(outcome)
+        code = max(code, outcome.code)
+    return code
+
+
+def _run_all(
+    targets: List[Tuple[Path, Path, str]],
+    version: str,
+    jobs: int,
+    sim_overrides: Optional[Path] = None,
+    reproducible: bool = False,
+) -> List[FileOutcome]:
+    options = {"sim_overrides": sim_overrides, "reproducible": reproducible}
+    if jobs <= 1 or len(targets) <= 1:
+        return [generate_file(src, out, project, version, **options) for src, out, project in targets]
+    with ProcessPoolExecutor(max_workers=min(jobs, len(targets))) as pool:
+        futures = [
+            pool.submit(generate_file, src, out, project, version, **options)
+            for src, out, project in targets
+        ]
+        return [f.result() for f in futures]
+
+
+def _watch(targets: List[Tuple[Path, Path, str]], args: argparse.Namespace, printer: _Printer) -> int:
+    """Опитування mtime/size; змінений граф перегенеровується інкрементально в цьому процесі."""
+    generators: Dict[Path, IncrementalGenerator] = {src: IncrementalGenerator() for src, _, _ in targets}
+    stamps: Dict[Path, Optional[tuple]] = {src: None for src, _, _ in targets}
+    keys: Dict[Path, str] = {}
+    print(f"👀 Стежу за {len(targets)} файл(ами). Ctrl+C — вихід.")
+    try:
+        while True:
+            for src, out_dir, project in targets:
+                try:
+                    st = src.stat()
+                    stamp: Optional[tuple] = (st.st_mtime_ns, st.st_size, _stamp(args.sim_overrides))
+                except OSError:
+                    stamp = None
+                if stamp is None or stamp == stamps[src]:
+                    continue
+                stamps[src] = stamp
+                outcome = generate_file(src, out_dir, project, args.version,
+                                        incremental=generators[src], skip_key=keys.get(src, ""),
+                                        sim_overrides=args.sim_overrides, reproducible=args.reproducible)
+                if outcome.code == EXIT_OK:
+                    keys[src] = outcome.key
+                printer.outcome(outcome)
+            time.sleep(args.interval)
+    except KeyboardInterrupt:
+        return EXIT_OK
+
+
+def _stamp(path: Optional[Path]) -> Optional[Tuple[int, int]]:
+    """mtime/size файлу перевизначень — його зміна теж перегенеровує графи."""
+    if path is None:
+        return None
+    try:
+        st = path.stat()
+    except OSError:
+        return None
+    return st.st_mtime_ns, st.st_size
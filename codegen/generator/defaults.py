@@ -1,13 +1,16 @@
 # Типи, що є не-механізмами — ігноруються з попередженням [WARN]
 NON_MECHANISM_TYPES = {"silo", "sensor", "label"}
 
-# Маппінг JSON-типів → TIA Portal (ключі lowercase)
+# Маппінг JSON-типів → TIA Portal (ключі lowercase). label — родовий відмінок
+# множини для коментарів Mechs.csv. Компілюється в generator.type_registry.TYPES
+# (там же — розширення з конфігураційного файлу).
 TYPE_MAPPING = {
     "noria": {
         "tia_type": "TYPE_NORIA",
         "udt": "UDT_Noria",
         "array_name": "Noria",
         "count_const": "NORIAS_COUNT",
+        "label": "норій",
         "has_simulator": True,
         "sim_state_udt": "UDT_SimNoriaState",
         "sim_config_udt": "UDT_SimNoriaConfig",
@@ -17,6 +20,7 @@ TYPE_MAPPING = {
         "udt": "UDT_Redler",
         "array_name": "Redler",
         "count_const": "REDLERS_COUNT",
+        "label": "редлерів",
         "has_simulator": True,
         "sim_state_udt": "UDT_SimRedlerState",
         "sim_config_udt": "UDT_SimRedlerConfig",
@@ -26,6 +30,7 @@ TYPE_MAPPING = {
         "udt": "UDT_Gate2P",
         "array_name": "Gate2P",
         "count_const": "GATES2P_COUNT",
+        "label": "засувок",
         "has_simulator": True,
         "sim_state_udt": "UDT_SimGate2PState",
         "sim_config_udt": "UDT_SimGate2PConfig",
@@ -35,6 +40,7 @@ TYPE_MAPPING = {
         "udt": "UDT_Fan",
         "array_name": "Fan",
         "count_const": "FANS_COUNT",
+        "label": "вентиляторів",
         "has_simulator": True,
         "sim_state_udt": "UDT_SimFanState",
         "sim_config_udt": "UDT_SimFanConfig",
@@ -44,6 +50,7 @@ TYPE_MAPPING = {
         "udt": "UDT_ReceivingPit",
         "array_name": "ReceivingPit",
         "count_const": "RECEIVING_PITS_COUNT",
+        "label": "приймальних ям",
         "has_simulator": False,
         "sim_state_udt": "",
         "sim_config_udt": "",
@@ -53,6 +60,7 @@ TYPE_MAPPING = {
         "udt": "UDT_Separator",
         "array_name": "Separator",
         "count_const": "SEPARATORS_COUNT",
+        "label": "сепараторів",
         "has_simulator": False,
         "sim_state_udt": "",
         "sim_config_udt": "",
@@ -62,6 +70,7 @@ TYPE_MAPPING = {
         "udt": "UDT_Valve3P",
         "array_name": "Valve3P",
         "count_const": "VALVES3P_COUNT",
+        "label": "клапанів 3П",
         "has_simulator": False,
         "sim_state_udt": "",
         "sim_config_udt": "",
@@ -71,6 +80,7 @@ TYPE_MAPPING = {
         "udt": "UDT_Silos",
         "array_name": "Silos",
         "count_const": "SILOS_COUNT",
+        "label": "силосів",
         "has_simulator": False,
         "sim_state_udt": "",
         "sim_config_udt": "",
@@ -80,12 +90,21 @@ TYPE_MAPPING = {
         "udt": "UDT_Sushka",
         "array_name": "Sushka",
         "count_const": "SUSHKAS_COUNT",
+        "label": "сушарок",
         "has_simulator": False,
         "sim_state_udt": "",
         "sim_config_udt": "",
     },
 }
 
+# Порядок груп типів у SCL-файлах
+TYPE_ORDER = ["redler", "noria", "gate2p", "fan",
+              "receivingpit", "separator", "valve3p", "silos", "sushka"]
+
+# Порядок констант у Mechs.csv (MECHS_COUNT — завжди останній)
+CSV_ORDER = ["gate2p", "redler", "noria", "fan",
+             "receivingpit", "separator", "valve3p", "silos", "sushka"]
+
 # Значення за замовчуванням для DB_SimConfig
 # Список кортежів (field_name, value) — зберігає порядок полів
 SIM_CONFIG_DEFAULTS: dict[str, list[tuple[str, str]]] = {
@@ -0,0 +1,218 @@
+"""Порівняння двох генерацій: які слоти, TypedIndex і константи змінилися.
+
+Обидві сторони зводяться до MapResult (попередній graph.json — через
+map_devices, попередній архів — через список пристроїв generation_report.txt),
+а відсортовані за id списки пристроїв порівнюються одним лінійним проходом.
+Текстовий diff файлів рендериться лише на запит.
+"""
+from __future__ import annotations
+
+import difflib
+import io
+import re
+import zipfile
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .incremental import file_fingerprints
+from .mapper import MapResult, MappedDevice, map_devices
+from .parser import RawDevice
+from .pipeline import REPORT_NAME, GraphError
+from .registry import REGISTRY, GeneratorRegistry
+from .type_registry import TYPES
+
+# Рядок пристрою у generation_report.txt (pipeline._REPORT_DEVICE)
+_REPORT_DEVICE = re.compile(
+    r'^  \[(?:OK|SKIP)\]\s+id=(\d+)\s+(\S+)\s+"(.*)"  -> \S+, SlotId=\d+, TypedIndex=\d+(?: \(no simulator\))?$'
+)
+
+# Рядки з часом генерації — відрізняються завжди, у текстовому diff не показуються
+_GENERATED = ("// Generated:", "Generated:")
+
+# Файли, що залежать від simConfig: у звіті його немає, тож MapResult з архіву
+# перевизначень не містить — ці файли порівнюються з архівом за текстом
+SIM_CONFIG_FILES = ("DB_SimConfig.scl",)
+
+
+@dataclass
+class Snapshot:
+    """Одна сторона порівняння."""
+
+    map_result: MapResult
+    files: Dict[str, str] = field(default_factory=dict)   # тексти з архіву (для текстового diff)
+
+
+@dataclass
+class MapDiff:
+    added: List[MappedDevice] = field(default_factory=list)
+    removed: List[MappedDevice] = field(default_factory=list)
+    reindexed: List[Tuple[MappedDevice, MappedDevice]] = field(default_factory=list)   # той самий тип
+    retyped: List[Tuple[MappedDevice, MappedDevice]] = field(default_factory=list)
+    renamed: List[Tuple[MappedDevice, MappedDevice]] = field(default_factory=list)
+    unchanged: int = 0
+    constants: Dict[str, Tuple[int, int]] = field(default_factory=dict)   # лише змінені
+
+    @property
+    def changed(self) -> bool:
+        return bool(self.added or self.removed or self.reindexed or self.retyped
+                    or self.renamed or self.constants)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "summary": {
+                "added": len(self.added),
+                "removed": len(self.removed),
+                "reindexed": len(self.reindexed),
+                "retyped": len(self.retyped),
+                "renamed": len(self.renamed),
+                "unchanged": self.unchanged,
+            },
+            "added": [_device(d) for d in self.added],
+            "removed": [_device(d) for d in self.removed],
+            "reindexed": [
+                {"id": new.id, "name": new.name, "type": new.raw_type,
+                 "old_typed_index": old.typed_index, "new_typed_index": new.typed_index}
+                for old, new in self.reindexed
+            ],
+            "retyped": [
+                {"id": new.id, "name": new.name, "old_type": old.raw_type, "new_type": new.raw_type,
+                 "old_typed_index": old.typed_index, "new_typed_index": new.typed_index}
+                for old, new in self.retyped
+            ],
+            "renamed": [
+                {"id": new.id, "old_name": old.name, "new_name": new.name}
+                for old, new in self.renamed
+            ],
+            "constants": {key: {"old": a, "new": b} for key, (a, b) in self.constants.items()},
+        }
+
+
+def _device(dev: MappedDevice) -> Dict[str, Any]:
+    return {"id": dev.id, "name": dev.name, "type": dev.raw_type,
+            "tia_type": dev.tia_type, "typed_index": dev.typed_index}
+
+
+def diff_maps(old: MapResult, new: MapResult) -> MapDiff:
+    """Злиття двох списків, відсортованих за id (SlotId), за один прохід."""
+    diff = MapDiff()
+    a, b = old.devices, new.devices
+    i = j = 0
+    while i < len(a) or j < len(b):
+        if j == len(b) or (i < len(a) and a[i].id < b[j].id):
+            diff.removed.append(a[i])
+            i += 1
+        elif i == len(a) or b[j].id < a[i].id:
+            diff.added.append(b[j])
+            j += 1
+        else:
+            prev, cur = a[i], b[j]
+            same = True
+            if prev.type_key != cur.type_key:
+                diff.retyped.append((prev, cur))
+                same = False
+            elif prev.typed_index != cur.typed_index:
+                diff.reindexed.append((prev, cur))
+                same = False
+            if prev.name != cur.name:
+                diff.renamed.append((prev, cur))
+                same = False
+            diff.unchanged += same
+            i += 1
+            j += 1
+
+    for key in dict.fromkeys([*old.counts, *new.counts]):
+        values = (old.counts.get(key, 0), new.counts.get(key, 0))
+        if values[0] != values[1]:
+            diff.constants[key] = values
+    return diff
+
+
+def changed_files(
+    old: MapResult,
+    new: MapResult,
+    registry: GeneratorRegistry = REGISTRY,
+    old_files: Optional[Dict[str, str]] = None,
+    ctx: Optional[Dict[str, Any]] = None,
+) -> Dict[str, bool]:
+    """Які файли реєстру отримають інший вміст (без рендерингу) — за тими ж
+    відбитками, що й інкрементальна регенерація; ім'я проекту, версія й час
+    не враховуються.
+
+    old_files / ctx — тексти попереднього архіву: файли SIM_CONFIG_FILES тоді
+    рендеряться з new і порівнюються з ними без рядків з часом генерації.
+    """
+    before = file_fingerprints(old, registry=registry)
+    after = file_fingerprints(new, registry=registry)
+    changed = {name: before[name] != after[name] for name in after}
+    if old_files and ctx is not None:
+        for name in SIM_CONFIG_FILES:
+            if name in changed and name in old_files:
+                text = "".join(registry.get(name).render(new, ctx))
+                changed[name] = _content_lines(old_files[name]) != _content_lines(text)
+    return changed
+
+
+# ---------------------------------------------------------------------------
+# Попередній архів
+# ---------------------------------------------------------------------------
+
+def devices_from_report(text: str) -> List[RawDevice]:
+    """Пристрої з розділу Devices звіту generation_report.txt."""
+    devices = []
+    for line in text.splitlines():
+        match = _REPORT_DEVICE.match(line)
+        if match is None:
+            continue
+        raw_id, raw_type, name = match.groups()
+        info = TYPES.resolve(raw_type)
+        if info is None:
+            raise GraphError([f'Попередній архів: тип "{raw_type}" (id={raw_id}) не підтримується.'])
+        devices.append(RawDevice(id=int(raw_id), name=name, type_key=info.key,
+                                 raw_type=raw_type, type_code=info.code))
+    return devices
+
+
+def load_archive(content: bytes) -> Snapshot:
+    """Snapshot з архіву попередньої генерації (потрібен generation_report.txt)."""
+    try:
+        with zipfile.ZipFile(io.BytesIO(content)) as zf:
+            names = set(zf.namelist())
+            if REPORT_NAME not in names:
+                raise GraphError([f"Попередній архів не містить {REPORT_NAME}."])
+            files = {
+                name: zf.read(name).decode("utf-8-sig")
+                for name in REGISTRY.names() + [REPORT_NAME]
+                if name in names
+            }
+    except (zipfile.BadZipFile, UnicodeDecodeError):
+        raise GraphError(["Попередній файл не є архівом генерації (ZIP)."])
+    return Snapshot(map_devices(devices_from_report(files.pop(REPORT_NAME))), files)
+
+
+# ---------------------------------------------------------------------------
+# Текстовий diff
+# ---------------------------------------------------------------------------
+
+def text_diff(
+    old_files: Dict[str, str],
+    new_files: Dict[str, str],
+    names: Optional[Iterable[str]] = None,
+    context: int = 3,
+) -> Dict[str, str]:
+    """Unified diff файлів, що є з обох боків (names — лише ці); рядки з часом
+    генерації не порівнюються. Незмінені файли не потрапляють у результат."""
+    out = {}
+    for name in names if names is not None else new_files:
+        if name not in old_files or name not in new_files:
+            continue
+        before, after = _content_lines(old_files[name]), _content_lines(new_files[name])
+        if before == after:
+            continue
+        out[name] = "".join(difflib.unified_diff(
+            before, after, f"a/{name}", f"b/{name}", n=context,
+        ))
+    return out
+
+
+def _content_lines(text: str) -> List[str]:
+    return [line for line in text.splitlines(keepends=True) if not line.startswith(_GENERATED)]
@@ -0,0 +1,131 @@
+"""Спільний шлях виводу генераторів: текстові шматки → UTF-8 у байтовий приймач.
+
+Генератор віддає ітератор шматків тексту, кожен закінчується "\\n". emit()
+кодує їх пачками прямо в приймач (потік члена ZIP, файл), тож повний текст
+файлу ніколи не існує в пам'яті ні як str, ні як bytes.
+
+Блок одного пристрою компілюється в шаблон один раз на тип: константи типу
+(TIA-тип, ім'я масиву, значення за замовчуванням) підставляються при
+компіляції, а поля пристрою — позиційно з кортежу MappedDevice. Тіло, що
+залежить лише від одного поля (IndexedBlock), рендериться один раз на тип.
+"""
+from __future__ import annotations
+
+import itertools
+import string
+from typing import Any, BinaryIO, Callable, Iterable, Iterator, Sequence
+
+BOM = b"\xef\xbb\xbf"
+
+# Скільки шматків кодується за раз (~десятки КБ для блоків пристроїв)
+_BATCH = 256
+
+Writer = Callable[[BinaryIO], None]
+
+_FORMATTER = string.Formatter()
+
+
+def emit(pieces: Iterable[str], sink: BinaryIO, bom: bool = False) -> None:
+    """Пише шматки тексту в sink як UTF-8; з bom=True — спершу UTF-8 BOM."""
+    if bom:
+        sink.write(BOM)
+    it = iter(pieces)
+    while True:
+        batch = list(itertools.islice(it, _BATCH))
+        if not batch:
+            return
+        sink.write("".join(batch).encode("utf-8"))
+
+
+def writer(pieces: Callable[[], Iterable[str]], bom: bool = False) -> Writer:
+    """Відкладений emit: рендеринг почнеться, коли приймач буде готовий."""
+    return lambda sink: emit(pieces(), sink, bom)
+
+
+class BlockTemplate:
+    """Скомпільований шаблон блоку: render(record) == format(*record)."""
+
+    __slots__ = ("source", "_format")
+
+    def __init__(self, source: str) -> None:
+        self.source = source
+        self._format = source.format
+
+    def render(self, record: Sequence[Any]) -> str:
+        return self._format(*record)
+
+    def render_all(self, records: Iterable[Sequence[Any]]) -> Iterator[str]:
+        return itertools.starmap(self._format, records)
+
+
+def literal(text: str) -> str:
+    """Екранує фігурні дужки, щоб текст увійшов у шаблон буквально."""
+    return text.replace("{", "{{").replace("}", "}}")
+
+
+def compile_block(lines: Sequence[str], fields: Sequence[str], **constants: Any) -> BlockTemplate:
+    """Компілює рядки блоку (кожен отримає "\\n") у BlockTemplate.
+
+    {поле} з fields стає позиційним {i} (специфікатори формату зберігаються),
+    {константа} підставляється одразу. Невідоме ім'я — KeyError.
+    """
+    index = {name: i for i, name in enumerate(fields)}
+    out = []
+    for text, name, spec, conversion in _FORMATTER.parse("".join(line + "\n" for line in lines)):
+        out.append(literal(text))
+        if name is None:
+            continue
+        if name in constants:
+            value = _FORMATTER.convert_field(constants[name], conversion)
+            out.append(literal(format(value, spec)))
+        elif name in index:
+            out.append("{%d%s%s}" % (index[name], f"!{conversion}" if conversion else "", f":{spec}" if spec else ""))
+        else:
+            raise KeyError(f"unknown template field: {name}")
+    return BlockTemplate("".join(out))
+
+
+class IndexedBlock:
+    """Заголовок-шаблон + тіло, що залежить лише від одного поля запису.
+
+    Тіло відрендерене при компіляції й розрізане на шматки в місцях поля:
+    для кожного запису значення вставляється через str(value).join(chunks)
+    — без розбору формату на кожне входження.
+    """
+
+    __slots__ = ("head", "chunks", "_index")
+
+    def __init__(self, head: BlockTemplate, chunks: Sequence[str], index: int) -> None:
+        self.head = head
+        self.chunks = tuple(chunks)
+        self._index = index
+
+    def render(self, record: Sequence[Any]) -> str:
+        return self.head.render(record) + str(record[self._index]).join(self.chunks)
+
+    def render_all(self, records: Iterable[Sequence[Any]]) -> Iterator[str]:
+        head, chunks, index = self.head._format, self.chunks, self._index
+        return (head(*record) + str(record[index]).join(chunks) for record in records)
+
+
+def compile_indexed(
+    head: Sequence[str],
+    body: Sequence[str],
+    fields: Sequence[str],
+    field: str,
+    **constants: Any,
+) -> IndexedBlock:
+    """Як compile_block, але тіло може містити лише константи й {field}
+    (без специфікатора формату). Інше ім'я в тілі — KeyError."""
+    chunks = [""]
+    for text, name, spec, conversion in _FORMATTER.parse("".join(line + "\n" for line in body)):
+        chunks[-1] += text
+        if name is None:
+            continue
+        if name in constants:
+            chunks[-1] += format(_FORMATTER.convert_field(constants[name], conversion), spec)
+        elif name == field and not spec and not conversion:
+            chunks.append("")
+        else:
+            raise KeyError(f"unsupported body field: {name}")
+    return IndexedBlock(compile_block(head, fields, **constants), chunks, list(fields).index(field))
@@ -0,0 +1,92 @@
+"""Обмежений пул для CPU-важкої генерації поза event loop."""
+from __future__ import annotations
+
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, TypeVar
+
+T = TypeVar("T")
+
+
+class QueueFullError(Exception):
+    """Усі робітники зайняті й черга заповнена — запит слід повторити пізніше."""
+
+
+class GenerationExecutor:
+    """Пул потоків із контролем допуску.
+
+    Одночасно виконується не більше workers задач, ще queue_size чекають у черзі;
+    решта запитів відхиляється одразу (try_acquire → False), а не накопичується
+    в пам'яті. Слот тримається від допуску до release() — разом з потоковою
+    відповіддю, якщо вона є.
+    """
+
+    def __init__(self, workers: int = 2, queue_size: int = 8) -> None:
+        self.workers = max(1, workers)
+        self.queue_size = max(0, queue_size)
+        self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="codegen")
+        self._in_flight = 0
+        self._rejected = 0
+        self._lock = threading.Lock()
+
+    @property
+    def capacity(self) -> int:
+        return self.workers + self.queue_size
+
+    def try_acquire(self) -> bool:
+        with self._lock:
+            if self._in_flight >= self.capacity:
+                self._rejected += 1
+                return False
+            self._in_flight += 1
+            return True
+
+    def release(self) -> None:
+        with self._lock:
+            self._in_flight -= 1
+
+    def admit(self) -> "_Admission":
+        """Контекстний менеджер допуску; кидає QueueFullError, якщо місць немає."""
+        if not self.try_acquire():
+            raise QueueFullError()
+        return _Admission(self)
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        """Виконує fn у пулі; виклик має бути всередині допущеного слоту."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._pool, partial(fn, *args))
+
+    def shutdown(self) -> None:
+        self._pool.shutdown(wait=False, cancel_futures=True)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "queue_size": self.queue_size,
+                "in_flight": self._in_flight,
+                "rejected": self._rejected,
+            }
+
+
+class _Admission:
+    """Слот, отриманий через admit(). detach() передає відповідальність за release далі."""
+
+    def __init__(self, executor: GenerationExecutor) -> None:
+        self._executor = executor
+        self._held = True
+
+    def __enter__(self) -> "_Admission":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        if self._held:
+            self._executor.release()
+            self._held = False
+
+    def detach(self) -> Callable[[], None]:
+        """Слот не звільняється при виході з with; повертає функцію звільнення."""
+        self._held = False
+        return self._executor.release
@@ -1,16 +1,34 @@
 """Генератор DB_Mechs.scl — масиви механізмів."""
 from __future__ import annotations
 
-from typing import Any, Dict, List
+from functools import lru_cache
+from typing import Any, Dict, Iterator, List, Sequence
 
-from ..defaults import TYPE_MAPPING
-from ..mapper import MapResult
+from ..emitter import BlockTemplate, compile_block
+from ..mapper import MapResult, MappedDevice
+from ..type_registry import TYPES
 
-GROUP_ORDER = ["redler", "noria", "gate2p", "fan",
-               "receivingpit", "separator", "valve3p", "silos", "sushka"]
+GROUP_ORDER = TYPES.order
+
+FOOTER = "END_DATA_BLOCK\n"
 
 
 def generate_db_mechs(result: MapResult, ctx: Dict[str, Any]) -> str:
+    return "".join(iter_db_mechs(result, ctx))
+
+
+def iter_db_mechs(result: MapResult, ctx: Dict[str, Any]) -> Iterator[str]:
+    """Шматки тексту файлу (для generator.emitter.emit)."""
+    yield render_head(result, ctx)
+    for type_key in GROUP_ORDER:
+        group = result.by_type.get(type_key)
+        if group:
+            yield from iter_section(type_key, group)
+    yield FOOTER
+
+
+def render_head(result: MapResult, ctx: Dict[str, Any]) -> str:
+    """Заголовок, VAR-секція та початок BEGIN (до секцій типів)."""
     lines: List[str] = []
     total = len(result.devices)
 
@@ -39,41 +57,39 @@ def generate_db_mechs(result: MapResult, ctx: Dict[str, Any]) -> str:
         group = result.by_type.get(type_key, [])
         if not group:
             continue
-        info = TYPE_MAPPING[type_key]
-        array_name = info["array_name"]
-        udt = info["udt"]
-        count_const = info["count_const"]
-        lines.append(f'    {array_name:<6} : ARRAY [0.."{count_const}"] OF "{udt}";')
+        info = TYPES.by_key[type_key]
+        lines.append(f'    {info.array_name:<6} : ARRAY [0.."{info.count_const}"] OF "{info.udt}";')
 
-    lines += ["END_VAR", "", "BEGIN", "    // === ІНІЦІАЛІЗАЦІЯ СЛОТІВ ==="]
+    lines += ["END_VAR", "", "BEGIN", "    // === ІНІЦІАЛІЗАЦІЯ СЛОТІВ ===", ""]
+    return "\n".join(lines)
 
-    # --- BEGIN: ініціалізація ---
-    for type_key in GROUP_ORDER:
-        group = result.by_type.get(type_key, [])
-        if not group:
-            continue
-        info = TYPE_MAPPING[type_key]
-        tia_type = info["tia_type"]
-        type_name = info["array_name"]
-        group_sorted = sorted(group, key=lambda d: d.id)
-
-        if len(group_sorted) == 1:
-            id_range = f"slot {group_sorted[0].id}"
-        else:
-            id_range = f"slots {group_sorted[0].id}..{group_sorted[-1].id}"
-
-        lines.append("")
-        lines.append(f"    // --- {type_name} ({id_range}) ---")
-
-        for dev in group_sorted:
-            lines.append(f'    // {dev.raw_type} "{dev.name}" (id={dev.id})')
-            lines.append(f"    Mechs[{dev.id}].SlotId     := {dev.id};")
-            lines.append(f'    Mechs[{dev.id}].DeviceType := "{tia_type}";')
-            lines.append(f"    Mechs[{dev.id}].TypedIndex := {dev.typed_index};")
-            lines.append(f"    Mechs[{dev.id}].Enable_OK  := TRUE;")
-            lines.append("")
-
-    lines.append("END_DATA_BLOCK")
-    lines.append("")
 
-    return "\n".join(lines)
+def render_section(type_key: str, group: Sequence[MappedDevice]) -> str:
+    return "".join(iter_section(type_key, group))
+
+
+def iter_section(type_key: str, group: Sequence[MappedDevice]) -> Iterator[str]:
+    """BEGIN-секція ініціалізації слотів одного типу (group відсортована за id — MapResult.by_type)."""
+    if len(group) == 1:
+        id_range = f"slot {group[0].id}"
+    else:
+        id_range = f"slots {group[0].id}..{group[-1].id}"
+
+    yield f"\n    // --- {TYPES.by_key[type_key].array_name} ({id_range}) ---\n"
+    yield from _device_block(type_key).render_all(group)
+
+
+@lru_cache(maxsize=None)
+def _device_block(type_key: str) -> BlockTemplate:
+    return compile_block(
+        [
+            '    // {raw_type} "{name}" (id={id})',
+            "    Mechs[{id}].SlotId     := {id};",
+            '    Mechs[{id}].DeviceType := "{tia_type}";',
+            "    Mechs[{id}].TypedIndex := {typed_index};",
+            "    Mechs[{id}].Enable_OK  := TRUE;",
+            "",
+        ],
+        MappedDevice._fields,
+        tia_type=TYPES.by_key[type_key].tia_type,
+    )
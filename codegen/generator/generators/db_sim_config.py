@@ -1,15 +1,42 @@
 """Генератор DB_SimConfig.scl — конфігурація симуляторів (RETAIN)."""
 from __future__ import annotations
 
-from typing import Any, Dict, List
+from functools import lru_cache
+from operator import attrgetter
+from typing import Any, Dict, Iterator, List, Sequence
 
-from ..defaults import SIM_CONFIG_DEFAULTS, TYPE_MAPPING
-from ..mapper import MapResult
+from ..emitter import IndexedBlock, compile_indexed, literal
+from ..mapper import MapResult, MappedDevice
+from ..parser import SimConfig
+from ..type_registry import TYPES
 
-GROUP_ORDER = ["redler", "noria", "gate2p", "fan"]
+GROUP_ORDER = TYPES.simulated
+
+FOOTER = "END_DATA_BLOCK\n"
+
+# Різних наборів перевизначень у графі зазвичай одиниці; межа — щоб кеш між
+# запитами не ріс від графів з унікальними значеннями на кожен пристрій
+_OVERRIDE_BLOCKS = 1024
+
+_sim_config = attrgetter("sim_config")
 
 
 def generate_db_sim_config(result: MapResult, ctx: Dict[str, Any]) -> str:
+    return "".join(iter_db_sim_config(result, ctx))
+
+
+def iter_db_sim_config(result: MapResult, ctx: Dict[str, Any]) -> Iterator[str]:
+    """Шматки тексту файлу (для generator.emitter.emit)."""
+    yield render_head(result, ctx)
+    for type_key in GROUP_ORDER:
+        group = result.by_type.get(type_key)
+        if group:
+            yield from iter_section(type_key, group)
+    yield FOOTER
+
+
+def render_head(result: MapResult, ctx: Dict[str, Any]) -> str:
+    """Заголовок, VAR-секція та рядок BEGIN."""
     lines: List[str] = []
 
     # --- Заголовок ---
@@ -34,34 +61,57 @@ def generate_db_sim_config(result: MapResult, ctx: Dict[str, Any]) -> str:
         group = result.by_type.get(type_key, [])
         if not group:
             continue
-        info = TYPE_MAPPING[type_key]
-        array_name = info["array_name"]
-        sim_config_udt = info["sim_config_udt"]
-        count_const = info["count_const"]
-        lines.append(f'    {array_name:<6} : ARRAY[0.."{count_const}"] OF "{sim_config_udt}";')
+        info = TYPES.by_key[type_key]
+        lines.append(f'    {info.array_name:<6} : ARRAY[0.."{info.count_const}"] OF "{info.sim_config_udt}";')
 
-    lines += ["END_VAR", "", "BEGIN"]
+    lines += ["END_VAR", "", "BEGIN", ""]
+    return "\n".join(lines)
 
-    # --- BEGIN: значення за замовчуванням ---
-    for type_key in GROUP_ORDER:
-        group = result.by_type.get(type_key, [])
-        if not group:
-            continue
-        info = TYPE_MAPPING[type_key]
-        array_name = info["array_name"]
-        defaults = SIM_CONFIG_DEFAULTS.get(type_key, [])
-        group_sorted = sorted(group, key=lambda d: d.typed_index)
-
-        lines.append(f"    // === {array_name} ===")
-        for dev in group_sorted:
-            lines.append(
-                f'    // {dev.raw_type} "{dev.name}" (id={dev.id}, TypedIndex={dev.typed_index})'
-            )
-            for field_name, value in defaults:
-                lines.append(f"    {array_name}[{dev.typed_index}].{field_name} := {value};")
-            lines.append("")
-
-    lines.append("END_DATA_BLOCK")
-    lines.append("")
 
-    return "\n".join(lines)
+def render_section(type_key: str, group: Sequence[MappedDevice]) -> str:
+    return "".join(iter_section(type_key, group))
+
+
+def iter_section(type_key: str, group: Sequence[MappedDevice]) -> Iterator[str]:
+    """BEGIN-секція значень для одного типу (group у порядку TypedIndex)."""
+    yield f"    // === {TYPES.by_key[type_key].array_name} ===\n"
+    block = _device_block(type_key)
+    if not any(map(_sim_config, group)):
+        yield from block.render_all(group)
+        return
+    for device in group:
+        if device.sim_config:
+            yield _override_block(type_key, device.sim_config).render(device)
+        else:
+            yield block.render(device)
+
+
+@lru_cache(maxsize=None)
+def _device_block(type_key: str) -> IndexedBlock:
+    """Значення за замовчуванням залежать лише від TypedIndex — тіло блоку
+    рендериться один раз на тип, для пристрою підставляється лише індекс."""
+    return _compile_block(type_key, ())
+
+
+@lru_cache(maxsize=_OVERRIDE_BLOCKS)
+def _override_block(type_key: str, sim_config: SimConfig) -> IndexedBlock:
+    """Той самий блок з перевизначеними значеннями — один на набір
+    перевизначень, а не на пристрій."""
+    return _compile_block(type_key, sim_config)
+
+
+def _compile_block(type_key: str, sim_config: SimConfig) -> IndexedBlock:
+    info = TYPES.by_key[type_key]
+    overrides = dict(sim_config)
+    body = [
+        "    {array_name}[{typed_index}]." + literal(f"{field_name} := {overrides.get(field_name, value)};")
+        for field_name, value in info.sim_defaults
+    ]
+    body.append("")
+    return compile_indexed(
+        ['    // {raw_type} "{name}" (id={id}, TypedIndex={typed_index})'],
+        body,
+        MappedDevice._fields,
+        "typed_index",
+        array_name=info.array_name,
+    )
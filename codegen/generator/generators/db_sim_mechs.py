@@ -1,12 +1,12 @@
 """Генератор DB_SimMechs.scl — runtime-стани симуляторів (NON_RETAIN)."""
 from __future__ import annotations
 
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterator, List
 
-from ..defaults import TYPE_MAPPING
 from ..mapper import MapResult
+from ..type_registry import TYPES
 
-GROUP_ORDER = ["redler", "noria", "gate2p", "fan"]
+GROUP_ORDER = TYPES.simulated
 
 
 def generate_db_sim_mechs(result: MapResult, ctx: Dict[str, Any]) -> str:
@@ -35,13 +35,15 @@ def generate_db_sim_mechs(result: MapResult, ctx: Dict[str, Any]) -> str:
         group = result.by_type.get(type_key, [])
         if not group:
             continue
-        info = TYPE_MAPPING[type_key]
-        array_name = info["array_name"]
-        sim_state_udt = info["sim_state_udt"]
-        count_const = info["count_const"]
-        lines.append(f'    {array_name:<6} : ARRAY[0.."{count_const}"] OF "{sim_state_udt}";')
+        info = TYPES.by_key[type_key]
+        lines.append(f'    {info.array_name:<6} : ARRAY[0.."{info.count_const}"] OF "{info.sim_state_udt}";')
 
     # BEGIN завжди порожній — NON_RETAIN, ініціалізується CPU при старті
     lines += ["END_VAR", "", "BEGIN", "END_DATA_BLOCK", ""]
 
     return "\n".join(lines)
+
+
+def iter_db_sim_mechs(result: MapResult, ctx: Dict[str, Any]) -> Iterator[str]:
+    """Розмір файлу не залежить від кількості пристроїв — один шматок."""
+    yield generate_db_sim_mechs(result, ctx)
@@ -0,0 +1,385 @@
+"""Граф з'єднань graph.json: порти, з'єднання, цикли, маршрути матеріалу.
+
+parse_graph бере з пристроїв лише id/name/type; тут — решта документа:
+ports, internal_connections і connections. Вузол графа — порт пристрою
+(цілий номер), ребра:
+
+- з'єднання: вихід пристрою → вхід іншого (connections);
+- внутрішнє: вхід → вихід того самого пристрою (internal_connections;
+  якщо поля немає — кожен вхід з'єднаний з кожним виходом).
+
+Індекс будується за один прохід по пристроях і один по з'єднаннях, пошук
+циклів (Tarjan) — O(портів + ребер), маршрути — пошук у ширину від кожного
+джерела, що зупиняється на приймачах.
+"""
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+from .pipeline import GraphError
+
+# Типи (lowercase, як у graph.json), між якими шукаються маршрути
+SOURCE_TYPES = frozenset({"receivingpit"})
+TARGET_TYPES = frozenset({"silos", "silo"})
+
+
+@dataclass(frozen=True)
+class GraphIssue:
+    kind: str   # duplicate_name | unknown_device | dangling | direction | invalid | cycle
+    message: str
+
+
+@dataclass(frozen=True)
+class Hop:
+    """Пристрій на маршруті: вхід, яким матеріал приходить, і вихід, яким іде далі."""
+
+    device: str
+    in_port: Optional[str]    # None — джерело маршруту
+    out_port: Optional[str]   # None — приймач маршруту
+
+
+@dataclass(frozen=True)
+class Route:
+    source: str
+    target: str
+    hops: Tuple[Hop, ...]
+
+    @property
+    def devices(self) -> List[str]:
+        return [hop.device for hop in self.hops]
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "source": self.source,
+            "target": self.target,
+            "hops": [{"device": h.device, "in_port": h.in_port, "out_port": h.out_port} for h in self.hops],
+        }
+
+
+class ConnectionGraph:
+    """Індекс пристроїв і портів; порти пристрою i — range(port_start[i], port_start[i + 1])."""
+
+    def __init__(self) -> None:
+        self.names: List[str] = []
+        self.ids: List[Optional[int]] = []
+        self.types: List[str] = []                 # тип з graph.json, lowercase
+        self.by_name: Dict[str, int] = {}          # ім'я → номер пристрою (перший з однаковим ім'ям)
+        self.port_start: List[int] = [0]
+        self.port_device: List[int] = []
+        self.port_name: List[str] = []
+        self.port_out: List[bool] = []             # True — вихід, False — вхід
+        self.edges: List[List[int]] = []           # порт → порти, куди йде матеріал
+        self.connections = 0                       # прийняті з'єднання між пристроями
+        self.device_ports: List[Dict[str, int]] = []   # пристрій → {ім'я порту: порт}
+        self.issues: List[GraphIssue] = []
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def id_of(self, name: str) -> Optional[int]:
+        index = self.by_name.get(name)
+        return None if index is None else self.ids[index]
+
+    def port(self, device: int, name: str) -> Optional[int]:
+        return self.device_ports[device].get(name)
+
+    def ports_of(self, device: int) -> range:
+        return range(self.port_start[device], self.port_start[device + 1])
+
+    def successors(self, name: str) -> List[str]:
+        """Пристрої, куди з'єднання ведуть з виходів пристрою name (без повторів)."""
+        index = self.by_name[name]
+        found = {
+            self.port_device[q]: None
+            for p in self.ports_of(index) if self.port_out[p]
+            for q in self.edges[p]
+        }
+        return [self.names[d] for d in found]
+
+    def _issue(self, kind: str, message: str) -> None:
+        self.issues.append(GraphIssue(kind, message))
+
+
+# ---------------------------------------------------------------------------
+# Побудова
+# ---------------------------------------------------------------------------
+
+def build_graph(data: Mapping[str, Any]) -> ConnectionGraph:
+    """ConnectionGraph з розібраного graph.json. Некоректні порти й з'єднання
+    не зупиняють побудову — вони потрапляють у graph.issues і пропускаються."""
+    graph = ConnectionGraph()
+    devices = data.get("devices")
+    for dev in devices if isinstance(devices, list) else ():
+        if isinstance(dev, dict) and isinstance(dev.get("name"), str):
+            _add_device(graph, dev)
+    connections = data.get("connections")
+    if connections is not None and not isinstance(connections, list):
+        graph._issue("invalid", "Поле 'connections' повинно бути масивом.")
+        connections = None
+    for number, conn in enumerate(connections or (), 1):
+        _add_connection(graph, number, conn)
+    return graph
+
+
+def load_connections(content: bytes) -> ConnectionGraph:
+    """Розбирає вміст graph.json і будує граф; некоректний JSON — GraphError."""
+    try:
+        data = json.loads(content)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        raise GraphError(["Невалідний JSON у завантаженому файлі."])
+    if not isinstance(data, dict):
+        raise GraphError(["JSON повинен бути об'єктом {}."])
+    return build_graph(data)
+
+
+def _add_device(graph: ConnectionGraph, dev: Dict[str, Any]) -> None:
+    index = len(graph.names)
+    name = dev["name"]
+    graph.names.append(name)
+    graph.ids.append(_int_id(dev.get("id")))
+    graph.types.append(str(dev.get("type", "")).lower())
+    if name in graph.by_name:
+        graph._issue("duplicate_name", f'Пристрій "{name}": ім\'я повторюється — з\'єднання ведуть до першого.')
+    else:
+        graph.by_name[name] = index
+
+    named: Dict[str, int] = {}
+    graph.device_ports.append(named)
+    port_out, edges = graph.port_out, graph.edges
+    raw_ports = dev.get("ports")
+    for port in raw_ports if isinstance(raw_ports, list) else ():
+        port_name = port.get("name") if isinstance(port, dict) else None
+        direction = port.get("direction") if port_name is not None else None
+        if not isinstance(port_name, str) or direction not in ("in", "out"):
+            graph._issue("invalid", f'Пристрій "{name}": некоректний порт {port!r}.')
+            continue
+        if port_name in named:
+            graph._issue("invalid", f'Пристрій "{name}": порт "{port_name}" повторюється.')
+            continue
+        named[port_name] = len(port_out)
+        graph.port_device.append(index)
+        graph.port_name.append(port_name)
+        port_out.append(direction == "out")
+        edges.append([])
+    graph.port_start.append(len(port_out))
+
+    internal = dev.get("internal_connections")
+    if internal is None:
+        ports = graph.ports_of(index)
+        outputs = [p for p in ports if port_out[p]]
+        for p in ports:
+            if not port_out[p]:
+                edges[p].extend(outputs)
+        return
+    for link in internal if isinstance(internal, list) else ():
+        if isinstance(link, dict):
+            src = _lookup(named, link.get("in_port"))
+            dst = _lookup(named, link.get("out_port"))
+        else:
+            src = dst = None
+        if src is None or dst is None:
+            graph._issue("dangling", f'Пристрій "{name}": внутрішнє з\'єднання {link!r} не відповідає портам.')
+        elif port_out[src] or not port_out[dst]:
+            graph._issue("direction", f'Пристрій "{name}": внутрішнє з\'єднання {link!r} має йти з входу на вихід.')
+        else:
+            edges[src].append(dst)
+
+
+def _add_connection(graph: ConnectionGraph, number: int, conn: Any) -> None:
+    if not isinstance(conn, dict):
+        graph._issue("invalid", f"З'єднання #{number}: повинно бути об'єктом.")
+        return
+    ends = []
+    for role in ("source", "target"):
+        device = conn.get(role + "_device")
+        index = _lookup(graph.by_name, device)
+        if index is None:
+            graph._issue("unknown_device", f'З\'єднання #{number}: пристрій "{device}" не знайдено.')
+            return
+        port = _lookup(graph.device_ports[index], conn.get(role + "_port"))
+        if port is None:
+            graph._issue("dangling", f'З\'єднання #{number}: пристрій "{device}" '
+                                     f'не має порту "{conn.get(role + "_port")}".')
+            return
+        ends.append(port)
+    src, dst = ends
+    if not graph.port_out[src] or graph.port_out[dst]:
+        graph._issue("direction", f"З'єднання #{number}: має йти з виходу "
+                                  f'"{conn["source_device"]}" на вхід "{conn["target_device"]}".')
+        return
+    graph.edges[src].append(dst)
+    graph.connections += 1
+
+
+def _lookup(index: Dict[str, int], key: Any) -> Optional[int]:
+    return index.get(key) if isinstance(key, str) else None
+
+
+def _int_id(value: Any) -> Optional[int]:
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+# ---------------------------------------------------------------------------
+# Цикли
+# ---------------------------------------------------------------------------
+
+def find_cycles(graph: ConnectionGraph) -> List[List[str]]:
+    """Групи пристроїв, між якими матеріал може ходити по колу (сильно
+    зв'язні компоненти графа портів), кожна — у порядку пристроїв у файлі."""
+    components = sorted(sorted({graph.port_device[p] for p in c}) for c in _strong_components(graph.edges))
+    return [[graph.names[d] for d in devices] for devices in components]
+
+
+def _strong_components(edges: Sequence[Sequence[int]]) -> Iterable[List[int]]:
+    """Tarjan без рекурсії; компоненти з одного вузла не повертаються
+    (петля порт → той самий порт у graph.json неможлива)."""
+    index = [-1] * len(edges)
+    low = [0] * len(edges)
+    on_stack = [False] * len(edges)
+    stack: List[int] = []
+    counter = 0
+    for root in range(len(edges)):
+        if index[root] != -1 or not edges[root]:
+            continue
+        index[root] = low[root] = counter
+        counter += 1
+        stack.append(root)
+        on_stack[root] = True
+        work = [(root, 0)]
+        while work:
+            v, i = work[-1]
+            succ = edges[v]
+            if i < len(succ):
+                work[-1] = (v, i + 1)
+                w = succ[i]
+                if index[w] == -1:
+                    index[w] = low[w] = counter
+                    counter += 1
+                    stack.append(w)
+                    on_stack[w] = True
+                    work.append((w, 0))
+                elif on_stack[w] and index[w] < low[v]:
+                    low[v] = index[w]
+                continue
+            work.pop()
+            if work:
+                u = work[-1][0]
+                if low[v] < low[u]:
+                    low[u] = low[v]
+            if low[v] == index[v]:
+                component = []
+                while True:
+                    w = stack.pop()
+                    on_stack[w] = False
+                    component.append(w)
+                    if w == v:
+                        break
+                if len(component) > 1:
+                    yield component
+
+
+# ---------------------------------------------------------------------------
+# Маршрути
+# ---------------------------------------------------------------------------
+
+def find_routes(
+    graph: ConnectionGraph,
+    sources: Iterable[str] = SOURCE_TYPES,
+    targets: Iterable[str] = TARGET_TYPES,
+) -> List[Route]:
+    """Найкоротший (за кількістю пристроїв) маршрут від кожного джерела до
+    кожного досяжного приймача. Маршрут закінчується на вході приймача — через
+    приймач і назад через джерело пошук не йде.
+
+    Стан пошуку — словник відвіданих портів, тож вартість одного джерела
+    пропорційна досяжній частині графа, а не всьому графу.
+    """
+    sources, targets = frozenset(sources), frozenset(targets)
+    routes = []
+    for dev, dev_type in enumerate(graph.types):
+        if dev_type not in sources:
+            continue
+        parent: Dict[int, int] = {}
+        queue = []
+        for p in graph.ports_of(dev):
+            if graph.port_out[p]:
+                parent[p] = -1
+                queue.append(p)
+        found: Dict[int, int] = {}   # приймач → його вхід, яким дійшли першим
+        for p in queue:   # queue росте під час обходу — це і є BFS
+            for q in graph.edges[p]:
+                if q in parent:
+                    continue
+                parent[q] = p
+                owner = graph.port_device[q]
+                if owner == dev:
+                    continue
+                if graph.types[owner] in targets:
+                    found.setdefault(owner, q)
+                    continue
+                queue.append(q)
+        routes.extend(_route(graph, parent, port) for port in found.values())
+    return routes
+
+
+def _route(graph: ConnectionGraph, parent: Dict[int, int], last: int) -> Route:
+    path = []
+    p = last
+    while p != -1:
+        path.append(p)
+        p = parent[p]
+    path.reverse()
+    # path: вихід джерела, (вхід, вихід) проміжних пристроїв, вхід приймача
+    names, ports = graph.names, graph.port_name
+    hops = [Hop(names[graph.port_device[path[0]]], None, ports[path[0]])]
+    for i in range(1, len(path) - 1, 2):
+        hops.append(Hop(names[graph.port_device[path[i]]], ports[path[i]], ports[path[i + 1]]))
+    hops.append(Hop(names[graph.port_device[last]], ports[last], None))
+    return Route(hops[0].device, hops[-1].device, tuple(hops))
+
+
+# ---------------------------------------------------------------------------
+# Звіт
+# ---------------------------------------------------------------------------
+
+@dataclass
+class GraphAnalysis:
+    graph: ConnectionGraph
+    cycles: List[List[str]] = field(default_factory=list)
+    routes: List[Route] = field(default_factory=list)
+
+    @property
+    def issues(self) -> List[GraphIssue]:
+        return self.graph.issues + [
+            GraphIssue("cycle", "Цикл між пристроями: " + ", ".join(f'"{n}"' for n in names))
+            for names in self.cycles
+        ]
+
+    def to_dict(self) -> Dict[str, Any]:
+        graph = self.graph
+        return {
+            "summary": {
+                "devices": len(graph),
+                "ports": len(graph.port_name),
+                "connections": graph.connections,
+                "issues": len(self.issues),
+                "cycles": len(self.cycles),
+                "routes": len(self.routes),
+            },
+            "issues": [{"kind": i.kind, "message": i.message} for i in self.issues],
+            "cycles": self.cycles,
+            "routes": [r.to_dict() for r in self.routes],
+        }
+
+
+def analyze(
+    graph: ConnectionGraph,
+    sources: Iterable[str] = SOURCE_TYPES,
+    targets: Iterable[str] = TARGET_TYPES,
+) -> GraphAnalysis:
+    return GraphAnalysis(graph, find_cycles(graph), find_routes(graph, sources, targets))
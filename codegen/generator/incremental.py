@@ -0,0 +1,166 @@
+"""Інкрементальна регенерація: перерендерюються лише секції змінених типів."""
+from __future__ import annotations
+
+import threading
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+from .generators import db_mechs, db_sim_config, db_sim_mechs
+from .mapper import MapResult
+from .parser import SimConfig
+from .registry import REGISTRY, GeneratorRegistry
+
+# Файли з посекційним рендерингом: ім'я → модуль генератора
+_SECTIONED = {
+    "DB_Mechs.scl":     db_mechs,
+    "DB_SimConfig.scl": db_sim_config,
+}
+
+_Signature = Tuple[Tuple[int, str, str, int], ...]
+_SimSignature = Tuple[Tuple[int, SimConfig], ...]
+
+
+@dataclass
+class IncrementalResult:
+    files: Dict[str, str]                       # ім'я файлу → текст
+    changed: Dict[str, bool]                    # ім'я файлу → чи змінився вміст
+    changed_types: List[str] = field(default_factory=list)
+    rendered_sections: int = 0                  # скільки секцій реально перерендерено
+
+
+def type_signature(result: MapResult, type_key: str) -> _Signature:
+    """Все, що впливає на секцію типу: склад групи, імена та TypedIndex."""
+    return tuple(
+        (d.id, d.name, d.raw_type, d.typed_index)
+        for d in result.by_type.get(type_key, ())
+    )
+
+
+def sim_signature(result: MapResult, type_key: str) -> _SimSignature:
+    """Перевизначення симулятора в групі типу — впливають лише на DB_SimConfig."""
+    return tuple(
+        (d.typed_index, d.sim_config)
+        for d in result.by_type.get(type_key, ())
+        if d.sim_config
+    )
+
+
+class IncrementalGenerator:
+    """Тримає секції попередньої генерації й повторно використовує незмінені.
+
+    Заголовки файлів (з часом генерації) рендеряться щоразу — це кілька рядків.
+    Прапорець changed порівнює все, крім часу генерації. Файли реєстру без
+    посекційного рендерингу генеруються цілком.
+    """
+
+    def __init__(self, registry: GeneratorRegistry = REGISTRY) -> None:
+        self._registry = registry
+        self._signatures: Dict[str, _Signature] = {}
+        self._sim_signatures: Dict[str, _SimSignature] = {}
+        self._sections: Dict[Tuple[str, str], str] = {}
+        self._fingerprints: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+
+    def generate(self, result: MapResult, ctx: Dict[str, Any]) -> IncrementalResult:
+        with self._lock:
+            return self._generate(result, ctx)
+
+    def reset(self) -> None:
+        """Забуває відбитки файлів: наступна генерація позначить усі файли
+        зміненими. Викликається, коли результат попередньої не дійшов до диска."""
+        with self._lock:
+            self._fingerprints = {}
+
+    def _generate(self, result: MapResult, ctx: Dict[str, Any]) -> IncrementalResult:
+        signatures = {key: type_signature(result, key) for key in db_mechs.GROUP_ORDER}
+        changed_types = [
+            key for key, sig in signatures.items()
+            if self._signatures.get(key) != sig
+        ]
+        sim_signatures = {key: sim_signature(result, key) for key in db_sim_config.GROUP_ORDER}
+        changed_sim = {
+            key for key, sig in sim_signatures.items()
+            if self._sim_signatures.get(key) != sig
+        }
+        ctx_sig = (ctx.get("project_name"), ctx.get("version"), ctx.get("source"))
+
+        files: Dict[str, str] = {}
+        rendered = 0
+        for spec in self._registry:
+            filename = spec.name
+            module = _SECTIONED.get(filename)
+            if module is None:
+                # Без посекційного кешу — розмір не залежить від кількості пристроїв
+                files[filename] = "".join(spec.render(result, ctx))
+                continue
+            stale = set(changed_types)
+            if module is db_sim_config:
+                stale |= changed_sim
+            parts = [module.render_head(result, ctx)]
+            for type_key in module.GROUP_ORDER:
+                group = result.by_type.get(type_key)
+                if not group:
+                    self._sections.pop((filename, type_key), None)
+                    continue
+                section = self._sections.get((filename, type_key))
+                if section is None or type_key in stale:
+                    section = module.render_section(type_key, group)
+                    self._sections[(filename, type_key)] = section
+                    rendered += 1
+                parts.append(section)
+            parts.append(module.FOOTER)
+            files[filename] = "".join(parts)
+
+        fingerprints = file_fingerprints(result, ctx_sig, self._registry, signatures, sim_signatures)
+        changed = {
+            name: self._fingerprints.get(name) != fingerprints[name]
+            for name in files
+        }
+
+        self._signatures = signatures
+        self._sim_signatures = sim_signatures
+        self._fingerprints = fingerprints
+        return IncrementalResult(
+            files=files,
+            changed=changed,
+            changed_types=changed_types,
+            rendered_sections=rendered,
+        )
+
+
+def file_fingerprints(
+    result: MapResult,
+    ctx_sig: Tuple[Optional[str], ...] = (None, None, None),
+    registry: GeneratorRegistry = REGISTRY,
+    signatures: Optional[Dict[str, _Signature]] = None,
+    sim_signatures: Optional[Dict[str, _SimSignature]] = None,
+) -> Dict[str, Any]:
+    """Від чого залежить вміст кожного файлу (без часу генерації): різні
+    відбитки — різний вміст. ctx_sig — (project_name, version, source)."""
+    if signatures is None:
+        signatures = {key: type_signature(result, key) for key in db_mechs.GROUP_ORDER}
+    if sim_signatures is None:
+        sim_signatures = {key: sim_signature(result, key) for key in db_sim_config.GROUP_ORDER}
+
+    def by_order(order: List[str]) -> tuple:
+        return tuple(signatures[key] for key in order)
+
+    def non_empty(order: List[str]) -> tuple:
+        return tuple(key for key in order if signatures[key])
+
+    known = {
+        "DB_Mechs.scl":     (ctx_sig, by_order(db_mechs.GROUP_ORDER)),
+        "DB_SimConfig.scl": (
+            ctx_sig[2],
+            by_order(db_sim_config.GROUP_ORDER),
+            tuple(sim_signatures[key] for key in db_sim_config.GROUP_ORDER),
+        ),
+        "DB_SimMechs.scl":  (ctx_sig[2], non_empty(db_sim_mechs.GROUP_ORDER)),
+        "Mechs.csv":        tuple(sorted(result.counts.items())),
+    }
+    # Решта виходів — за полями MapResult, від яких вони залежать (OutputSpec.depends)
+    return {
+        spec.name: known[spec.name] if spec.name in known
+        else (ctx_sig, tuple(getattr(result, name) for name in spec.depends))
+        for spec in registry
+    }
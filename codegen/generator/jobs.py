@@ -0,0 +1,346 @@
+"""Асинхронні задачі генерації (POST /jobs).
+
+Задача отримує id одразу, а розбір → маппінг → рендеринг → пакування
+виконуються у фоні. Кожен етап публікує подію (Job.publish); клієнт читає
+їх через SSE (GET /jobs/{id}/events) — з будь-якого місця, за Last-Event-ID —
+і, дочекавшись "done", забирає артефакт з диска (GET /jobs/{id}/artifact).
+
+JobStore обмежує кількість задач, сумарний розмір їхніх файлів на диску й
+час зберігання завершених: прострочені видаляються разом з файлами, а коли
+місця бракує, першими витісняються найстаріші завершені задачі. Задачі, що
+виконуються, не витісняються ніколи.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import shutil
+import tempfile
+import threading
+import time
+import uuid
+from dataclasses import dataclass
+from functools import partial
+from pathlib import Path
+from typing import Any, Awaitable, BinaryIO, Callable, Dict, Iterable, Iterator, List, Optional, Tuple, TypeVar
+
+from .emitter import Writer
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+
+T = TypeVar("T")
+
+# Події прогресу читання й запису — не частіше ніж раз на стільки байтів
+PROGRESS_STEP = 1024 * 1024
+
+
+class JobLimitError(Exception):
+    """Немає місця для нової задачі або її файлів."""
+
+
+@dataclass(frozen=True)
+class JobEvent:
+    id: int          # 1, 2, … — для Last-Event-ID
+    event: str
+    data: Dict[str, Any]
+
+    def sse(self) -> bytes:
+        data = json.dumps(self.data, ensure_ascii=False)
+        return f"id: {self.id}\nevent: {self.event}\ndata: {data}\n\n".encode()
+
+
+class Job:
+    """Стан однієї задачі й журнал її подій.
+
+    publish викликається з потоку генерації, а читачі SSE чекають у event
+    loop (wait) — їх будить loop.call_soon_threadsafe.
+    """
+
+    def __init__(self, job_id: str, directory: Path, clock: Callable[[], float] = time.monotonic) -> None:
+        self.id = job_id
+        self.directory = directory
+        self.state = QUEUED
+        self.events: List[JobEvent] = []
+        self.errors: List[str] = []
+        self.filename: Optional[str] = None
+        self.media_type: Optional[str] = None
+        self.size = 0
+        self.disk_bytes = 0            # веде JobStore
+        self.finished_at: Optional[float] = None
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._waiters: List[Tuple[asyncio.AbstractEventLoop, asyncio.Future]] = []
+
+    @property
+    def input_path(self) -> Path:
+        return self.directory / "input.json"
+
+    @property
+    def artifact_path(self) -> Path:
+        return self.directory / "artifact"
+
+    @property
+    def finished(self) -> bool:
+        return self.state in (DONE, FAILED)
+
+    def publish(self, event: str, **data: Any) -> JobEvent:
+        return self._publish(None, event, data)
+
+    def start(self) -> None:
+        self._publish(RUNNING, "state", {"state": RUNNING})
+
+    def complete(self, filename: str, media_type: str, size: int, **data: Any) -> None:
+        self.filename, self.media_type, self.size = filename, media_type, size
+        self._publish(DONE, "done", {"filename": filename, "size": size, **data})
+
+    def fail(self, errors: List[str], warnings: Optional[List[str]] = None) -> None:
+        self.errors = errors
+        data: Dict[str, Any] = {"errors": errors}
+        if warnings is not None:
+            data["warnings"] = warnings
+        self._publish(FAILED, "failed", data)
+
+    def events_after(self, cursor: int) -> List[JobEvent]:
+        with self._lock:
+            return self.events[cursor:]
+
+    async def wait(self, cursor: int, timeout: float) -> bool:
+        """Чекає на подію після cursor; False — за timeout нічого не з'явилось."""
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            if len(self.events) > cursor:
+                return True
+            waiter = (loop, loop.create_future())
+            self._waiters.append(waiter)
+        done, _ = await asyncio.wait({waiter[1]}, timeout=timeout)
+        if not done:
+            with self._lock:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+        return bool(done)
+
+    def status(self) -> Dict[str, Any]:
+        with self._lock:
+            last = self.events[-1] if self.events else None
+            content: Dict[str, Any] = {"job_id": self.id, "state": self.state, "events": len(self.events)}
+            if last is not None:
+                content["last_event"] = {"event": last.event, **last.data}
+            return content
+
+    def _publish(self, state: Optional[str], event: str, data: Dict[str, Any]) -> JobEvent:
+        with self._lock:
+            if state is not None:
+                self.state = state
+                if state in (DONE, FAILED):
+                    self.finished_at = self._clock()
+            item = JobEvent(len(self.events) + 1, event, data)
+            self.events.append(item)
+            waiters, self._waiters = self._waiters, []
+        for loop, future in waiters:
+            try:
+                loop.call_soon_threadsafe(_wake, future)
+            except RuntimeError:   # event loop уже закрито
+                pass
+        return item
+
+
+def _wake(future: asyncio.Future) -> None:
+    if not future.done():
+        future.set_result(None)
+
+
+class JobStore:
+    """Потокобезпечне сховище задач з TTL, лімітом кількості й диска.
+
+    Файли задачі лежать у власному підкаталозі directory (за замовчуванням —
+    тимчасовий каталог, створений при першій задачі).
+    """
+
+    def __init__(
+        self,
+        directory: Optional[Path] = None,
+        ttl: float = 3600.0,
+        max_jobs: int = 32,
+        max_bytes: int = 512 * 1024 * 1024,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.ttl = ttl
+        self.max_jobs = max_jobs
+        self.max_bytes = max_bytes
+        self._directory = Path(directory) if directory is not None else None
+        self._clock = clock
+        self._jobs: Dict[str, Job] = {}
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_jobs > 0 and self.ttl > 0 and self.max_bytes > 0
+
+    @property
+    def disk_bytes(self) -> int:
+        with self._lock:
+            return self._bytes
+
+    def create(self) -> Job:
+        """Нова задача; JobLimitError — усі місця зайняті незавершеними задачами."""
+        if not self.enabled:
+            raise JobLimitError("Асинхронні задачі вимкнені.")
+        with self._lock:
+            self._expire(self._clock())
+            if len(self._jobs) >= self.max_jobs and not self._evict_oldest():
+                raise JobLimitError("Забагато задач, що виконуються.")
+            if self._directory is None:
+                self._directory = Path(tempfile.mkdtemp(prefix="codegen-jobs-"))
+            job_id = uuid.uuid4().hex
+            job = Job(job_id, self._directory / job_id, self._clock)
+            job.directory.mkdir(parents=True)
+            self._jobs[job_id] = job
+        return job
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._lock:
+            self._expire(self._clock())
+            return self._jobs.get(job_id)
+
+    def save(
+        self,
+        job: Job,
+        path: Path,
+        chunks: Iterable[bytes],
+        progress: Optional[str] = None,
+    ) -> int:
+        """Записує шматки у файл задачі, резервуючи місце під кожен.
+
+        progress — ім'я події з кількістю вже записаних байтів (не частіше
+        ніж раз на PROGRESS_STEP). JobLimitError — ліміт диска вичерпано.
+        """
+        written = reported = 0
+        with open(path, "wb") as f:
+            for chunk in chunks:
+                self._reserve(job, len(chunk))
+                f.write(chunk)
+                written += len(chunk)
+                if progress is not None and written - reported >= PROGRESS_STEP:
+                    job.publish(progress, bytes=written)
+                    reported = written
+        if progress is not None and written != reported:
+            job.publish(progress, bytes=written)
+        return written
+
+    def remove_file(self, job: Job, path: Path) -> None:
+        """Видаляє проміжний файл задачі (наприклад, вхідний граф) і звільняє місце."""
+        try:
+            size = path.stat().st_size
+            path.unlink()
+        except FileNotFoundError:
+            return
+        with self._lock:
+            size = min(size, job.disk_bytes)
+            job.disk_bytes -= size
+            self._bytes -= size
+
+    def discard(self, job: Job) -> None:
+        with self._lock:
+            if self._jobs.get(job.id) is job:
+                self._remove(job)
+
+    def clear(self) -> None:
+        with self._lock:
+            for job in list(self._jobs.values()):
+                self._remove(job)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._jobs)
+
+    def _reserve(self, job: Job, size: int) -> None:
+        with self._lock:
+            if self._bytes + size > self.max_bytes:
+                self._expire(self._clock())
+                while self._bytes + size > self.max_bytes and self._evict_oldest():
+                    pass
+                if self._bytes + size > self.max_bytes:
+                    raise JobLimitError(
+                        f"Файли задач перевищують ліміт диска {self.max_bytes // (1024 * 1024)} MB."
+                    )
+            job.disk_bytes += size
+            self._bytes += size
+
+    def _expire(self, now: float) -> None:
+        for job in [j for j in self._jobs.values() if j.finished_at is not None and j.finished_at + self.ttl <= now]:
+            self._remove(job)
+
+    def _evict_oldest(self) -> bool:
+        """Видаляє найстарішу завершену задачу; False — таких немає."""
+        for job in self._jobs.values():
+            if job.finished:
+                self._remove(job)
+                return True
+        return False
+
+    def _remove(self, job: Job) -> None:
+        del self._jobs[job.id]
+        self._bytes -= job.disk_bytes
+        job.disk_bytes = 0
+        shutil.rmtree(job.directory, ignore_errors=True)
+
+
+class ProgressReader:
+    """Потік вхідного файлу, що під час читання публікує подію з кількістю
+    прочитаних байтів — прогрес потокового розбору великого графа."""
+
+    def __init__(self, stream: BinaryIO, job: Job, event: str, total: int) -> None:
+        self._stream = stream
+        self._job = job
+        self._event = event
+        self._total = total
+        self._read = self._reported = 0
+
+    def read(self, size: int = -1) -> bytes:
+        data = self._stream.read(size)
+        self._read += len(data)
+        if self._read - self._reported >= PROGRESS_STEP or (not data and self._read != self._reported):
+            self._job.publish(self._event, bytes=self._read, total=self._total)
+            self._reported = self._read
+        return data
+
+
+async def supervise(job: Job, run: Awaitable[T]) -> T:
+    """Чекає на виконання задачі. Якщо воно обірвалося до завершення задачі
+    (пул зупинено, скасування, помилка поза конвеєром), задача отримує
+    "failed" — інакше вона лишилась би running назавжди: читачі SSE не
+    отримали б останньої події, а JobStore не витіснив би її."""
+    try:
+        return await run
+    except BaseException as exc:
+        if not job.finished:
+            reason = f"{type(exc).__name__}: {exc}" if str(exc) else type(exc).__name__
+            job.fail([f"Задачу не виконано ({reason})."])
+        raise
+
+
+def read_chunks(stream: BinaryIO, size: int = 1024 * 1024) -> Iterator[bytes]:
+    return iter(partial(stream.read, size), b"")
+
+
+def track_members(members: Iterable[Tuple[str, Writer]], job: Job) -> Iterator[Tuple[str, Writer]]:
+    """Файли архіву, що після запису публікують подію "file" (ім'я, байти)."""
+    for index, (name, write) in enumerate(members, 1):
+        yield name, partial(_write_tracked, job, index, name, write)
+
+
+def _write_tracked(job: Job, index: int, name: str, write: Writer, sink: BinaryIO) -> None:
+    counter = _CountingWriter(sink)
+    write(counter)
+    job.publish("file", index=index, name=name, bytes=counter.count)
+
+
+class _CountingWriter:
+    def __init__(self, dest: BinaryIO) -> None:
+        self._dest = dest
+        self.count = 0
+
+    def write(self, data: bytes) -> int:
+        self.count += len(data)
+        return self._dest.write(data)
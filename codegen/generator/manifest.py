@@ -0,0 +1,73 @@
+"""MANIFEST.sha256 — хеші згенерованих файлів у форматі sha256sum.
+
+Хеш кожного файлу рахується під час його запису в приймач (член ZIP, файл
+на диску), без повторного читання. У відтворюваному режимі вміст файлів
+залежить лише від графа й параметрів, тож порівняння маніфестів двох
+генерацій показує, які файли змінилися, без розпакування архівів:
+
+    sha256sum -c MANIFEST.sha256
+"""
+from __future__ import annotations
+
+import hashlib
+from functools import partial
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Tuple, Union
+
+from .emitter import Writer
+
+MANIFEST_NAME = "MANIFEST.sha256"
+
+_Content = Union[bytes, Writer]
+
+
+class _HashingSink:
+    """Приймач, що пропускає байти далі й рахує їх SHA-256."""
+
+    def __init__(self, dest: BinaryIO, digest: Any) -> None:
+        self._dest = dest
+        self._digest = digest
+
+    def write(self, data: bytes) -> int:
+        self._digest.update(data)
+        return self._dest.write(data)
+
+
+def with_manifest(members: Iterable[Tuple[str, _Content]]) -> Iterator[Tuple[str, _Content]]:
+    """Ті самі члени + MANIFEST.sha256 останнім.
+
+    Хеш функції запису рахується, коли її викликають, тож споживач має
+    записати член до того, як брати наступний (так працюють iter_zip і CLI).
+    """
+    digests: List[Tuple[str, Any]] = []
+    for name, data in members:
+        digest = hashlib.sha256()
+        digests.append((name, digest))
+        if callable(data):
+            yield name, partial(_write_hashed, data, digest)
+        else:
+            digest.update(data)
+            yield name, data
+    yield MANIFEST_NAME, partial(_write_manifest, digests)
+
+
+def render_manifest(hashes: Iterable[Tuple[str, str]]) -> str:
+    """Рядки "<sha256>  <ім'я>" у порядку файлів."""
+    return "".join(f"{digest}  {name}\n" for name, digest in hashes)
+
+
+def parse_manifest(text: str) -> Dict[str, str]:
+    """ім'я → sha256 з тексту маніфесту (порожні рядки пропускаються)."""
+    hashes = {}
+    for line in text.splitlines():
+        if line.strip():
+            digest, _, name = line.partition("  ")
+            hashes[name] = digest
+    return hashes
+
+
+def _write_hashed(write: Writer, digest: Any, sink: BinaryIO) -> None:
+    write(_HashingSink(sink, digest))
+
+
+def _write_manifest(digests: List[Tuple[str, Any]], sink: BinaryIO) -> None:
+    sink.write(render_manifest((name, d.hexdigest()) for name, d in digests).encode("utf-8"))
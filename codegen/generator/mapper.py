@@ -1,29 +1,21 @@
 """Маппінг пристроїв: призначення TypedIndex, SlotId, підрахунок констант."""
 from __future__ import annotations
 
-from dataclasses import dataclass, field
-from typing import Dict, List
-
-from .defaults import TYPE_MAPPING
-
-# Порядок типів у виводі (відповідає GROUP_ORDER у генераторах)
-TYPE_ORDER = ["redler", "noria", "gate2p", "fan",
-              "receivingpit", "separator", "valve3p", "silos", "sushka"]
-_CONST_MAP = {
-    "noria":        "NORIAS_COUNT",
-    "redler":       "REDLERS_COUNT",
-    "gate2p":       "GATES2P_COUNT",
-    "fan":          "FANS_COUNT",
-    "receivingpit": "RECEIVING_PITS_COUNT",
-    "separator":    "SEPARATORS_COUNT",
-    "valve3p":      "VALVES3P_COUNT",
-    "silos":        "SILOS_COUNT",
-    "sushka":       "SUSHKAS_COUNT",
-}
-
-
-@dataclass
-class MappedDevice:
+from dataclasses import dataclass
+from operator import attrgetter
+from typing import Dict, Iterable, List, NamedTuple, Sequence, Tuple
+
+from .parser import RawDevice, SimConfig
+from .type_registry import TYPES
+
+# Порядок типів у виводі (generator.type_registry — спільний для всіх генераторів)
+TYPE_ORDER = TYPES.order
+
+
+class MappedDevice(NamedTuple):
+    """Незмінний запис пристрою (кортеж: швидше створення й менше пам'яті,
+    ніж dataclass — важливо для 100k пристроїв)."""
+
     id: int
     name: str
     type_key: str        # normalized lowercase
@@ -34,92 +26,76 @@ class MappedDevice:
     has_simulator: bool
     sim_state_udt: str
     sim_config_udt: str
+    sim_config: SimConfig = ()   # перевизначення DB_SimConfig (parser.parse_sim_config)
 
 
-@dataclass
+@dataclass(frozen=True)
 class MapResult:
-    devices: List[MappedDevice]
-    mechs_count: int                           # max(id) among supported devices
-    counts: Dict[str, int]                     # MECHS_COUNT, NORIAS_COUNT, …; -1 = пустий тип
-    gap_slots: List[int]                       # слоти 0..mechs_count без пристроїв
-    by_type: Dict[str, List[MappedDevice]]     # type_key → список (sorted by id)
-
-
-def map_devices(raw_devices: list) -> MapResult:
-    """Приймає список RawDevice, повертає MapResult."""
-    if not raw_devices:
-        return MapResult(
-            devices=[],
-            mechs_count=0,
-            counts={
-                "MECHS_COUNT":          0,
-                "REDLERS_COUNT":        0,
-                "NORIAS_COUNT":         0,
-                "GATES2P_COUNT":        0,
-                "FANS_COUNT":           0,
-                "RECEIVING_PITS_COUNT":  0,
-                "SEPARATORS_COUNT":     0,
-                "VALVES3P_COUNT":       0,
-                "SILOS_COUNT":          0,
-                "SUSHKAS_COUNT":        0,
-            },
-            gap_slots=[],
-            by_type={},
+    devices: Tuple[MappedDevice, ...]                # sorted by id
+    mechs_count: int                                 # max(id) among supported devices
+    counts: Dict[str, int]                           # MECHS_COUNT, NORIAS_COUNT, …; -1 = пустий тип
+    gap_ranges: Tuple[Tuple[int, int], ...]          # порожні слоти 0..mechs_count: [(start, end)], включно
+    by_type: Dict[str, Tuple[MappedDevice, ...]]     # type_key → пристрої (sorted by id = за TypedIndex)
+
+    @property
+    def gap_count(self) -> int:
+        return sum(end - start + 1 for start, end in self.gap_ranges)
+
+    @property
+    def gap_slots(self) -> List[int]:
+        """Усі порожні слоти поштучно (сумісність; для розріджених id — великий список)."""
+        return [i for start, end in self.gap_ranges for i in range(start, end + 1)]
+
+
+def format_ranges(ranges: Iterable[Tuple[int, int]]) -> str:
+    """[(0, 0), (2, 4)] → "0, 2..4" (як межі масивів у SCL)."""
+    return ", ".join(str(a) if a == b else f"{a}..{b}" for a, b in ranges)
+
+
+def map_devices(raw_devices: Sequence[RawDevice]) -> MapResult:
+    """Приймає список RawDevice (унікальні id), повертає MapResult.
+
+    Одне сортування за id, далі один прохід: у порядку id TypedIndex — це
+    просто лічильник у групі типу, групи by_type одразу відсортовані, а
+    прогалини видно між сусідніми id.
+    """
+    devices: List[MappedDevice] = []
+    # Групи й спільні для типу поля MappedDevice — списки за кодом типу
+    groups: List[List[MappedDevice]] = [[] for _ in TYPES.types]
+    type_fields = [
+        (t.key, t.tia_type, t.array_name, t.has_simulator, t.sim_state_udt, t.sim_config_udt)
+        for t in TYPES.types
+    ]
+    gaps: List[Tuple[int, int]] = []
+    expected = 0
+
+    for dev in sorted(raw_devices, key=attrgetter("id")):
+        code = dev.type_code if dev.type_code >= 0 else TYPES.by_key[dev.type_key].code
+        group = groups[code]
+        type_key, tia_type, array_name, has_simulator, sim_state_udt, sim_config_udt = type_fields[code]
+        mapped = MappedDevice(
+            dev.id, dev.name, type_key, dev.raw_type, tia_type, array_name,
+            len(group), has_simulator, sim_state_udt, sim_config_udt, dev.sim_config,
         )
+        devices.append(mapped)
+        group.append(mapped)
+
+        # --- Прогалини між попереднім і поточним id ---
+        if dev.id > expected:
+            gaps.append((expected, dev.id - 1))
+        expected = dev.id + 1
 
-    # --- Групуємо за type_key, сортуємо кожну групу за id ---
-    by_type_raw: Dict[str, list] = {}
-    for dev in raw_devices:
-        by_type_raw.setdefault(dev.type_key, []).append(dev)
-    for key in by_type_raw:
-        by_type_raw[key].sort(key=lambda d: d.id)
-
-    # --- Призначаємо TypedIndex ---
-    typed_index_map: Dict[int, int] = {}
-    for group in by_type_raw.values():
-        for i, dev in enumerate(group):
-            typed_index_map[dev.id] = i
-
-    # --- Будуємо MappedDevice ---
-    mapped: List[MappedDevice] = []
-    for dev in raw_devices:
-        info = TYPE_MAPPING[dev.type_key]
-        mapped.append(MappedDevice(
-            id=dev.id,
-            name=dev.name,
-            type_key=dev.type_key,
-            raw_type=dev.raw_type,
-            tia_type=info["tia_type"],
-            array_name=info["array_name"],
-            typed_index=typed_index_map[dev.id],
-            has_simulator=info.get("has_simulator", False),
-            sim_state_udt=info.get("sim_state_udt", ""),
-            sim_config_udt=info.get("sim_config_udt", ""),
-        ))
-
-    mechs_count = max(d.id for d in mapped)
-
-    # --- Прогалини ---
-    occupied = {d.id for d in mapped}
-    gap_slots = [i for i in range(0, mechs_count + 1) if i not in occupied]
+    mechs_count = devices[-1].id if devices else 0
 
     # --- Константи (верхня межа ARRAY[0..N], тобто len-1; 0 якщо типу немає) ---
     counts: Dict[str, int] = {"MECHS_COUNT": mechs_count}
-    for type_key, const_name in _CONST_MAP.items():
-        group = by_type_raw.get(type_key, [])
-        counts[const_name] = len(group) - 1 if group else 0
-
-    # --- by_type для генераторів (MappedDevice, sorted by id) ---
-    by_type_mapped: Dict[str, List[MappedDevice]] = {}
-    for dev in mapped:
-        by_type_mapped.setdefault(dev.type_key, []).append(dev)
-    for key in by_type_mapped:
-        by_type_mapped[key].sort(key=lambda d: d.id)
+    for info, group in zip(TYPES.types, groups):
+        counts[info.count_const] = len(group) - 1 if group else 0
 
     return MapResult(
-        devices=mapped,
+        devices=tuple(devices),
         mechs_count=mechs_count,
         counts=counts,
-        gap_slots=gap_slots,
-        by_type=by_type_mapped,
+        gap_ranges=tuple(gaps),
+        by_type={info.key: tuple(group) for info, group in zip(TYPES.types, groups) if group},
     )
@@ -0,0 +1,232 @@
+"""Таймінги етапів запиту та метрики у текстовому форматі Prometheus.
+
+Timings — спани одного запиту (для заголовка Server-Timing); Histogram /
+Counter — накопичувальні метрики процесу для GET /metrics. Без зовнішніх
+залежностей (prometheus_client не потрібен).
+"""
+from __future__ import annotations
+
+import bisect
+import math
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from typing import ContextManager, Dict, Iterator, List, Optional, Sequence, Tuple
+
+# Межі кошиків за замовчуванням
+TIME_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+SIZE_BUCKETS = tuple(1024 * 4 ** i for i in range(10))            # 1 KB … 256 MB
+COUNT_BUCKETS = (10, 50, 100, 250, 500, 1_000, 5_000, 10_000, 50_000, 100_000)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+_LabelValues = Tuple[str, ...]
+_LE_INF = 'le="+Inf"'
+
+
+# ---------------------------------------------------------------------------
+# Спани запиту
+# ---------------------------------------------------------------------------
+
+class Timings:
+    """Тривалості етапів одного запиту; повторний етап додається до суми.
+
+    Час вкладеного спану не входить у зовнішній (власний час): наприклад,
+    стиснення всередині рендерингу файлу рахується як "zip", а не як
+    генератор.
+
+    Не потокобезпечний: спани й add() виконуються послідовно (хоч і в різних
+    потоках пулу — наступний крок запиту починається після попереднього).
+    Паралельні рендери файлів (pipeline._emit_parallel) лише повертають
+    свої тривалості, а add() для них викликає потік, що пише архів.
+    """
+
+    def __init__(self, started: Optional[float] = None) -> None:
+        self.started = started if started is not None else time.perf_counter()
+        self._spans: Dict[str, float] = {}
+        self._nested: List[float] = []   # час вкладених спанів для кожного відкритого
+
+    @contextmanager
+    def span(self, name: str) -> Iterator[None]:
+        started = time.perf_counter()
+        self._nested.append(0.0)
+        try:
+            yield
+        finally:
+            total = time.perf_counter() - started
+            self.add(name, total - self._nested.pop())
+            if self._nested:
+                self._nested[-1] += total
+
+    def add(self, name: str, seconds: float) -> None:
+        self._spans[name] = self._spans.get(name, 0.0) + seconds
+
+    def elapsed(self) -> float:
+        return time.perf_counter() - self.started
+
+    def items(self) -> List[Tuple[str, float]]:
+        return list(self._spans.items())
+
+    def server_timing(self, total: bool = True) -> str:
+        """Значення заголовка Server-Timing (тривалості в мс)."""
+        parts = [f"{name};dur={seconds * 1000:.1f}" for name, seconds in self._spans.items()]
+        if total:
+            parts.append(f"total;dur={self.elapsed() * 1000:.1f}")
+        return ", ".join(parts)
+
+
+def span(timings: Optional[Timings], name: str) -> ContextManager:
+    """timings.span(name) або нічого, якщо таймінги не збираються."""
+    return timings.span(name) if timings is not None else nullcontext()
+
+
+# ---------------------------------------------------------------------------
+# Метрики процесу
+# ---------------------------------------------------------------------------
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labels = tuple(labels)
+        self._lock = threading.Lock()
+
+    def _key(self, values: Sequence[str]) -> _LabelValues:
+        if len(values) != len(self.labels):
+            raise ValueError(f"{self.name}: expected labels {self.labels}, got {tuple(values)}")
+        return tuple(str(v) for v in values)
+
+    def _label_str(self, values: _LabelValues, extra: str = "") -> str:
+        pairs = [f'{k}="{_escape(v)}"' for k, v in zip(self.labels, values)]
+        if extra:
+            pairs.append(extra)
+        return "{" + ",".join(pairs) + "}" if pairs else ""
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+        with self._lock:
+            lines += self._samples()
+        return lines
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: Sequence[str] = ()) -> None:
+        super().__init__(name, help, labels)
+        self._values: Dict[_LabelValues, float] = {}
+
+    def inc(self, *label_values: str, amount: float = 1) -> None:
+        key = self._key(label_values)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def value(self, *label_values: str) -> float:
+        with self._lock:
+            return self._values.get(self._key(label_values), 0)
+
+    def _samples(self) -> List[str]:
+        return [
+            f"{self.name}{self._label_str(key)} {_num(value)}"
+            for key, value in sorted(self._values.items())
+        ]
+
+
+class _Series:
+    __slots__ = ("counts", "total", "count")
+
+    def __init__(self, buckets: int) -> None:
+        self.counts = [0] * buckets   # не кумулятивні — лише при рендерингу
+        self.total = 0.0
+        self.count = 0
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        help: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = TIME_BUCKETS,
+    ) -> None:
+        super().__init__(name, help, labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[_LabelValues, _Series] = {}
+
+    def observe(self, value: float, *label_values: str) -> None:
+        key = self._key(label_values)
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = _Series(len(self.buckets))
+            if index < len(self.buckets):
+                series.counts[index] += 1
+            series.total += value
+            series.count += 1
+
+    def count(self, *label_values: str) -> int:
+        with self._lock:
+            series = self._series.get(self._key(label_values))
+            return series.count if series else 0
+
+    def _samples(self) -> List[str]:
+        lines = []
+        for key, series in sorted(self._series.items()):
+            cumulative = 0
+            for bound, n in zip(self.buckets, series.counts):
+                cumulative += n
+                le = 'le="%s"' % _num(bound)
+                lines.append(f"{self.name}_bucket{self._label_str(key, le)} {cumulative}")
+            lines.append(f"{self.name}_bucket{self._label_str(key, _LE_INF)} {series.count}")
+            lines.append(f"{self.name}_sum{self._label_str(key)} {_num(series.total)}")
+            lines.append(f"{self.name}_count{self._label_str(key)} {series.count}")
+        return lines
+
+
+class Registry:
+    """Набір метрик для GET /metrics."""
+
+    def __init__(self) -> None:
+        self._metrics: List[_Metric] = []
+
+    def counter(self, name: str, help: str, labels: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labels))
+
+    def histogram(
+        self,
+        name: str,
+        help: str,
+        labels: Sequence[str] = (),
+        buckets: Sequence[float] = TIME_BUCKETS,
+    ) -> Histogram:
+        return self._register(Histogram(name, help, labels, buckets))
+
+    def _register(self, metric):
+        if any(m.name == metric.name for m in self._metrics):
+            raise ValueError(f"metric {metric.name} already registered")
+        self._metrics.append(metric)
+        return metric
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics:
+            lines += metric.render()
+        return "\n".join(lines) + "\n"
+
+
+def _num(value: float) -> str:
+    if isinstance(value, int) or (math.isfinite(value) and value == int(value) and abs(value) < 1e15):
+        return str(int(value))
+    return repr(float(value))
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
@@ -1,10 +1,19 @@
 """Парсинг та валідація graph.json."""
 from __future__ import annotations
 
+import re
 from dataclasses import dataclass, field
-from typing import List
+from typing import Any, Dict, Iterable, Iterator, List, Mapping, Optional, Tuple
 
-from .defaults import NON_MECHANISM_TYPES, TYPE_MAPPING
+from .type_registry import TYPES, TypeInfo
+
+# Значення поля симулятора, що підставляється в SCL як є (T#5S, 1.5, …)
+_SCL_TOKEN = re.compile(r"[A-Za-z0-9_#.:+\-]+")
+_INT = re.compile(r"-?[0-9]+")
+
+SimConfig = Tuple[Tuple[str, str], ...]
+
+DEVICES_NOT_ARRAY = "Поле 'devices' повинно бути масивом."
 
 
 @dataclass
@@ -13,6 +22,8 @@ class RawDevice:
     name: str
     type_key: str   # normalized lowercase
     raw_type: str   # original string from JSON
+    type_code: int = -1   # TypeInfo.code (generator.type_registry); -1 — визначити за type_key
+    sim_config: SimConfig = ()   # (поле, SCL-значення), що відрізняються від SIM_CONFIG_DEFAULTS
 
 
 @dataclass
@@ -22,19 +33,78 @@ class ParseResult:
     errors: List[str] = field(default_factory=list)
 
 
-def parse_graph(data: dict) -> ParseResult:
-    """Валідує структуру graph.json і повертає список пристроїв або помилки."""
-    result = ParseResult()
-    seen_ids: dict[int, str] = {}  # id → device name
+class ErrorSummary:
+    """Помилки валідації, згруповані за видом: кількість і перші sample_size
+    прикладів кожного виду замість повідомлення на кожен пристрій.
+
+    max_errors > 0 — після max_errors-ї помилки решта пристроїв не
+    перевіряється (aborted).
+    """
+
+    def __init__(self, sample_size: int = 5, max_errors: int = 0) -> None:
+        self.sample_size = sample_size
+        self.max_errors = max_errors
+        self.counts: Dict[str, int] = {}
+        self.samples: Dict[str, List[Dict[str, Any]]] = {}
+        self.total = 0
+        self.checked = 0      # скільки елементів 'devices' перевірено
+        self.aborted = False
+
+    def add(self, kind: str, message: str, device_id: Any = None, name: Any = None) -> None:
+        count = self.counts.get(kind, 0) + 1
+        self.counts[kind] = count
+        if count <= self.sample_size:
+            self.samples.setdefault(kind, []).append({"id": device_id, "name": name, "message": message})
+        self.total += 1
+        if self.max_errors and self.total >= self.max_errors:
+            self.aborted = True
 
+    def iter_checked(self, items: Iterable[Any]) -> Iterator[Any]:
+        """Рахує перевірені елементи й обриває ітерацію після aborted."""
+        for item in items:
+            if self.aborted:
+                return
+            self.checked += 1
+            yield item
+
+    def to_list(self) -> List[Dict[str, Any]]:
+        """Види помилок від найчастішого (однакова кількість — у порядку появи)."""
+        kinds = sorted(self.counts, key=lambda kind: -self.counts[kind])
+        return [{"kind": kind, "count": self.counts[kind], "sample": self.samples.get(kind, [])} for kind in kinds]
+
+
+def parse_graph(data: dict, summary: Optional[ErrorSummary] = None) -> ParseResult:
+    """Валідує структуру graph.json і повертає список пристроїв або помилки."""
     raw_devices = data.get("devices", [])
     if not isinstance(raw_devices, list):
-        result.errors.append("Поле 'devices' повинно бути масивом.")
+        result = ParseResult()
+        if summary is None:
+            result.errors.append(DEVICES_NOT_ARRAY)
+        else:
+            summary.add("devices_not_array", DEVICES_NOT_ARRAY)
         return result
+    return parse_devices(raw_devices, summary)
+
+
+def parse_devices(raw_devices: Iterable[Any], summary: Optional[ErrorSummary] = None) -> ParseResult:
+    """Валідує пристрої по одному — приймає і список, і потік (generator.streaming).
+
+    З summary помилки агрегуються в ньому, а не в result.errors, і розбір
+    зупиняється на summary.max_errors.
+    """
+    result = ParseResult()
+    seen_ids: dict[int, str] = {}  # id → device name
+
+    if summary is None:
+        def fail(kind: str, message: str, device_id: Any = None, name: Any = None) -> None:
+            result.errors.append(message)
+    else:
+        fail = summary.add
+        raw_devices = summary.iter_checked(raw_devices)
 
     for dev in raw_devices:
         if not isinstance(dev, dict):
-            result.errors.append("Кожен елемент 'devices' повинен бути об'єктом.")
+            fail("not_object", "Кожен елемент 'devices' повинен бути об'єктом.")
             continue
 
         name = dev.get("name") or "<без назви>"
@@ -42,27 +112,33 @@ def parse_graph(data: dict) -> ParseResult:
         # --- Validate id ---
         raw_id = dev.get("id")
         if raw_id is None:
-            result.errors.append(f'Пристрій "{name}": відсутній або null id.')
+            fail("missing_id", f'Пристрій "{name}": відсутній або null id.', None, name)
             continue
 
         try:
             dev_id = int(raw_id)
         except (ValueError, TypeError):
-            result.errors.append(
-                f'Пристрій "{name}" (id={raw_id!r}): id має бути невід\'ємним цілим числом.'
+            fail(
+                "invalid_id",
+                f'Пристрій "{name}" (id={raw_id!r}): id має бути невід\'ємним цілим числом.',
+                raw_id, name,
             )
             continue
 
         if dev_id < 0:
-            result.errors.append(
-                f'Пристрій "{name}" (id={dev_id}): id не може бути від\'ємним.'
+            fail(
+                "negative_id",
+                f'Пристрій "{name}" (id={dev_id}): id не може бути від\'ємним.',
+                dev_id, name,
             )
             continue
 
         if dev_id in seen_ids:
-            result.errors.append(
+            fail(
+                "duplicate_id",
                 f'Пристрій "{name}" (id={dev_id}): дублікат id — '
-                f'вже зайнятий пристроєм "{seen_ids[dev_id]}".'
+                f'вже зайнятий пристроєм "{seen_ids[dev_id]}".',
+                dev_id, name,
             )
             continue
 
@@ -71,28 +147,128 @@ def parse_graph(data: dict) -> ParseResult:
         # --- Validate type ---
         raw_type = dev.get("type")
         if raw_type is None:
-            result.errors.append(
+            fail(
+                "missing_type",
                 f'Пристрій "{name}" (id={dev_id}): тип відсутній або null '
-                f'(нетипізований механізм).'
+                f'(нетипізований механізм).',
+                dev_id, name,
             )
             continue
 
-        type_key = str(raw_type).lower()
-
-        if type_key in NON_MECHANISM_TYPES:
-            result.warnings.append(
-                f'Пристрій "{name}" (id={dev_id}): тип "{raw_type}" є не-механізмом → пропущено.'
-            )
+        info = TYPES.resolve(str(raw_type))
+        if info is None:
+            if str(raw_type).lower() in TYPES.non_mechanisms:
+                result.warnings.append(
+                    f'Пристрій "{name}" (id={dev_id}): тип "{raw_type}" є не-механізмом → пропущено.'
+                )
+            else:
+                fail(
+                    "unsupported_type",
+                    f'Пристрій "{name}" (id={dev_id}): тип "{raw_type}" не підтримується TIA Portal.',
+                    dev_id, name,
+                )
             continue
 
-        if type_key not in TYPE_MAPPING:
-            result.errors.append(
-                f'Пристрій "{name}" (id={dev_id}): тип "{raw_type}" не підтримується TIA Portal.'
-            )
-            continue
+        sim_config: SimConfig = ()
+        raw_sim = dev.get("simConfig")
+        if raw_sim is not None:
+            sim_errors = result.errors if summary is None else []
+            sim_config = parse_sim_config(info, raw_sim, f'Пристрій "{name}" (id={dev_id})', sim_errors)
+            if summary is not None:
+                for message in sim_errors:
+                    summary.add("sim_config", message, dev_id, name)
+            if sim_config is None:
+                continue
 
         result.devices.append(
-            RawDevice(id=dev_id, name=name, type_key=type_key, raw_type=raw_type)
+            RawDevice(id=dev_id, name=name, type_key=info.key, raw_type=raw_type,
+                      type_code=info.code, sim_config=sim_config)
         )
 
     return result
+
+
+def parse_sim_config(
+    info: TypeInfo,
+    raw: Any,
+    where: str,
+    errors: List[str],
+    base: SimConfig = (),
+) -> Optional[SimConfig]:
+    """Перевизначення конфігурації симулятора пристрою ({поле: значення}).
+
+    Поверх base; повертає лише поля, що відрізняються від значень типу за
+    замовчуванням, у порядку полів UDT — пристрій без відмінностей рендериться
+    спільним шаблоном типу. При помилках дописує їх в errors і повертає None.
+    """
+    if not isinstance(raw, Mapping):
+        errors.append(f"{where}: 'simConfig' повинно бути об'єктом {{поле: значення}}.")
+        return None
+    if not info.has_simulator:
+        errors.append(f'{where}: тип "{info.key}" не має симулятора — \'simConfig\' не застосовується.')
+        return None
+
+    defaults = dict(info.sim_defaults)
+    values: Dict[str, str] = dict(base)
+    ok = True
+    for field_name, value in raw.items():
+        default = defaults.get(field_name)
+        if default is None:
+            errors.append(f'{where}: невідоме поле симулятора "{field_name}" для типу "{info.key}".')
+            ok = False
+            continue
+        scl = sim_literal(default, value)
+        if scl is None:
+            errors.append(f'{where}: некоректне значення {field_name} = {value!r} (за замовч. {default}).')
+            ok = False
+            continue
+        values[field_name] = scl
+    if not ok:
+        return None
+    return tuple(
+        (field_name, values[field_name])
+        for field_name, default in info.sim_defaults
+        if values.get(field_name, default) != default
+    )
+
+
+def sim_literal(default: str, value: Any) -> Optional[str]:
+    """JSON-значення → SCL-літерал того ж виду, що й default; None — не підходить."""
+    if default in ("TRUE", "FALSE"):
+        if isinstance(value, bool):
+            return "TRUE" if value else "FALSE"
+        if isinstance(value, str) and value.upper() in ("TRUE", "FALSE"):
+            return value.upper()
+        return None
+    if isinstance(value, bool):
+        return None
+    if _INT.fullmatch(default):
+        if isinstance(value, int):
+            return str(value)
+        if isinstance(value, str) and _INT.fullmatch(value):
+            return str(int(value))
+        return None
+    text = str(value) if isinstance(value, (int, float, str)) else ""
+    return text if _SCL_TOKEN.fullmatch(text) else None
+
+
+def apply_sim_overrides(result: ParseResult, overrides: Any) -> None:
+    """Застосовує side-car файл перевизначень {id: {поле: значення}} поверх
+    simConfig з graph.json. Помилки — в result.errors; id без механізму — попередження."""
+    if not isinstance(overrides, Mapping):
+        result.errors.append("Файл перевизначень повинен бути об'єктом {id: {поле: значення}}.")
+        return
+    by_id = {dev.id: dev for dev in result.devices}
+    for raw_id, raw in overrides.items():
+        try:
+            dev = by_id.get(int(raw_id))
+        except (TypeError, ValueError):
+            result.errors.append(f"Перевизначення: id {raw_id!r} має бути цілим числом.")
+            continue
+        if dev is None:
+            result.warnings.append(f"Перевизначення: механізм з id={raw_id} відсутній у графі → пропущено.")
+            continue
+        info = TYPES.types[dev.type_code] if dev.type_code >= 0 else TYPES.by_key[dev.type_key]
+        merged = parse_sim_config(info, raw, f'Пристрій "{dev.name}" (id={dev.id})', result.errors, dev.sim_config)
+        if merged is not None:
+            dev.sim_config = merged
@@ -0,0 +1,482 @@
+"""Конвеєр parse → map → generate → package, спільний для HTTP-сервісу та пакетної обробки."""
+from __future__ import annotations
+
+import io
+import json
+import os
+import time
+from concurrent.futures import Executor
+from dataclasses import dataclass, field, replace
+from datetime import datetime, timezone
+from functools import partial
+from typing import Any, BinaryIO, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from .archive import ZIP_MODES, iter_zip
+from .emitter import Writer, compile_block, emit, writer
+from .manifest import with_manifest
+from .mapper import MapResult, MappedDevice, format_ranges, map_devices
+from .metrics import Timings, span
+from .parser import DEVICES_NOT_ARRAY, ErrorSummary, ParseResult, apply_sim_overrides, parse_devices, parse_graph
+from .registry import REGISTRY, GeneratorRegistry, OutputSpec
+from .streaming import GraphScanner, NotAnObjectError, StreamingJSONError
+from .type_registry import TYPES
+
+# Константи у звіті та відповіді API: MECHS_COUNT і типи з симулятором
+CONST_ORDER = ["MECHS_COUNT", *(TYPES.by_key[key].count_const for key in TYPES.simulated)]
+
+
+class GraphError(Exception):
+    """Некоректний вхідний файл (формат JSON, обов'язкові поля)."""
+
+    def __init__(self, errors: List[str], warnings: Optional[List[str]] = None):
+        super().__init__(errors)
+        self.errors = errors
+        self.warnings = warnings
+
+
+class GraphValidationError(GraphError):
+    """Файл коректний, але пристрої не пройшли валідацію parse_graph."""
+
+
+def load_graph(
+    content: bytes,
+    timings: Optional[Timings] = None,
+    summary: Optional[ErrorSummary] = None,
+) -> ParseResult:
+    """Розбирає вміст graph.json; при помилках кидає GraphError / GraphValidationError.
+
+    З summary помилки пристроїв агрегуються в ньому (parse_devices), а
+    GraphValidationError не кидається — лише GraphError для формату файлу.
+    """
+    data = decode_graph(content, timings)
+
+    # --- Валідація пристроїв ---
+    with span(timings, "parse"):
+        parse_result = parse_graph(data, summary)
+    if parse_result.errors:
+        raise GraphValidationError(parse_result.errors, parse_result.warnings)
+    return parse_result
+
+
+def decode_graph(content: "bytes | str", timings: Optional[Timings] = None) -> Dict[str, Any]:
+    """JSON graph.json як словник з обов'язковими полями; інакше GraphError."""
+    # --- Парсинг JSON ---
+    try:
+        with span(timings, "json"):
+            data = json.loads(content)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        raise GraphError(["Невалідний JSON у завантаженому файлі."])
+
+    if not isinstance(data, dict):
+        raise GraphError(["JSON повинен бути об'єктом {}."])
+
+    # --- Обов'язкові поля ---
+    missing = []
+    if "devices" not in data:
+        missing.append("Відсутнє поле 'devices'.")
+    if "deviceTypes" not in data:
+        missing.append("Відсутнє поле 'deviceTypes'.")
+    if missing:
+        raise GraphError(missing)
+    return data
+
+
+def load_graph_stream(
+    stream: BinaryIO,
+    timings: Optional[Timings] = None,
+    summary: Optional[ErrorSummary] = None,
+) -> ParseResult:
+    """Те саме, що load_graph, але розбирає файл потоком: у пам'яті лише
+    id/name/type пристроїв, а не весь документ. Дострокова зупинка за
+    summary.max_errors обриває й читання файлу."""
+    scanner = GraphScanner(stream)
+    try:
+        # JSON і валідація пристроїв перемежовуються — один етап
+        with span(timings, "parse"):
+            parse_result = parse_devices(scanner.iter_devices(), summary)
+    except NotAnObjectError:
+        raise GraphError(["JSON повинен бути об'єктом {}."])
+    except StreamingJSONError:
+        raise GraphError(["Невалідний JSON у завантаженому файлі."])
+
+    if summary is not None and summary.aborted:
+        # Файл дочитано не весь — решта полів не перевіряється
+        return parse_result
+
+    # --- Обов'язкові поля ---
+    missing = []
+    if "devices" not in scanner.keys:
+        missing.append("Відсутнє поле 'devices'.")
+    if "deviceTypes" not in scanner.keys:
+        missing.append("Відсутнє поле 'deviceTypes'.")
+    if missing:
+        raise GraphError(missing)
+
+    if scanner.devices_is_list is False:
+        if summary is None:
+            raise GraphValidationError([DEVICES_NOT_ARRAY], [])
+        summary.add("devices_not_array", DEVICES_NOT_ARRAY)
+    if parse_result.errors:
+        raise GraphValidationError(parse_result.errors, parse_result.warnings)
+    return parse_result
+
+
+def load_sim_overrides(parse_result: ParseResult, content: bytes) -> None:
+    """Накладає side-car файл перевизначень симулятора ({id: {поле: значення}})
+    на вже розібраний граф; помилки — GraphError / GraphValidationError."""
+    try:
+        overrides = json.loads(content)
+    except (json.JSONDecodeError, UnicodeDecodeError):
+        raise GraphError(["Невалідний JSON у файлі перевизначень."])
+    apply_sim_overrides(parse_result, overrides)
+    if parse_result.errors:
+        raise GraphValidationError(parse_result.errors, parse_result.warnings)
+
+
+def build_ctx(
+    project_name: str,
+    version: str,
+    source: str,
+    generated: Optional[datetime] = None,
+) -> Dict[str, Any]:
+    """generated — час у заголовках файлів та імені архіву (за замовч. — зараз)."""
+    generated = generated or datetime.now()
+    return {
+        "project_name": project_name,
+        "version": version,
+        "timestamp": generated.strftime("%Y-%m-%d %H:%M:%S"),
+        "generated": generated,
+        "source": source,
+    }
+
+
+def zip_filename(ctx: Dict[str, Any]) -> str:
+    ts_file = (ctx.get("generated") or datetime.now()).strftime("%Y%m%d_%H%M%S")
+    return f"scl_{ctx['project_name']}_{ts_file}.zip"
+
+
+SOURCE_DATE_EPOCH_ENV = "SOURCE_DATE_EPOCH"
+
+# Найменша дата, яку вміщує ZIP (MS-DOS)
+ZIP_EPOCH = datetime(1980, 1, 1)
+
+
+def reproducible_time() -> datetime:
+    """Час генерації у відтворюваному режимі: SOURCE_DATE_EPOCH (секунди
+    Unix, UTC — як у reproducible-builds.org) або 1980-01-01 00:00:00."""
+    raw = os.environ.get(SOURCE_DATE_EPOCH_ENV, "").strip()
+    if not raw:
+        return ZIP_EPOCH
+    try:
+        generated = datetime.fromtimestamp(int(raw), tz=timezone.utc).replace(tzinfo=None)
+    except (ValueError, OverflowError, OSError):
+        raise ValueError(f"{SOURCE_DATE_EPOCH_ENV}={raw!r}: очікується ціла кількість секунд.")
+    return max(generated, ZIP_EPOCH)
+
+
+REPORT_NAME = "generation_report.txt"
+RAW_MODE = "raw"
+ARCHIVE_MODES = [*ZIP_MODES, RAW_MODE]
+
+
+class OptionsError(ValueError):
+    """Некоректний вибір файлів або режиму архіву."""
+
+
+@dataclass(frozen=True)
+class OutputOptions:
+    """Які файли генерувати й як пакувати (за замовч. — усі файли у ZIP deflate)."""
+
+    names: Tuple[str, ...]          # вибрані файли в порядку архіву, звіт — останнім
+    archive: str = "deflate"        # stored / fast / deflate / max / raw
+    reproducible: bool = False      # фіксований час, дати членів ZIP і MANIFEST.sha256
+
+    @property
+    def report(self) -> bool:
+        return REPORT_NAME in self.names
+
+    @property
+    def registry(self) -> GeneratorRegistry:
+        return REGISTRY.select(name for name in self.names if name != REPORT_NAME)
+
+    @property
+    def raw(self) -> bool:
+        return self.archive == RAW_MODE
+
+    def cache_params(self) -> Dict[str, Any]:
+        """Параметри для ключа кешу; для вибору за замовчуванням — порожньо."""
+        params: Dict[str, Any] = {}
+        if replace(self, reproducible=False) != default_options():
+            params = {"outputs": list(self.names), "archive": self.archive}
+        if self.reproducible:
+            params["reproducible"] = True
+        return params
+
+
+def default_options() -> OutputOptions:
+    return OutputOptions(names=(*REGISTRY.names(), REPORT_NAME))
+
+
+def output_options(
+    outputs: Optional[str] = None,
+    archive: Optional[str] = None,
+    reproducible: bool = False,
+) -> OutputOptions:
+    """Розбирає параметри запиту: outputs — імена файлів або етапів через кому
+    (регістр не важливий), archive — режим пакування. Помилка — OptionsError."""
+    mode = (archive or "deflate").strip().lower()
+    if mode not in ARCHIVE_MODES:
+        raise OptionsError(f"Невідомий режим архіву '{archive}'. Допустимі: {', '.join(ARCHIVE_MODES)}.")
+    if outputs is None or not outputs.strip():
+        options = replace(default_options(), archive=mode)
+    else:
+        aliases = {REPORT_NAME.lower(): REPORT_NAME, "report": REPORT_NAME}
+        for spec in REGISTRY:
+            aliases[spec.name.lower()] = aliases[spec.stage.lower()] = spec.name
+        wanted = [part.strip() for part in outputs.split(",") if part.strip()]
+        unknown = [part for part in wanted if part.lower() not in aliases]
+        if unknown:
+            raise OptionsError(
+                f"Невідомі файли: {', '.join(unknown)}. Допустимі: {', '.join(default_options().names)}."
+            )
+        selected = {aliases[part.lower()] for part in wanted}
+        options = OutputOptions(
+            names=tuple(name for name in default_options().names if name in selected),
+            archive=mode,
+        )
+    if options.raw and len(options.names) != 1:
+        raise OptionsError("Режим raw віддає один файл без ZIP — оберіть рівно один файл в outputs.")
+    return replace(options, reproducible=reproducible)
+
+
+def output_filename(ctx: Dict[str, Any], options: OutputOptions) -> str:
+    """Ім'я завантаження: архів scl_<project>_<ts>.zip або сам файл у режимі raw."""
+    return options.names[0] if options.raw else zip_filename(ctx)
+
+
+def iter_archive(
+    members: Iterable[Tuple[str, Writer]],
+    options: OutputOptions,
+    timings: Optional[Timings] = None,
+    generated: Optional[datetime] = None,
+) -> Iterator[bytes]:
+    """Файли, упаковані за options.archive, шматками; raw — вміст єдиного файлу.
+
+    У відтворюваному режимі всі члени ZIP отримують дату generated (ctx),
+    а останнім додається MANIFEST.sha256 — архів залежить лише від вмісту.
+    """
+    if options.raw:
+        for _, write in members:
+            buf = io.BytesIO()
+            write(buf)
+            yield buf.getvalue()
+        return
+    compression, level = ZIP_MODES[options.archive]
+    date_time = None
+    if options.reproducible:
+        members = with_manifest(members)
+        date_time = (generated or ZIP_EPOCH).timetuple()[:6]
+    yield from iter_zip(members, compression, timings, compresslevel=level, date_time=date_time)
+
+
+def emit_members(
+    map_result: MapResult,
+    ctx: Dict[str, Any],
+    warnings: List[str],
+    files: Optional[Dict[str, str]] = None,
+    timings: Optional[Timings] = None,
+    pool: Optional[Executor] = None,
+    registry: GeneratorRegistry = REGISTRY,
+    report: bool = True,
+) -> Iterator[Tuple[str, Writer]]:
+    """Файли архіву як (ім'я, функція запису) у порядку реєстру, звіт — останнім.
+
+    Без pool рендеринг відбувається під час запису — прямо в потік члена ZIP
+    або файл. З pool усі файли рендеряться одночасно в пулі (кожен у власний
+    буфер), а в архів пишуться в порядку реєстру, щойно готові: стиснення
+    готових файлів перекривається з рендерингом решти, а загальний час —
+    найповільніший файл, а не сума.
+    files — вже відрендерені тексти (інкрементальний режим).
+    timings — етап на кожен вихід (db_mechs, db_sim_config, …).
+    registry / report — які файли генерувати (generator.registry), чи додавати звіт.
+    """
+    if files is not None:
+        names = list(files)
+        for name, text in files.items():
+            bom = registry.get(name).bom if name in registry else True
+            yield name, writer(partial(iter, (text,)), bom=bom)
+    else:
+        outputs = list(registry)
+        names = [spec.name for spec in outputs]
+        if pool is not None:
+            yield from _emit_parallel(pool, outputs, map_result, ctx, timings)
+        else:
+            for spec in outputs:
+                yield spec.name, _timed(timings, spec.stage, writer(partial(spec.render, map_result, ctx), spec.bom))
+    if report:
+        pieces = partial(iter_report, ctx, map_result, warnings, names)
+        yield REPORT_NAME, _timed(timings, "report", writer(pieces))
+
+
+def _emit_parallel(
+    pool: Executor,
+    outputs: Sequence[OutputSpec],
+    map_result: MapResult,
+    ctx: Dict[str, Any],
+    timings: Optional[Timings],
+) -> Iterator[Tuple[str, Writer]]:
+    futures = [pool.submit(_render_bytes, spec, map_result, ctx) for spec in outputs]
+    try:
+        for spec, future in zip(outputs, futures):
+            # Очікування — поза спаном "zip": iter_zip бере наступний член до запису
+            data, seconds = future.result()
+            if timings is not None:
+                # Тривалість записує потік споживача: Timings не потокобезпечний,
+                # а паралельні етапи не вкладені — додаються напряму, а не через span
+                timings.add(spec.stage, seconds)
+            yield spec.name, partial(_write_bytes, data)
+    finally:
+        for future in futures:
+            future.cancel()
+
+
+def _render_bytes(spec: OutputSpec, map_result: MapResult, ctx: Dict[str, Any]) -> Tuple[bytes, float]:
+    """Вміст файлу й тривалість рендерингу (виконується в пулі рендерингу)."""
+    started = time.perf_counter()
+    buf = io.BytesIO()
+    emit(spec.render(map_result, ctx), buf, spec.bom)
+    return buf.getvalue(), time.perf_counter() - started
+
+
+def _write_bytes(data: bytes, sink: BinaryIO) -> None:
+    sink.write(data)
+
+
+def render_members(
+    map_result: MapResult,
+    ctx: Dict[str, Any],
+    warnings: List[str],
+    files: Optional[Dict[str, str]] = None,
+    timings: Optional[Timings] = None,
+    pool: Optional[Executor] = None,
+    registry: GeneratorRegistry = REGISTRY,
+    report: bool = True,
+) -> Iterator[Tuple[str, bytes]]:
+    """Те саме, що emit_members, але вміст — готові байти (по одному файлу за раз)."""
+    for name, write in emit_members(map_result, ctx, warnings, files, timings, pool, registry, report):
+        buf = io.BytesIO()
+        write(buf)
+        yield name, buf.getvalue()
+
+
+def _timed(timings: Optional[Timings], stage: str, write: Writer) -> Writer:
+    if timings is None:
+        return write
+
+    def timed(sink: BinaryIO) -> None:
+        with timings.span(stage):
+            write(sink)
+    return timed
+
+
+_REPORT_DEVICE = {
+    True: compile_block(
+        ['  [OK]   id={id:<3} {raw_type:<6} "{name}"  -> {tia_type}, SlotId={id}, TypedIndex={typed_index}'],
+        MappedDevice._fields,
+    ),
+    False: compile_block(
+        ['  [SKIP] id={id:<3} {raw_type:<6} "{name}"  -> {tia_type}, SlotId={id}, TypedIndex={typed_index} (no simulator)'],
+        MappedDevice._fields,
+    ),
+}
+
+
+def build_report_text(ctx: dict, map_result, warnings: list, files: Optional[Sequence[str]] = None) -> str:
+    return "".join(iter_report(ctx, map_result, warnings, files))
+
+
+def iter_report(
+    ctx: dict,
+    map_result: MapResult,
+    warnings: list,
+    files: Optional[Sequence[str]] = None,
+) -> Iterator[str]:
+    """files — імена файлів архіву для розділу Files (за замовч. — увесь реєстр)."""
+    yield (
+        f"Generated: {ctx['timestamp']}\n"
+        f"Source: {ctx['source']}\n"
+        f"Project: {ctx['project_name']} v{ctx['version']}\n"
+        "\n"
+        "Devices:\n"
+    )
+
+    for dev in map_result.devices:
+        yield _REPORT_DEVICE[dev.has_simulator].render(dev)
+
+    lines = [f"  [WARN] {w}" for w in warnings]
+
+    lines += ["", "Constants:"]
+    for key in CONST_ORDER:
+        val = map_result.counts.get(key, -1)
+        lines.append(f"  {key:<18} = {val}")
+
+    if map_result.gap_ranges:
+        lines += ["", "Warnings:"]
+        lines.append(f"  [WARN] Порожні слоти у Mechs[]: {format_ranges(map_result.gap_ranges)}")
+
+    if files is None:
+        files = REGISTRY.names()
+    width = max((len(name) for name in files), default=0)
+    lines += ["", "Files:"]
+    lines += [f"  {name:<{width}} OK" for name in files]
+    lines.append("")
+    yield "\n".join(lines)
+
+
+# ---------------------------------------------------------------------------
+# Один проект цілком (для пакетної обробки у ProcessPoolExecutor)
+# ---------------------------------------------------------------------------
+
+@dataclass
+class ProjectOutput:
+    source: str
+    project_name: str
+    ok: bool
+    archive: bytes = b""
+    zip_filename: str = ""
+    errors: List[str] = field(default_factory=list)
+    warnings: List[str] = field(default_factory=list)
+    constants: Dict[str, int] = field(default_factory=dict)
+
+    def report(self) -> Dict[str, Any]:
+        """Запис для batch_report.json (без самого архіву)."""
+        return {
+            "source": self.source,
+            "project_name": self.project_name,
+            "ok": self.ok,
+            "zip_filename": self.zip_filename,
+            "errors": self.errors,
+            "warnings": self.warnings,
+            "constants": self.constants,
+        }
+
+
+def run_project(content: bytes, source: str, project_name: str, version: str) -> ProjectOutput:
+    """Повний конвеєр для одного graph.json. Ніколи не кидає винятків —
+    помилки повертаються у ProjectOutput, щоб один поганий граф не зривав пакет."""
+    output = ProjectOutput(source=source, project_name=project_name, ok=False)
+    try:
+        parse_result = load_graph(content)
+        output.warnings = parse_result.warnings
+        map_result = map_devices(parse_result.devices)
+        ctx = build_ctx(project_name, version, source)
+        output.archive = b"".join(iter_zip(emit_members(map_result, ctx, parse_result.warnings)))
+        output.zip_filename = zip_filename(ctx)
+        output.constants = {k: map_result.counts.get(k, -1) for k in CONST_ORDER}
+        output.ok = True
+    except GraphError as exc:
+        output.errors = exc.errors
+        output.warnings = exc.warnings or []
+    except Exception as exc:
+        output.errors = [f"Внутрішня помилка: {type(exc).__name__}"]
+    return output
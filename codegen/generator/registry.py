@@ -0,0 +1,90 @@
+"""Реєстр вихідних файлів: що генерується, в якому кодуванні й від чого залежить.
+
+Кожен файл архіву (крім generation_report.txt) описується OutputSpec і
+реєструється в REGISTRY. Конвеєр, інкрементальна регенерація, звіт і CLI
+беруть перелік файлів звідси, тож новий вихід (додатковий DB, теги HMI)
+додається реєстрацією, без змін в обробниках:
+
+    REGISTRY.register(OutputSpec("HMI_Tags.csv", "hmi_tags", iter_hmi_tags,
+                                 depends=("devices",)))
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass, fields
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Tuple
+
+from .generators.db_mechs import iter_db_mechs
+from .generators.db_sim_config import iter_db_sim_config
+from .generators.db_sim_mechs import iter_db_sim_mechs
+from .generators.mechs_csv import iter_mechs_csv
+from .mapper import MapResult
+
+RenderFn = Callable[[MapResult, Dict[str, Any]], Iterable[str]]
+
+_MAP_FIELDS = frozenset(f.name for f in fields(MapResult))
+
+
+@dataclass(frozen=True)
+class OutputSpec:
+    name: str                  # ім'я файлу в архіві
+    stage: str                 # етап у Server-Timing / метриках
+    render: RenderFn           # (MapResult, ctx) → шматки тексту, кожен з "\n"
+    bom: bool = True           # UTF-8 BOM — TIA Portal без нього читає як ANSI
+    depends: Tuple[str, ...] = ("devices",)   # поля MapResult, що впливають на вміст
+
+    def __post_init__(self) -> None:
+        unknown = set(self.depends) - _MAP_FIELDS
+        if unknown:
+            raise ValueError(f"{self.name}: unknown MapResult fields {sorted(unknown)}")
+
+
+class GeneratorRegistry:
+    """Впорядкований набір виходів; порядок реєстрації — порядок файлів у ZIP."""
+
+    def __init__(self) -> None:
+        self._outputs: Dict[str, OutputSpec] = {}
+
+    def register(self, spec: OutputSpec) -> OutputSpec:
+        if spec.name in self._outputs:
+            raise ValueError(f"output {spec.name} already registered")
+        if any(o.stage == spec.stage for o in self._outputs.values()):
+            raise ValueError(f"stage {spec.stage} already used")
+        self._outputs[spec.name] = spec
+        return spec
+
+    def unregister(self, name: str) -> None:
+        self._outputs.pop(name, None)
+
+    def get(self, name: str) -> OutputSpec:
+        return self._outputs[name]
+
+    def select(self, names: Iterable[str]) -> "GeneratorRegistry":
+        """Підмножина виходів (у порядку реєстру); невідоме ім'я — KeyError."""
+        wanted = set(names)
+        unknown = wanted - set(self._outputs)
+        if unknown:
+            raise KeyError(", ".join(sorted(unknown)))
+        subset = GeneratorRegistry()
+        for spec in self._outputs.values():
+            if spec.name in wanted:
+                subset.register(spec)
+        return subset
+
+    def names(self) -> List[str]:
+        return list(self._outputs)
+
+    def __iter__(self) -> Iterator[OutputSpec]:
+        return iter(list(self._outputs.values()))
+
+    def __len__(self) -> int:
+        return len(self._outputs)
+
+    def __contains__(self, name: object) -> bool:
+        return name in self._outputs
+
+
+REGISTRY = GeneratorRegistry()
+REGISTRY.register(OutputSpec("DB_Mechs.scl",     "db_mechs",      iter_db_mechs,      depends=("devices", "by_type")))
+REGISTRY.register(OutputSpec("DB_SimConfig.scl", "db_sim_config", iter_db_sim_config, depends=("by_type",)))
+REGISTRY.register(OutputSpec("DB_SimMechs.scl",  "db_sim_mechs",  iter_db_sim_mechs,  depends=("by_type",)))
+REGISTRY.register(OutputSpec("Mechs.csv",        "mechs_csv",     iter_mechs_csv,     depends=("counts",)))
@@ -0,0 +1,174 @@
+"""Результати генерації для посторінкових рядків пристроїв (GET /results/{id}/devices).
+
+/generate віддає лише лічильники й константи, а таблиця пристроїв живе тут
+протягом TTL під result_id (ключ кешу генерації). Рядки-словники не
+будуються наперед: сторінка рендериться з MappedDevice на запит, а
+відфільтровані списки запам'ятовуються для наступних сторінок.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from collections import OrderedDict
+from functools import cached_property
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple, Union
+
+from .mapper import MapResult, MappedDevice, map_devices
+from .parser import RawDevice
+
+STATUSES = ("ok", "skip", "warn")
+
+_Item = Union[MappedDevice, str]   # пристрій або попередження
+
+
+def device_row(dev: MappedDevice) -> Dict[str, Any]:
+    return {
+        "status":       "ok" if dev.has_simulator else "skip",
+        "id":           dev.id,
+        "display_name": dev.name,
+        "type_name":    dev.raw_type,
+        "tia_type":     dev.tia_type,
+        "slot_id":      dev.id,
+        "typed_index":  dev.typed_index,
+        "has_simulator": dev.has_simulator,
+    }
+
+
+def warning_row(message: str) -> Dict[str, Any]:
+    return {"status": "warn", "message": message}
+
+
+def row(item: _Item) -> Dict[str, Any]:
+    return warning_row(item) if isinstance(item, str) else device_row(item)
+
+
+class StoredResult:
+    """Пристрої й попередження однієї генерації.
+
+    Якщо маппінг ще не виконано (відповідь із кешу), він робиться при першому
+    запиті сторінки, а не на гарячому шляху генерації.
+    """
+
+    def __init__(
+        self,
+        devices: Sequence[RawDevice],
+        warnings: List[str],
+        map_result: Optional[MapResult] = None,
+    ) -> None:
+        self._devices = devices
+        self.warnings = warnings
+        self._views: Dict[Tuple[Optional[str], Optional[str]], List[_Item]] = {}
+        if map_result is not None:
+            self.__dict__["map_result"] = map_result
+
+    @cached_property
+    def map_result(self) -> MapResult:
+        return map_devices(self._devices)
+
+    def view(self, status: Optional[str] = None, type_key: Optional[str] = None) -> List[_Item]:
+        """Відфільтровані записи: пристрої (за SlotId), потім попередження."""
+        key = (status, type_key)
+        items = self._views.get(key)
+        if items is None:
+            result = self.map_result
+            devices = result.by_type.get(type_key, ()) if type_key else result.devices
+            if status == "warn":
+                items = []
+            elif status is None:
+                items = list(devices)
+            else:
+                simulated = status == "ok"
+                items = [dev for dev in devices if dev.has_simulator is simulated]
+            if status in (None, "warn") and type_key is None:
+                items.extend(self.warnings)
+            self._views[key] = items
+        return items
+
+    @cached_property
+    def types(self) -> List[str]:
+        """Типи пристроїв генерації — значення для фільтра type."""
+        return sorted(key for key, devices in self.map_result.by_type.items() if devices)
+
+    def page(
+        self,
+        offset: int,
+        limit: int,
+        status: Optional[str] = None,
+        type_key: Optional[str] = None,
+        query: Optional[str] = None,
+    ) -> Tuple[int, List[Dict[str, Any]]]:
+        """(кількість записів після фільтра, рядки сторінки). query — підрядок
+        назви, id, типу чи тексту попередження (без урахування регістру);
+        такі вибірки не запам'ятовуються."""
+        items = self.view(status, type_key)
+        if query:
+            needle = query.lower()
+            items = [item for item in items if needle in _search_text(item)]
+        return len(items), [row(item) for item in items[offset:offset + limit]]
+
+
+def _search_text(item: _Item) -> str:
+    if isinstance(item, str):
+        return item.lower()
+    return f"{item.name} {item.id} {item.raw_type} {item.tia_type}".lower()
+
+
+class ResultStore:
+    """Потокобезпечне сховище StoredResult з TTL і обмеженням кількості.
+
+    Порядок у словнику збігається з порядком закінчення терміну (кожне
+    звернення через put подовжує термін і переносить запис у кінець), тож
+    прострочені записи завжди на початку.
+    """
+
+    def __init__(
+        self,
+        ttl: float = 600.0,
+        max_entries: int = 16,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._clock = clock
+        self._items: "OrderedDict[str, Tuple[float, StoredResult]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_entries > 0 and self.ttl > 0
+
+    def put(self, key: str, make: Callable[[], StoredResult]) -> bool:
+        """Зберігає make() під key або подовжує термін наявного запису
+        (make тоді не викликається). False — сховище вимкнене."""
+        if not self.enabled:
+            return False
+        now = self._clock()
+        with self._lock:
+            self._expire(now)
+            entry = self._items.pop(key, None)
+            result = entry[1] if entry is not None else make()
+            self._items[key] = (now + self.ttl, result)
+            while len(self._items) > self.max_entries:
+                self._items.popitem(last=False)
+        return True
+
+    def get(self, key: str) -> Optional[StoredResult]:
+        with self._lock:
+            self._expire(self._clock())
+            entry = self._items.get(key)
+        return None if entry is None else entry[1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._items.clear()
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._items)
+
+    def _expire(self, now: float) -> None:
+        while self._items:
+            key, (expires, _) = next(iter(self._items.items()))
+            if expires > now:
+                return
+            del self._items[key]
@@ -0,0 +1,361 @@
+"""Сеанс живого редагування графа (WebSocket /session).
+
+Клієнт надсилає graph.json один раз, далі — зміни окремих пристроїв
+(add / remove / retype / rename). Сеанс тримає відсортовані id кожної групи
+типу, прогалини й константи та оновлює їх точково: TypedIndex пристрою —
+його позиція в групі (bisect), тож зміна зсуває лише пристрої того ж типу
+з більшими id. У відповідь ідуть тільки змінені рядки (формат
+generator.results), константи й прогалини.
+
+MapResult будується лише для render і живе до наступної зміни; секції
+файлів між рендерингами повторно використовує IncrementalGenerator.
+"""
+from __future__ import annotations
+
+import json
+from bisect import bisect_left, insort
+from dataclasses import replace
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+from .incremental import IncrementalGenerator
+from .mapper import MapResult, MappedDevice, map_devices
+from .metrics import Timings, span
+from .parser import RawDevice, parse_devices, parse_graph
+from .pipeline import GraphError, GraphValidationError, decode_graph
+from .registry import REGISTRY, GeneratorRegistry
+from .results import device_row
+from .type_registry import TYPES
+
+_Gap = Tuple[int, int]
+
+
+class SessionError(Exception):
+    """Операцію не застосовано; стан сеансу не змінився."""
+
+    def __init__(self, errors: List[str]) -> None:
+        super().__init__(errors)
+        self.errors = errors
+
+
+class _Delta:
+    """Зміни однієї операції: id зі зміненими рядками, видалені id, прогалини."""
+
+    def __init__(self) -> None:
+        self.changed: Set[int] = set()
+        self.removed: Set[int] = set()
+        self.gaps_added: Set[_Gap] = set()
+        self.gaps_removed: Set[_Gap] = set()
+        self.warnings = False
+
+    def add_gap(self, gap: _Gap) -> None:
+        if gap in self.gaps_removed:
+            self.gaps_removed.discard(gap)
+        else:
+            self.gaps_added.add(gap)
+
+    def drop_gap(self, gap: _Gap) -> None:
+        if gap in self.gaps_added:
+            self.gaps_added.discard(gap)
+        else:
+            self.gaps_removed.add(gap)
+
+
+class MappingSession:
+    """Стан маппінгу одного редактора.
+
+    Перше повідомлення handle — вміст graph.json, далі — операції
+    {"op": …, "seq": …}; відповідь завжди словник з "op" (snapshot / delta /
+    rendered / error) і тим самим "seq".
+    """
+
+    def __init__(self, ctx: Dict[str, Any], registry: GeneratorRegistry = REGISTRY) -> None:
+        self.ctx = ctx
+        self.loaded = False
+        self._devices: Dict[int, RawDevice] = {}
+        self._skipped: Dict[int, Tuple[str, str, str]] = {}   # не-механізми: id → (name, type, попередження)
+        self._ids: List[int] = []
+        self._groups: List[List[int]] = [[] for _ in TYPES.types]
+        self._gaps: List[_Gap] = []
+        self._map_result: Optional[MapResult] = None
+        self._generator = IncrementalGenerator(registry)
+
+    # ── Вхід ─────────────────────────────────────────────────────────────────
+    def handle(self, text: str, timings: Optional[Timings] = None) -> Dict[str, Any]:
+        seq = None
+        try:
+            if not self.loaded:
+                return self.load(text, timings)
+            try:
+                message = json.loads(text)
+            except json.JSONDecodeError:
+                raise SessionError(["Повідомлення має бути JSON-об'єктом {\"op\": …}."])
+            if isinstance(message, dict):
+                seq = message.get("seq")
+            with span(timings, "delta"):
+                reply = self.apply(message)
+        except GraphError as exc:
+            reply = {"op": "error", "errors": exc.errors}
+            if exc.warnings is not None:
+                reply["warnings"] = exc.warnings
+            return reply
+        except SessionError as exc:
+            reply = {"op": "error", "errors": exc.errors}
+        if seq is not None:
+            reply["seq"] = seq
+        return reply
+
+    def load(self, content: "bytes | str", timings: Optional[Timings] = None) -> Dict[str, Any]:
+        """Початковий граф; GraphError — як у /generate."""
+        data = decode_graph(content, timings)
+        with span(timings, "parse"):
+            result = parse_graph(data)
+        if result.errors:
+            raise GraphValidationError(result.errors, result.warnings)
+        with span(timings, "map"):
+            mapped = map_devices(result.devices)
+
+        # Без помилок кожен пристрій, що не став механізмом, дав одне попередження
+        mechanisms = {dev.id for dev in result.devices}
+        warnings = iter(result.warnings)
+        self._skipped = {
+            int(dev["id"]): (dev.get("name") or "<без назви>", str(dev["type"]), next(warnings))
+            for dev in data["devices"] if int(dev["id"]) not in mechanisms
+        }
+        self._devices = {dev.id: dev for dev in result.devices}
+        self._ids = [dev.id for dev in mapped.devices]
+        self._groups = [[dev.id for dev in mapped.by_type.get(info.key, ())] for info in TYPES.types]
+        self._gaps = list(mapped.gap_ranges)
+        self._map_result = mapped
+        self.loaded = True
+        return {
+            "op": "snapshot",
+            "devices": [device_row(dev) for dev in mapped.devices],
+            "constants": self.counts(),
+            "gap_ranges": [list(gap) for gap in self.gap_ranges],
+            "gap_count": self.gap_count,
+            "warnings": self.warnings,
+        }
+
+    def apply(self, message: Any) -> Dict[str, Any]:
+        if not isinstance(message, dict):
+            raise SessionError(["Повідомлення має бути JSON-об'єктом {\"op\": …}."])
+        op = message.get("op")
+        if op == "render":
+            return self.render(bool(message.get("text")))
+        handler = _OPS.get(op)
+        if handler is None:
+            raise SessionError([f'Невідома операція "{op}" (add, remove, retype, rename, render).'])
+        before = self.counts()
+        delta = _Delta()
+        handler(self, message, delta)
+        self._map_result = None
+        return self._reply(delta, before)
+
+    # ── Стан ─────────────────────────────────────────────────────────────────
+    @property
+    def mechs_count(self) -> int:
+        return self._ids[-1] if self._ids else 0
+
+    @property
+    def gap_count(self) -> int:
+        # Слоти 0..MECHS_COUNT, не зайняті механізмами
+        return self.mechs_count + 1 - len(self._ids) if self._ids else 0
+
+    @property
+    def gap_ranges(self) -> Tuple[_Gap, ...]:
+        return tuple(self._gaps)
+
+    @property
+    def warnings(self) -> List[str]:
+        return [warning for _, _, warning in self._skipped.values()]
+
+    def counts(self) -> Dict[str, int]:
+        counts = {"MECHS_COUNT": self.mechs_count}
+        for info, group in zip(TYPES.types, self._groups):
+            counts[info.count_const] = len(group) - 1 if group else 0
+        return counts
+
+    def mapped(self, dev_id: int) -> MappedDevice:
+        dev = self._devices[dev_id]
+        info = TYPES.types[dev.type_code]
+        return MappedDevice(
+            dev.id, dev.name, info.key, dev.raw_type, info.tia_type, info.array_name,
+            bisect_left(self._groups[info.code], dev.id), info.has_simulator,
+            info.sim_state_udt, info.sim_config_udt, dev.sim_config,
+        )
+
+    def map_result(self) -> MapResult:
+        if self._map_result is None:
+            self._map_result = map_devices(list(self._devices.values()))
+        return self._map_result
+
+    def render(self, text: bool = False) -> Dict[str, Any]:
+        """Файли з поточного стану; перерендерюються лише секції змінених типів."""
+        result = self._generator.generate(self.map_result(), self.ctx)
+        reply: Dict[str, Any] = {
+            "op": "rendered",
+            "files": {name: "changed" if flag else "unchanged" for name, flag in result.changed.items()},
+            "rendered_sections": result.rendered_sections,
+        }
+        if text:
+            reply["texts"] = {name: result.files[name] for name, flag in result.changed.items() if flag}
+        return reply
+
+    # ── Операції ─────────────────────────────────────────────────────────────
+    def _add(self, message: Dict[str, Any], delta: _Delta) -> None:
+        raw = message.get("device")
+        if not isinstance(raw, dict):
+            raise SessionError(["add: поле 'device' має бути об'єктом пристрою."])
+        device, skipped = self._parse(raw)
+        dev_id = device.id if device is not None else skipped[0]
+        if dev_id in self._devices or dev_id in self._skipped:
+            raise SessionError([f"add: id={dev_id} вже зайнятий."])
+        self._put(dev_id, device, skipped, delta)
+
+    def _remove(self, message: Dict[str, Any], delta: _Delta) -> None:
+        dev_id = self._existing_id(message)
+        if dev_id in self._devices:
+            self._delete(dev_id, delta)
+        else:
+            del self._skipped[dev_id]
+            delta.warnings = True
+
+    def _retype(self, message: Dict[str, Any], delta: _Delta) -> None:
+        dev_id = self._existing_id(message)
+        if "type" not in message:
+            raise SessionError(["retype: відсутнє поле 'type'."])
+        raw = {"id": dev_id, "name": self._name(dev_id), "type": message["type"]}
+        if "simConfig" in message:
+            raw["simConfig"] = message["simConfig"]
+        self._replace(dev_id, raw, delta)
+
+    def _rename(self, message: Dict[str, Any], delta: _Delta) -> None:
+        dev_id = self._existing_id(message)
+        name = message.get("name")
+        if not isinstance(name, str) or not name:
+            raise SessionError(["rename: поле 'name' має бути непорожнім рядком."])
+        dev = self._devices.get(dev_id)
+        if dev is not None:
+            # Тип і TypedIndex не змінюються — лише рядок самого пристрою
+            self._devices[dev_id] = replace(dev, name=name)
+            delta.changed.add(dev_id)
+        else:
+            self._replace(dev_id, {"id": dev_id, "name": name, "type": self._skipped[dev_id][1]}, delta)
+
+    # ── Допоміжне ────────────────────────────────────────────────────────────
+    def _parse(self, raw: Dict[str, Any]) -> Tuple[Optional[RawDevice], Optional[Tuple[int, str, str, str]]]:
+        """Пристрій-механізм або (id, name, type, попередження) не-механізму."""
+        result = parse_devices([raw])
+        if result.errors:
+            raise SessionError(result.errors)
+        if result.devices:
+            return result.devices[0], None
+        return None, (int(raw["id"]), raw.get("name") or "<без назви>", str(raw["type"]), result.warnings[0])
+
+    def _existing_id(self, message: Dict[str, Any]) -> int:
+        op = message.get("op")
+        try:
+            dev_id = int(message.get("id"))
+        except (TypeError, ValueError):
+            raise SessionError([f"{op}: поле 'id' має бути цілим числом."])
+        if dev_id not in self._devices and dev_id not in self._skipped:
+            raise SessionError([f"{op}: пристрій з id={dev_id} відсутній."])
+        return dev_id
+
+    def _name(self, dev_id: int) -> str:
+        dev = self._devices.get(dev_id)
+        return dev.name if dev is not None else self._skipped[dev_id][0]
+
+    def _replace(self, dev_id: int, raw: Dict[str, Any], delta: _Delta) -> None:
+        device, skipped = self._parse(raw)   # спершу перевірка — при помилці стан не змінюється
+        if dev_id in self._devices:
+            self._delete(dev_id, delta)
+        else:
+            del self._skipped[dev_id]
+            delta.warnings = True
+        self._put(dev_id, device, skipped, delta)
+
+    def _put(
+        self,
+        dev_id: int,
+        device: Optional[RawDevice],
+        skipped: Optional[Tuple[int, str, str, str]],
+        delta: _Delta,
+    ) -> None:
+        if device is not None:
+            self._insert(device, delta)
+        else:
+            self._skipped[dev_id] = skipped[1:]
+            delta.warnings = True
+
+    def _insert(self, dev: RawDevice, delta: _Delta) -> None:
+        self._devices[dev.id] = dev
+        group = self._groups[dev.type_code]
+        pos = bisect_left(group, dev.id)
+        group.insert(pos, dev.id)
+        delta.changed.update(group[pos:])   # TypedIndex наступних зсувається на +1
+        delta.removed.discard(dev.id)
+
+        i = bisect_left(self._ids, dev.id)
+        prev = self._ids[i - 1] if i else -1
+        nxt = self._ids[i] if i < len(self._ids) else None
+        self._ids.insert(i, dev.id)
+        if nxt is not None:
+            self._drop_gap((prev + 1, nxt - 1), delta)
+            self._add_gap((prev + 1, dev.id - 1), delta)
+            self._add_gap((dev.id + 1, nxt - 1), delta)
+        else:
+            self._add_gap((prev + 1, dev.id - 1), delta)
+
+    def _delete(self, dev_id: int, delta: _Delta) -> None:
+        dev = self._devices.pop(dev_id)
+        group = self._groups[dev.type_code]
+        pos = bisect_left(group, dev_id)
+        del group[pos]
+        delta.changed.update(group[pos:])   # TypedIndex наступних зсувається на -1
+        delta.changed.discard(dev_id)
+        delta.removed.add(dev_id)
+
+        i = bisect_left(self._ids, dev_id)
+        prev = self._ids[i - 1] if i else -1
+        nxt = self._ids[i + 1] if i + 1 < len(self._ids) else None
+        del self._ids[i]
+        self._drop_gap((prev + 1, dev_id - 1), delta)
+        if nxt is not None:
+            self._drop_gap((dev_id + 1, nxt - 1), delta)
+            self._add_gap((prev + 1, nxt - 1), delta)
+
+    def _add_gap(self, gap: _Gap, delta: _Delta) -> None:
+        if gap[0] <= gap[1]:
+            insort(self._gaps, gap)
+            delta.add_gap(gap)
+
+    def _drop_gap(self, gap: _Gap, delta: _Delta) -> None:
+        if gap[0] <= gap[1]:
+            del self._gaps[bisect_left(self._gaps, gap)]
+            delta.drop_gap(gap)
+
+    def _reply(self, delta: _Delta, before: Dict[str, int]) -> Dict[str, Any]:
+        after = self.counts()
+        reply: Dict[str, Any] = {
+            "op": "delta",
+            "rows": [device_row(self.mapped(dev_id)) for dev_id in sorted(delta.changed)],
+            "removed": sorted(delta.removed),
+            "constants": {name: value for name, value in after.items() if before.get(name) != value},
+            "gaps": {
+                "added": [list(gap) for gap in sorted(delta.gaps_added)],
+                "removed": [list(gap) for gap in sorted(delta.gaps_removed)],
+            },
+            "gap_count": self.gap_count,
+        }
+        if delta.warnings:
+            reply["warnings"] = self.warnings
+        return reply
+
+
+_OPS: Dict[str, Callable[[MappingSession, Dict[str, Any], _Delta], None]] = {
+    "add":    MappingSession._add,
+    "remove": MappingSession._remove,
+    "retype": MappingSession._retype,
+    "rename": MappingSession._rename,
+}
@@ -0,0 +1,278 @@
+"""Потоковий розбір graph.json без завантаження всього файлу в пам'ять.
+
+Сканер читає байтовий потік шматками і віддає пристрої по одному, лише з
+потрібними полями (id / name / type / simConfig). Непотрібні піддерева — pos_x/pos_y,
+ports, internal_connections, connections, deviceTypes — пропускаються
+регулярними виразами без побудови Python-об'єктів; у них перевіряється лише
+баланс дужок і рядків.
+"""
+from __future__ import annotations
+
+import codecs
+import json
+import re
+from typing import Any, BinaryIO, Iterator, Optional, Set
+
+DEVICE_FIELDS = frozenset({"id", "name", "type", "simConfig"})
+
+_CHUNK_SIZE = 64 * 1024
+
+_WS = re.compile(r"[ \t\n\r]*")
+# Тіло рядка після відкривальної лапки, включно із закривальною
+_STRING_BODY = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*"', re.S)
+_NUMBER = re.compile(r"-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][+-]?[0-9]+)?")
+# Все, що не є дужками: звичайні символи та повні рядки (за один виклик re)
+_SKIP = re.compile(r'(?:[^"\[\]{}]+|"[^"\\]*(?:\\.[^"\\]*)*")*', re.S)
+_LITERALS = {"true": True, "false": False, "null": None}
+# Скільки символів після скаляра мають бути в буфері, щоб він точно не обірвався
+_SCALAR_TAIL = 5
+_CLOSERS = {"{": "}", "[": "]"}
+
+
+class StreamingJSONError(ValueError):
+    """Невалідний JSON у потоці."""
+
+
+class NotAnObjectError(StreamingJSONError):
+    """Валідний JSON, але верхній рівень — не об'єкт {}."""
+
+
+class GraphScanner:
+    """Однопрохідний сканер graph.json.
+
+    Після повного проходу iter_devices() доступні keys (ключі верхнього рівня)
+    та devices_is_list (False, якщо 'devices' є не масивом).
+    """
+
+    def __init__(
+        self,
+        stream: BinaryIO,
+        fields: frozenset = DEVICE_FIELDS,
+        chunk_size: int = _CHUNK_SIZE,
+    ) -> None:
+        self._stream = stream
+        self._fields = fields
+        self._chunk_size = chunk_size
+        self._decoder = codecs.getincrementaldecoder("utf-8-sig")()
+        self._buf = ""
+        self._pos = 0
+        self._eof = False
+        self.keys: Set[str] = set()
+        self.devices_is_list: Optional[bool] = None
+
+    # ------------------------------------------------------------------
+    # Верхній рівень
+    # ------------------------------------------------------------------
+
+    def iter_devices(self) -> Iterator[Any]:
+        """Пристрої з масиву 'devices' (dict з полями fields; не-об'єкти → None)."""
+        if self._peek() != "{":
+            self._skip_value()
+            self._finish()
+            raise NotAnObjectError("top-level value is not an object")
+        self._pos += 1
+
+        if self._peek() == "}":
+            self._pos += 1
+        else:
+            while True:
+                key = self._read_key()
+                self.keys.add(key)
+                if key == "devices":
+                    if self._peek() == "[":
+                        self.devices_is_list = True
+                        yield from self._iter_array()
+                    else:
+                        self.devices_is_list = False
+                        self._skip_value()
+                else:
+                    self._skip_value()
+                if not self._separator("}"):
+                    break
+        self._finish()
+
+    def _iter_array(self) -> Iterator[Any]:
+        self._pos += 1  # '['
+        if self._peek() == "]":
+            self._pos += 1
+            return
+        while True:
+            if self._peek() == "{":
+                yield self._read_device()
+            else:
+                self._skip_value()
+                yield None
+            if not self._separator("]"):
+                return
+
+    def _read_device(self) -> dict:
+        self._pos += 1  # '{'
+        out: dict = {}
+        if self._peek() == "}":
+            self._pos += 1
+            return out
+        while True:
+            key = self._read_key()
+            if key in self._fields:
+                out[key] = self._read_value()
+            else:
+                self._skip_value()
+            if not self._separator("}"):
+                return out
+
+    def _read_key(self) -> str:
+        if self._peek() != '"':
+            raise StreamingJSONError("expected object key")
+        key = self._read_string()
+        if self._peek() != ":":
+            raise StreamingJSONError("expected ':'")
+        self._pos += 1
+        return key
+
+    def _separator(self, closer: str) -> bool:
+        """True — далі наступний елемент (','), False — контейнер закрито."""
+        ch = self._peek()
+        self._pos += 1
+        if ch == ",":
+            return True
+        if ch == closer:
+            return False
+        raise StreamingJSONError(f"expected ',' or '{closer}'")
+
+    def _finish(self) -> None:
+        if self._peek() != "":
+            raise StreamingJSONError("extra data after JSON value")
+
+    # ------------------------------------------------------------------
+    # Значення
+    # ------------------------------------------------------------------
+
+    def _read_value(self) -> Any:
+        """Матеріалізує значення (лише для потрібних полів — вони малі)."""
+        ch = self._peek()
+        if ch == '"':
+            return self._read_string()
+        if ch == "{":
+            self._pos += 1
+            obj = {}
+            if self._peek() == "}":
+                self._pos += 1
+                return obj
+            while True:
+                key = self._read_key()
+                obj[key] = self._read_value()
+                if not self._separator("}"):
+                    return obj
+        if ch == "[":
+            self._pos += 1
+            arr = []
+            if self._peek() == "]":
+                self._pos += 1
+                return arr
+            while True:
+                arr.append(self._read_value())
+                if not self._separator("]"):
+                    return arr
+        return self._read_scalar()
+
+    def _skip_value(self) -> None:
+        ch = self._peek()
+        if ch == '"':
+            self._skip_string()
+        elif ch in _CLOSERS:
+            self._skip_container()
+        else:
+            self._read_scalar()
+
+    def _skip_container(self) -> None:
+        stack = []
+        while True:
+            self._pos = _SKIP.match(self._buf, self._pos).end()
+            if self._pos >= len(self._buf):
+                if not self._fill():
+                    raise StreamingJSONError("unexpected end of data")
+                continue
+            ch = self._buf[self._pos]
+            if ch == '"':
+                self._skip_string()   # рядок, що не вмістився в буфер
+            elif ch in _CLOSERS:
+                stack.append(_CLOSERS[ch])
+                self._pos += 1
+            else:
+                if not stack or stack.pop() != ch:
+                    raise StreamingJSONError("mismatched bracket")
+                self._pos += 1
+                if not stack:
+                    return
+
+    def _match_string(self) -> re.Match:
+        while True:
+            m = _STRING_BODY.match(self._buf, self._pos + 1)
+            if m is not None:
+                return m
+            if not self._fill():
+                raise StreamingJSONError("unterminated string")
+
+    def _skip_string(self) -> None:
+        self._pos = self._match_string().end()
+
+    def _read_string(self) -> str:
+        m = self._match_string()
+        raw = self._buf[self._pos:m.end()]
+        self._pos = m.end()
+        if "\\" not in raw:
+            return raw[1:-1]
+        try:
+            return json.loads(raw)
+        except json.JSONDecodeError as exc:
+            raise StreamingJSONError(str(exc)) from None
+
+    def _read_scalar(self) -> Any:
+        while True:
+            buf, pos = self._buf, self._pos
+            for literal, value in _LITERALS.items():
+                if buf.startswith(literal, pos):
+                    self._pos = pos + len(literal)
+                    return value
+            m = _NUMBER.match(buf, pos)
+            # Літерал чи число біля кінця буфера могли обірватися ("tr", "1.",
+            # "2e-" — регулярний вираз тоді бере лише цілу частину) — дочитуємо
+            end = pos if m is None else m.end()
+            if len(buf) - end < _SCALAR_TAIL and not self._eof:
+                self._fill()   # буфер зсунуто — шукаємо заново, навіть якщо потік вичерпано
+                continue
+            if m is None or m.end() == pos:
+                raise StreamingJSONError("unexpected character")
+            self._pos = m.end()
+            text = m.group()
+            return float(text) if any(c in text for c in ".eE") else int(text)
+
+    # ------------------------------------------------------------------
+    # Буфер
+    # ------------------------------------------------------------------
+
+    def _peek(self) -> str:
+        """Пропускає пробіли й повертає наступний символ ('' — кінець потоку)."""
+        while True:
+            self._pos = _WS.match(self._buf, self._pos).end()
+            if self._pos < len(self._buf):
+                return self._buf[self._pos]
+            if not self._fill():
+                return ""
+
+    def _fill(self) -> bool:
+        """Дочитує наступний шматок; False — потік вичерпано."""
+        if self._eof:
+            return False
+        data = self._stream.read(self._chunk_size)
+        try:
+            if data:
+                text = self._decoder.decode(data)
+            else:
+                text = self._decoder.decode(b"", final=True)
+                self._eof = True
+        except UnicodeDecodeError as exc:
+            raise StreamingJSONError(str(exc)) from None
+        self._buf = self._buf[self._pos:] + text
+        self._pos = 0
+        return bool(text) or not self._eof
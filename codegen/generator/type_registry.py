@@ -0,0 +1,195 @@
+"""Скомпільований реєстр типів пристроїв.
+
+TYPE_MAPPING / SIM_CONFIG_DEFAULTS (generator.defaults) один раз при імпорті
+перетворюються на незмінні дескриптори TypeInfo з цілим кодом типу. Парсер
+перетворює рядок типу на код один раз, а маппер і генератори далі
+звертаються лише до атрибутів і списків за кодом — без пошуку в словниках
+на кожен пристрій.
+
+Нові типи механізмів додаються без змін коду — JSON-файлом у змінній
+середовища CODEGEN_TYPES_FILE (формат — див. TypeRegistry.extend):
+
+    {
+      "types": {
+        "conveyor": {"tia_type": "TYPE_CONVEYOR", "array_name": "Conveyor",
+                     "count_const": "CONVEYORS_COUNT", "label": "конвеєрів"}
+      },
+      "non_mechanisms": ["camera"]
+    }
+"""
+from __future__ import annotations
+
+import json
+import os
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple, Union
+
+from .defaults import CSV_ORDER, NON_MECHANISM_TYPES, SIM_CONFIG_DEFAULTS, TYPE_MAPPING, TYPE_ORDER
+
+TYPES_FILE_ENV = "CODEGEN_TYPES_FILE"
+
+_REQUIRED = ("tia_type", "array_name", "count_const")
+
+# Варіантів написання типу ("Noria", "NORIA", …) у реальних графах одиниці
+_RESOLVED_MAX = 1024
+
+
+class TypeConfigError(ValueError):
+    """Некоректний опис типів у конфігураційному файлі."""
+
+
+@dataclass(frozen=True)
+class TypeInfo:
+    code: int                                   # індекс у TypeRegistry.types (порядок груп)
+    key: str                                    # тип у graph.json, lowercase
+    tia_type: str                               # e.g. "TYPE_NORIA"
+    udt: str                                    # e.g. "UDT_Noria"
+    array_name: str                             # e.g. "Noria"
+    count_const: str                            # e.g. "NORIAS_COUNT"
+    label: str                                  # "норій" — для коментаря Mechs.csv
+    has_simulator: bool
+    sim_state_udt: str
+    sim_config_udt: str
+    sim_defaults: Tuple[Tuple[str, str], ...]   # (поле, значення) для DB_SimConfig
+
+    @property
+    def count_comment(self) -> str:
+        return f"Верхня межа масиву {self.array_name}[] (кількість {self.label} - 1)"
+
+
+class TypeRegistry:
+    """Незмінний набір типів: types[code], by_key[key], упорядковані групи."""
+
+    def __init__(
+        self,
+        types: Sequence[TypeInfo],
+        non_mechanisms: Iterable[str],
+        csv_order: Sequence[str],
+    ) -> None:
+        self.types: Tuple[TypeInfo, ...] = tuple(types)
+        self.by_key: Dict[str, TypeInfo] = {t.key: t for t in self.types}
+        self.non_mechanisms = frozenset(non_mechanisms)
+        # Групи у SCL-файлах: усі типи / лише з симулятором (DB_SimConfig, DB_SimMechs)
+        self.order: List[str] = [t.key for t in self.types]
+        self.simulated: List[str] = [t.key for t in self.types if t.has_simulator]
+        # Mechs.csv: явний порядок, нові типи — у кінці
+        self.csv_order: List[str] = [k for k in csv_order if k in self.by_key]
+        self.csv_order += [k for k in self.order if k not in self.csv_order]
+        # Рядок типу з graph.json → TypeInfo; заповнюється при розборі
+        self._resolved: Dict[str, TypeInfo] = {}
+
+    def resolve(self, raw_type: str) -> Optional[TypeInfo]:
+        """TypeInfo для рядка типу з graph.json (без урахування регістру); None — невідомий."""
+        info = self._resolved.get(raw_type)
+        if info is None:
+            info = self.by_key.get(raw_type.lower())
+            if info is not None and len(self._resolved) < _RESOLVED_MAX:
+                self._resolved[raw_type] = info
+        return info
+
+    def extend(self, config: Mapping[str, Any]) -> "TypeRegistry":
+        """Новий реєстр: цей + типи з config.
+
+        config["types"] — {key: опис}; опис існуючого типу оновлює його поля,
+        новий тип потребує tia_type, array_name, count_const (udt, UDT симулятора
+        й label виводяться з array_name). sim_defaults — [[поле, значення], …].
+        config["order"] / ["csv_order"] — порядок груп (решта типів — у кінці),
+        config["non_mechanisms"] — додаткові не-механізми.
+        """
+        raw_types = config.get("types", {})
+        if not isinstance(raw_types, Mapping):
+            raise TypeConfigError("'types' повинно бути об'єктом {тип: опис}.")
+
+        specs: Dict[str, Dict[str, Any]] = {t.key: _spec(t) for t in self.types}
+        for raw_key, spec in raw_types.items():
+            key = str(raw_key).lower()
+            if not isinstance(spec, Mapping):
+                raise TypeConfigError(f"Тип '{raw_key}': опис повинен бути об'єктом.")
+            if key not in specs:
+                missing = [name for name in _REQUIRED if not spec.get(name)]
+                if missing:
+                    raise TypeConfigError(f"Тип '{raw_key}': відсутні поля {', '.join(missing)}.")
+                specs[key] = {}
+            specs[key].update(spec)
+
+        order = [str(k).lower() for k in config.get("order", [])]
+        unknown = [k for k in order if k not in specs]
+        if unknown:
+            raise TypeConfigError(f"'order': невідомі типи {', '.join(unknown)}.")
+        order += [k for k in specs if k not in order]
+
+        non_mechanisms = set(self.non_mechanisms) | {str(k).lower() for k in config.get("non_mechanisms", [])}
+        clash = non_mechanisms & set(specs)
+        if clash:
+            raise TypeConfigError(f"Типи одночасно механізми й не-механізми: {', '.join(sorted(clash))}.")
+
+        csv_order = [str(k).lower() for k in config.get("csv_order", self.csv_order)]
+        types = [_compile(code, key, specs[key]) for code, key in enumerate(order)]
+        consts = [t.count_const for t in types]
+        if len(set(consts)) != len(consts) or "MECHS_COUNT" in consts:
+            raise TypeConfigError("count_const має бути унікальним і не MECHS_COUNT.")
+        return TypeRegistry(types, non_mechanisms, csv_order)
+
+
+def _spec(info: TypeInfo) -> Dict[str, Any]:
+    return {
+        "tia_type": info.tia_type,
+        "udt": info.udt,
+        "array_name": info.array_name,
+        "count_const": info.count_const,
+        "label": info.label,
+        "has_simulator": info.has_simulator,
+        "sim_state_udt": info.sim_state_udt,
+        "sim_config_udt": info.sim_config_udt,
+        "sim_defaults": info.sim_defaults,
+    }
+
+
+def _compile(code: int, key: str, spec: Mapping[str, Any]) -> TypeInfo:
+    array_name = str(spec["array_name"])
+    has_simulator = bool(spec.get("has_simulator", False))
+    sim = f"UDT_Sim{array_name}" if has_simulator else ""
+    try:
+        sim_defaults = tuple((str(name), str(value)) for name, value in spec.get("sim_defaults", ()))
+    except (TypeError, ValueError):
+        raise TypeConfigError(f"Тип '{key}': sim_defaults — список пар [поле, значення].")
+    return TypeInfo(
+        code=code,
+        key=key,
+        tia_type=str(spec["tia_type"]),
+        udt=str(spec.get("udt") or f"UDT_{array_name}"),
+        array_name=array_name,
+        count_const=str(spec["count_const"]),
+        label=str(spec.get("label") or array_name),
+        has_simulator=has_simulator,
+        sim_state_udt=str(spec.get("sim_state_udt") or (sim and f"{sim}State")),
+        sim_config_udt=str(spec.get("sim_config_udt") or (sim and f"{sim}Config")),
+        sim_defaults=sim_defaults,
+    )
+
+
+def builtin_types() -> TypeRegistry:
+    """Реєстр із generator.defaults."""
+    specs = {key: {**TYPE_MAPPING[key], "sim_defaults": SIM_CONFIG_DEFAULTS.get(key, ())} for key in TYPE_MAPPING}
+    base = TypeRegistry((), NON_MECHANISM_TYPES, ())
+    return base.extend({"types": specs, "order": TYPE_ORDER, "csv_order": CSV_ORDER})
+
+
+def load_types(path: Union[str, Path], base: Optional[TypeRegistry] = None) -> TypeRegistry:
+    """base (за замовч. — вбудовані типи), розширений JSON-файлом path."""
+    try:
+        config = json.loads(Path(path).read_text(encoding="utf-8"))
+    except (OSError, json.JSONDecodeError, UnicodeDecodeError) as exc:
+        raise TypeConfigError(f"{path}: {exc}")
+    if not isinstance(config, dict):
+        raise TypeConfigError(f"{path}: очікується JSON-об'єкт.")
+    return (base or builtin_types()).extend(config)
+
+
+def _load() -> TypeRegistry:
+    path = os.environ.get(TYPES_FILE_ENV)
+    return load_types(path) if path else builtin_types()
+
+
+TYPES = _load()
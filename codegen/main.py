@@ -1,31 +1,182 @@
 """FastAPI-сервіс: JSON → SCL кодогенератор."""
 from __future__ import annotations
 
+import asyncio
 import base64
 import io
 import json
 import os
+import threading
+import time
 import zipfile
-from datetime import datetime
-from pathlib import Path
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from dataclasses import dataclass, field
+from functools import cached_property, partial
+from pathlib import Path, PurePosixPath
+from typing import AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
+from urllib.parse import quote
 
-from fastapi import FastAPI, Form, UploadFile
-from fastapi.responses import HTMLResponse, JSONResponse
+from fastapi import FastAPI, Form, Request, UploadFile, WebSocket, WebSocketDisconnect
+from fastapi.responses import FileResponse, HTMLResponse, JSONResponse, Response, StreamingResponse
 
-from generator.generators.db_mechs import generate_db_mechs
-from generator.generators.db_sim_config import generate_db_sim_config
-from generator.generators.db_sim_mechs import generate_db_sim_mechs
-from generator.generators.mechs_csv import generate_mechs_csv
-from generator.mapper import map_devices
-from generator.parser import parse_graph
+from generator.archive import iter_zip
+from generator.cache import CachedGeneration, GenerationCache, cache_key
+from generator.diff import Snapshot, changed_files, diff_maps, load_archive, text_diff
+from generator.executor import GenerationExecutor, QueueFullError
+from generator.graph import GraphAnalysis, find_cycles, find_routes, load_connections
+from generator.incremental import IncrementalGenerator, IncrementalResult
+from generator.jobs import (
+    DONE,
+    FAILED,
+    Job,
+    JobLimitError,
+    JobStore,
+    ProgressReader,
+    read_chunks,
+    supervise,
+    track_members,
+)
+from generator.mapper import MapResult, map_devices
+from generator.metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE
+from generator.metrics import COUNT_BUCKETS, SIZE_BUCKETS, Registry, Timings
+from generator.parser import ErrorSummary, ParseResult
+from generator.registry import REGISTRY
+from generator.type_registry import TYPES
+from generator.results import STATUSES, ResultStore, StoredResult, device_row, warning_row
+from generator.session import MappingSession
+from generator.pipeline import (
+    CONST_ORDER,
+    SOURCE_DATE_EPOCH_ENV,
+    GraphError,
+    GraphValidationError,
+    OptionsError,
+    OutputOptions,
+    ProjectOutput,
+    build_ctx,
+    default_options,
+    emit_members,
+    iter_archive,
+    load_graph,
+    load_graph_stream,
+    output_filename,
+    output_options,
+    reproducible_time,
+    run_project,
+)
 
-_BOM = b"\xef\xbb\xbf"
+# Генерація виконується поза event loop, щоб /health і решта запитів не блокувались
+_executor = GenerationExecutor(
+    workers=int(os.environ.get("MAX_CONCURRENT_GENERATIONS", "2")),
+    queue_size=int(os.environ.get("GENERATION_QUEUE_SIZE", "8")),
+)
+_RETRY_AFTER_SECONDS = os.environ.get("RETRY_AFTER_SECONDS", "5")
 
-app = FastAPI(title="JSON → SCL Codegen")
+# Файли, більші за поріг, розбираються потоково (generator.streaming): повільніше
+# за json.loads, але пам'ять не залежить від розміру ports/connections тощо
+_STREAM_PARSE_THRESHOLD_BYTES = int(float(os.environ.get("STREAM_PARSE_THRESHOLD_MB", "2")) * 1024 * 1024)
+
+# Пул процесів для /generate/batch — створюється при першому пакетному запиті
+_BATCH_WORKERS = int(os.environ.get("BATCH_WORKERS", "0")) or os.cpu_count() or 1
+_batch_pool: Optional[ProcessPoolExecutor] = None
+
+# Файли одного архіву рендеряться одночасно (generator.registry). 1 — послідовно,
+# прямо в потік ZIP (найменше пам'яті); 0 — за кількістю ядер.
+_RENDER_WORKERS = int(os.environ.get("RENDER_WORKERS", "0")) or min(len(REGISTRY), os.cpu_count() or 1)
+_render_pool: Optional[ThreadPoolExecutor] = (
+    ThreadPoolExecutor(max_workers=_RENDER_WORKERS, thread_name_prefix="render")
+    if _RENDER_WORKERS > 1 else None
+)
+
+# Скільки прикладів кожного виду помилки може повернути /validate
+_VALIDATE_MAX_SAMPLE = 100
+
+# Відтворюваний режим за замовчуванням, якщо задано SOURCE_DATE_EPOCH
+_REPRODUCIBLE_DEFAULT = bool(os.environ.get(SOURCE_DATE_EPOCH_ENV, "").strip())
+if _REPRODUCIBLE_DEFAULT:
+    reproducible_time()   # некоректне значення — помилка при старті, а не в кожному запиті
+
+
+@asynccontextmanager
+async def _lifespan(app: FastAPI):
+    yield
+    _executor.shutdown()
+    _jobs.clear()
+    if _batch_pool is not None:
+        _batch_pool.shutdown(cancel_futures=True)
+    if _render_pool is not None:
+        _render_pool.shutdown(wait=False, cancel_futures=True)
+
+
+app = FastAPI(title="JSON → SCL Codegen", lifespan=_lifespan)
+
+
+class _RequestStart:
+    """ASGI-middleware: момент початку запиту — щоб виміряти завантаження
+    й розбір multipart, які відбуваються ще до виклику обробника."""
+
+    def __init__(self, app) -> None:
+        self.app = app
+
+    async def __call__(self, scope, receive, send) -> None:
+        if scope["type"] == "http":
+            scope["codegen.started"] = time.perf_counter()
+        await self.app(scope, receive, send)
+
+
+app.add_middleware(_RequestStart)
 
 _UI_PATH = Path(__file__).parent / "ui.html"
 
-_CONST_ORDER = ["MECHS_COUNT", "REDLERS_COUNT", "NORIAS_COUNT", "GATES2P_COUNT", "FANS_COUNT"]
+_cache = GenerationCache(
+    max_entries=int(os.environ.get("CACHE_MAX_ENTRIES", "32")),
+    max_bytes=int(os.environ.get("CACHE_MAX_MB", "64")) * 1024 * 1024,
+)
+
+# Пристрої останніх генерацій для GET /results/{id}/devices
+_results = ResultStore(
+    ttl=float(os.environ.get("RESULT_TTL_SECONDS", "600")),
+    max_entries=int(os.environ.get("RESULT_MAX_ENTRIES", "16")),
+)
+# Найбільша сторінка GET /results/{id}/devices
+_RESULT_PAGE_MAX = 1000
+
+# Асинхронні задачі POST /jobs: артефакти на диску в JOBS_DIR (або тимчасовому каталозі)
+_jobs = JobStore(
+    directory=os.environ.get("JOBS_DIR") or None,
+    ttl=float(os.environ.get("JOB_TTL_SECONDS", "3600")),
+    max_jobs=int(os.environ.get("JOB_MAX_ENTRIES", "32")),
+    max_bytes=int(os.environ.get("JOB_MAX_MB", "512")) * 1024 * 1024,
+)
+_job_tasks: "set[asyncio.Task]" = set()
+# Коментар-keepalive у потоці SSE, якщо подій довго немає
+_SSE_KEEPALIVE_SECONDS = 15.0
+
+# Одночасні сеанси WebSocket /session (кожен тримає маппінг свого графа в пам'яті)
+_sessions = threading.BoundedSemaphore(max(1, int(os.environ.get("SESSION_MAX_ACTIVE", "16"))))
+
+# Стан інкрементальної генерації: (project_name, source) → IncrementalGenerator
+_INCREMENTAL_MAX_PROJECTS = int(os.environ.get("INCREMENTAL_MAX_PROJECTS", "16"))
+_incremental: "OrderedDict[Tuple[str, str], IncrementalGenerator]" = OrderedDict()
+_incremental_lock = threading.Lock()
+
+# Метрики процесу (GET /metrics, формат Prometheus)
+_metrics = Registry()
+_stage_seconds = _metrics.histogram(
+    "codegen_stage_duration_seconds", "Тривалість етапу генерації", ["stage"])
+_request_seconds = _metrics.histogram(
+    "codegen_request_duration_seconds", "Тривалість запиту", ["endpoint"])
+_upload_bytes = _metrics.histogram(
+    "codegen_upload_bytes", "Розмір завантаженого graph.json", buckets=SIZE_BUCKETS)
+_device_count = _metrics.histogram(
+    "codegen_devices", "Кількість механізмів у графі", buckets=COUNT_BUCKETS)
+_generated_bytes = _metrics.histogram(
+    "codegen_generated_bytes", "Розмір згенерованого ZIP-архіву", buckets=SIZE_BUCKETS)
+_requests_total = _metrics.counter(
+    "codegen_requests_total", "Запити за кодом відповіді", ["endpoint", "status"])
+_errors_total = _metrics.counter(
+    "codegen_errors_total", "Помилки за видом", ["endpoint", "kind"])
 
 
 # ---------------------------------------------------------------------------
@@ -39,115 +190,959 @@ async def index() -> str:
 
 @app.get("/health")
 async def health() -> dict:
-    return {"status": "ok"}
+    return {"status": "ok", "cache": _cache.stats(), "executor": _executor.stats()}
+
+
+@app.get("/metrics")
+async def metrics() -> Response:
+    return Response(content=_metrics.render(), media_type=METRICS_CONTENT_TYPE)
 
 
 @app.post("/generate")
 async def generate(
+    request: Request,
+    file: UploadFile,
+    project_name: str = Form(default=None),
+    version: str = Form(default="1.0.0"),
+    incremental: bool = Form(default=False),
+    outputs: str = Form(default=None),
+    archive: str = Form(default=None),
+    reproducible: bool = Form(default=None),
+) -> JSONResponse:
+    """Архів у base64 + лічильники й константи. Таблиця пристроїв у відповідь
+    не входить — вона доступна посторінково за result_id
+    (GET /results/{result_id}/devices) протягом RESULT_TTL_SECONDS."""
+    timings = _request_timings(request)
+    try:
+        options = _output_options(outputs, archive, reproducible)
+        with _executor.admit():
+            prepared = await _prepare(file, project_name, version, timings, options)
+            content = await _run(timings, _generate_content, prepared, incremental)
+    except QueueFullError:
+        return _finish("generate", _busy_response(), timings, "busy")
+    except _RequestError as exc:
+        return _finish("generate", exc.response(), timings, exc.kind)
+    return _finish("generate", JSONResponse(status_code=200, content=content), timings)
+
+
+@app.post("/generate.zip")
+async def generate_zip(
+    request: Request,
     file: UploadFile,
     project_name: str = Form(default=None),
     version: str = Form(default="1.0.0"),
+    incremental: bool = Form(default=False),
+    outputs: str = Form(default=None),
+    archive: str = Form(default=None),
+    reproducible: bool = Form(default=None),
+) -> Response:
+    """Бінарний ZIP без base64: архів віддається потоком, файл за файлом.
+
+    Константи та лічильники — у заголовках X-*; таблиця пристроїв —
+    посторінково через GET /results/{X-Result-Id}/devices. В інкрементальному режимі змінені файли
+    перелічені в X-Changed-Files. З archive=raw — один файл без ZIP.
+    Відтворюваний архів має ETag; If-None-Match з тим самим значенням → 304
+    без генерації.
+    """
+    timings = _request_timings(request)
+    try:
+        options = _output_options(outputs, archive, reproducible)
+        media_type = _media_type(options)
+        with _executor.admit() as admission:
+            prepared = await _prepare(file, project_name, version, timings, options)
+            etag = None if incremental else _etag(prepared)
+            if etag is not None and _etag_matches(request, etag):
+                response = Response(status_code=304, headers={"ETag": etag})
+                return _finish("generate.zip", response, timings)
+            headers, body = await _run(timings, _zip_content, prepared, incremental)
+            if etag is not None:
+                headers["ETag"] = etag
+            if isinstance(body, bytes):
+                response = Response(content=body, media_type=media_type, headers=headers)
+                return _finish("generate.zip", response, timings)
+            # Слот звільняється лише після того, як архів повністю віддано;
+            # Server-Timing містить етапи до початку потоку, метрики — після
+            headers["Server-Timing"] = timings.server_timing()
+            stream = _stream_in_executor(body, admission.detach(), timings)
+    except QueueFullError:
+        return _finish("generate.zip", _busy_response(), timings, "busy")
+    except _RequestError as exc:
+        return _finish("generate.zip", exc.response(), timings, exc.kind)
+    return StreamingResponse(stream, media_type=media_type, headers=headers)
+
+
+@app.post("/generate/summary")
+async def generate_summary(
+    request: Request,
+    file: UploadFile,
+    project_name: str = Form(default=None),
+    version: str = Form(default="1.0.0"),
+) -> JSONResponse:
+    """Таблиця пристроїв, константи та попередження без рендерингу файлів."""
+    timings = _request_timings(request)
+    try:
+        with _executor.admit():
+            prepared = await _prepare(file, project_name, version, timings)
+            summary = await _run(timings, _build_summary, prepared)
+    except QueueFullError:
+        return _finish("summary", _busy_response(), timings, "busy")
+    except _RequestError as exc:
+        return _finish("summary", exc.response(), timings, exc.kind)
+    return _finish("summary", JSONResponse(status_code=200, content={"ok": True, **summary}), timings)
+
+
+@app.post("/diff")
+async def diff(
+    request: Request,
+    file: UploadFile,
+    previous: UploadFile,
+    project_name: str = Form(default=None),
+    version: str = Form(default="1.0.0"),
+    text: bool = Form(default=False),
 ) -> JSONResponse:
+    """Що зміниться відносно попередньої генерації, без рендерингу файлів.
+
+    previous — попередній graph.json або архів генерації (ZIP з
+    generation_report.txt). Відповідь — додані / видалені / переіндексовані
+    пристрої, змінені константи й файли; з text=true — ще й unified diff
+    змінених файлів.
+    """
+    timings = _request_timings(request)
+    try:
+        with _executor.admit():
+            prepared = await _prepare(file, project_name, version, timings)
+            with timings.span("read"):
+                previous_content = await _read_previous(previous)
+            content = await _run(timings, _diff_content, prepared, previous_content, text)
+    except QueueFullError:
+        return _finish("diff", _busy_response(), timings, "busy")
+    except _RequestError as exc:
+        return _finish("diff", exc.response(), timings, exc.kind)
+    return _finish("diff", JSONResponse(status_code=200, content=content), timings)
+
+
+@app.get("/results/{result_id}/devices")
+async def result_devices(
+    request: Request,
+    result_id: str,
+    offset: int = 0,
+    limit: int = 100,
+    status: Optional[str] = None,
+    type: Optional[str] = None,
+    q: Optional[str] = None,
+) -> JSONResponse:
+    """Сторінка рядків пристроїв збереженої генерації (result_id з /generate
+    або X-Result-Id з /generate.zip). status — ok / skip / warn, type — тип
+    пристрою (як у graph.json), q — пошук за підрядком; limit — не більше
+    _RESULT_PAGE_MAX. types — усі типи генерації (для фільтра)."""
+    timings = _request_timings(request)
+    try:
+        stored = _results.get(result_id)
+        if stored is None:
+            raise _RequestError(404, ["Результат не знайдено або термін зберігання минув."], kind="not_found")
+        if status is not None and status not in STATUSES:
+            raise _RequestError(400, [f"Невідомий статус: {status!r} (очікується {', '.join(STATUSES)})."],
+                                kind="invalid_params")
+        type_key = None
+        if type is not None:
+            info = TYPES.resolve(type)
+            if info is None:
+                raise _RequestError(400, [f"Невідомий тип пристрою: {type!r}."], kind="invalid_params")
+            type_key = info.key
+        offset, limit = max(offset, 0), min(max(limit, 1), _RESULT_PAGE_MAX)
+        # Перша сторінка результату з кешу виконує маппінг — теж поза event loop
+        with _executor.admit():
+            query = q.strip() if q else None
+            total, rows = await _run(timings, _page_content, stored, offset, limit, status, type_key, query, timings)
+    except QueueFullError:
+        return _finish("results", _busy_response(), timings, "busy")
+    except _RequestError as exc:
+        return _finish("results", exc.response(), timings, exc.kind)
+    content = {
+        "ok": True, "result_id": result_id, "total": total, "offset": offset, "limit": limit,
+        "types": stored.types, "devices": rows,
+    }
+    return _finish("results", JSONResponse(status_code=200, content=content), timings)
+
+
+@app.post("/validate")
+async def validate(
+    request: Request,
+    file: UploadFile,
+    max_errors: int = Form(default=0),
+    sample: int = Form(default=5),
+) -> JSONResponse:
+    """Лише перевірки parse_graph, без маппінгу й генерації.
+
+    Помилки згруповані за видом: кількість і до sample прикладів кожного
+    виду. max_errors > 0 — перевірка зупиняється на max_errors-й помилці.
+    Невалідний граф — теж HTTP 200 з "ok": false; 400 — лише для файлу,
+    що не є graph.json (JSON, обов'язкові поля, розмір).
+    """
+    timings = _request_timings(request)
+    summary = ErrorSummary(sample_size=min(max(sample, 0), _VALIDATE_MAX_SAMPLE), max_errors=max(max_errors, 0))
+    try:
+        with _executor.admit():
+            loader = await _graph_loader(file, timings, summary)
+            content = await _run(timings, _validate_content, loader, summary)
+    except QueueFullError:
+        return _finish("validate", _busy_response(), timings, "busy")
+    except _RequestError as exc:
+        return _finish("validate", exc.response(), timings, exc.kind)
+    return _finish("validate", JSONResponse(status_code=200, content=content), timings)
+
+
+@app.post("/graph")
+async def graph(request: Request, file: UploadFile) -> JSONResponse:
+    """Аналіз з'єднань graph.json: висячі з'єднання, невідомі пристрої,
+    цикли та маршрути матеріалу від завальних ям до силосів.
+
+    Пристрої тут не валідуються (це робить /generate) — потрібні лише
+    імена, типи, порти й з'єднання.
+    """
+    timings = _request_timings(request)
+    try:
+        with _executor.admit():
+            with timings.span("read"):
+                content = await _read_upload(file)
+            content = await _run(timings, _graph_content, content, timings)
+    except QueueFullError:
+        return _finish("graph", _busy_response(), timings, "busy")
+    except _RequestError as exc:
+        return _finish("graph", exc.response(), timings, exc.kind)
+    return _finish("graph", JSONResponse(status_code=200, content=content), timings)
+
+
+@app.post("/jobs")
+async def create_job(
+    request: Request,
+    file: UploadFile,
+    project_name: str = Form(default=None),
+    version: str = Form(default="1.0.0"),
+    outputs: str = Form(default=None),
+    archive: str = Form(default=None),
+    reproducible: bool = Form(default=None),
+) -> JSONResponse:
+    """Генерація у фоні: 202 з job_id одразу після збереження graph.json.
+
+    Розбір, маппінг, рендеринг і пакування виконуються в пулі генерації
+    (задача займає слот так само, як /generate.zip); прогрес — подіями
+    GET /jobs/{job_id}/events, результат — GET /jobs/{job_id}/artifact.
+    """
+    timings = _request_timings(request)
+    try:
+        options = _output_options(outputs, archive, reproducible)
+        if project_name is None or project_name.strip() == "":
+            project_name = os.environ.get("DEFAULT_PROJECT_NAME", "Elevator_System")
+        source = file.filename or "graph.json"
+        _check_size(file)
+        with _executor.admit() as admission:
+            job = await _run(timings, _save_job_input, file)
+            release = admission.detach()
+    except QueueFullError:
+        return _finish("jobs", _busy_response(), timings, "busy")
+    except _RequestError as exc:
+        return _finish("jobs", exc.response(), timings, exc.kind)
+
+    task = asyncio.create_task(_run_job(job, project_name, version, source, options, release))
+    _job_tasks.add(task)
+    task.add_done_callback(_job_tasks.discard)
+    content = {
+        "ok": True,
+        "job_id": job.id,
+        "status": f"/jobs/{job.id}",
+        "events": f"/jobs/{job.id}/events",
+        "artifact": f"/jobs/{job.id}/artifact",
+    }
+    return _finish("jobs", JSONResponse(status_code=202, content=content), timings)
+
+
+@app.get("/jobs/{job_id}")
+async def job_status(job_id: str) -> JSONResponse:
+    job = _jobs.get(job_id)
+    if job is None:
+        return _job_not_found()
+    return JSONResponse(status_code=200, content={"ok": True, **job.status()})
+
+
+@app.get("/jobs/{job_id}/events")
+async def job_events(request: Request, job_id: str) -> Response:
+    """Події задачі як Server-Sent Events; потік закривається після done / failed.
+
+    Last-Event-ID (заголовок, який EventSource надсилає при перепідключенні)
+    продовжує потік з наступної події.
+    """
+    job = _jobs.get(job_id)
+    if job is None:
+        return _job_not_found()
+    try:
+        cursor = max(0, int(request.headers.get("last-event-id", "0")))
+    except ValueError:
+        cursor = 0
+    headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    return StreamingResponse(_iter_job_events(job, cursor), media_type="text/event-stream", headers=headers)
+
+
+@app.get("/jobs/{job_id}/artifact")
+async def job_artifact(job_id: str) -> Response:
+    """Архів (або файл у режимі raw) завершеної задачі; 409 — ще не готовий."""
+    job = _jobs.get(job_id)
+    if job is None:
+        return _job_not_found()
+    if job.state == FAILED:
+        return JSONResponse(status_code=409, content={"ok": False, "state": job.state, "errors": job.errors})
+    if job.state != DONE:
+        return JSONResponse(
+            status_code=409,
+            content={"ok": False, "state": job.state, "errors": ["Задача ще виконується."]},
+            headers={"Retry-After": _RETRY_AFTER_SECONDS},
+        )
+    headers = {"Content-Disposition": f"attachment; filename*=UTF-8''{quote(job.filename)}"}
+    return FileResponse(job.artifact_path, media_type=job.media_type, headers=headers)
+
+
+@app.websocket("/session")
+async def session(websocket: WebSocket, project_name: Optional[str] = None, version: str = "1.0.0") -> None:
+    """Живе редагування: перше повідомлення — graph.json, далі — зміни пристроїв.
+
+    На кожне повідомлення — одна відповідь: snapshot (усі рядки), delta
+    (лише змінені рядки, константи й прогалини), rendered або error.
+    Повідомлення обробляються по черзі в пулі генерації; слот займається
+    лише на час обробки, а не на весь сеанс.
+    """
+    if not _sessions.acquire(blocking=False):
+        await websocket.close(code=1013, reason="Забагато активних сеансів.")
+        return
+    try:
+        await websocket.accept()
+        if project_name is None or project_name.strip() == "":
+            project_name = os.environ.get("DEFAULT_PROJECT_NAME", "Elevator_System")
+        state = MappingSession(build_ctx(project_name, version, "session"))
+        while True:
+            message = await websocket.receive()
+            if message["type"] == "websocket.disconnect":
+                break
+            await websocket.send_json(await _session_message(state, message.get("text")))
+    except WebSocketDisconnect:
+        pass
+    finally:
+        _sessions.release()
+
+
+@app.post("/generate/batch")
+async def generate_batch(
+    request: Request,
+    files: List[UploadFile],
+    version: str = Form(default="1.0.0"),
+) -> Response:
+    """Пакетна генерація: багато graph.json (або ZIP із ними) паралельно в пулі процесів.
+
+    Відповідь — ZIP з архівом кожного успішного проекту та batch_report.json
+    з результатом по кожному файлу. Помилка одного графа не зриває пакет.
+    """
+    timings = _request_timings(request)
+    try:
+        with _executor.admit():
+            response = await _generate_batch(files, version, timings)
+    except QueueFullError:
+        return _finish("batch", _busy_response(), timings, "busy")
+    return _finish("batch", response, timings, None if response.status_code == 200 else "no_files")
+
+
+async def _generate_batch(files: List[UploadFile], version: str, timings: Timings) -> Response:
+    max_bytes = int(os.environ.get("MAX_UPLOAD_SIZE_MB", "10")) * 1024 * 1024
+    inputs, rejected = await _run(timings, _read_batch_inputs, files, max_bytes, timings)
+
+    if not inputs and not rejected:
+        return JSONResponse(status_code=400, content={"ok": False, "errors": ["Не передано жодного файлу."]})
+
+    loop = asyncio.get_running_loop()
+    pool = _get_batch_pool()
+    names = _unique_project_names([source for _, source in inputs])
+    results = await asyncio.gather(
+        *(
+            loop.run_in_executor(pool, run_project, content, source, name, version)
+            for (content, source), name in zip(inputs, names)
+        ),
+        return_exceptions=True,
+    )
+    outputs: List[ProjectOutput] = []
+    for (_, source), name, res in zip(inputs, names, results):
+        if isinstance(res, BaseException):
+            res = ProjectOutput(source=source, project_name=name, ok=False,
+                                errors=[f"Внутрішня помилка: {type(res).__name__}"])
+        outputs.append(res)
+    outputs += rejected
+
+    def members() -> Iterator[Tuple[str, bytes]]:
+        for out in outputs:
+            if out.ok:
+                yield out.zip_filename, out.archive
+        report = {
+            "ok": all(out.ok for out in outputs),
+            "projects": [out.report() for out in outputs],
+        }
+        yield "batch_report.json", json.dumps(report, ensure_ascii=False, indent=2).encode("utf-8")
+
+    succeeded = sum(1 for out in outputs if out.ok)
+    return StreamingResponse(
+        # Вкладені архіви вже стиснуті — зовнішній ZIP без повторного deflate
+        iter_zip(members(), compression=zipfile.ZIP_STORED),
+        media_type="application/zip",
+        headers={
+            "Content-Disposition": 'attachment; filename="scl_batch.zip"',
+            "X-Batch-Succeeded": str(succeeded),
+            "X-Batch-Failed": str(len(outputs) - succeeded),
+        },
+    )
+
+
+# ---------------------------------------------------------------------------
+# Pipeline
+# ---------------------------------------------------------------------------
+
+class _RequestError(Exception):
+    """Помилка вхідних даних — перетворюється на JSON-відповідь {"ok": false}."""
+
+    def __init__(self, status_code: int, errors: list, warnings: Optional[list] = None, kind: str = "internal"):
+        super().__init__(errors)
+        self.status_code = status_code
+        self.errors = errors
+        self.warnings = warnings
+        self.kind = kind   # мітка для codegen_errors_total
+
+    def response(self) -> JSONResponse:
+        content = {"ok": False, "errors": self.errors}
+        if self.warnings is not None:
+            content["warnings"] = self.warnings
+        return JSONResponse(status_code=self.status_code, content=content)
+
+
+@dataclass
+class _Prepared:
+    parse_result: ParseResult
+    ctx: dict
+    cache_key: str
+    timings: Timings
+    options: OutputOptions = field(default_factory=default_options)
+
+    @property
+    def warnings(self) -> List[str]:
+        return self.parse_result.warnings
+
+    @cached_property
+    def map_result(self) -> MapResult:
+        # Маппінг ледачий: при влучанні в кеш він не потрібен
+        with self.timings.span("map"):
+            return map_devices(self.parse_result.devices)
+
+
+async def _prepare(
+    file: UploadFile,
+    project_name: Optional[str],
+    version: str,
+    timings: Timings,
+    options: Optional[OutputOptions] = None,
+) -> _Prepared:
+    """Читання, валідація та маппінг graph.json — спільна частина всіх /generate*."""
     if project_name is None or project_name.strip() == "":
         project_name = os.environ.get("DEFAULT_PROJECT_NAME", "Elevator_System")
 
-    # --- Розмір файлу ---
+    source = file.filename or "graph.json"
+    loader = await _graph_loader(file, timings)
+    options = options or default_options()
+    return await _run(timings, _prepare_content, loader, project_name, version, source, timings, options)
+
+
+async def _graph_loader(
+    file: UploadFile,
+    timings: Timings,
+    summary: Optional[ErrorSummary] = None,
+) -> Callable[[], ParseResult]:
+    """Перевірка розміру й вибір розбору graph.json (виконати — у пулі генерації)."""
+    size = _check_size(file)
+    if size > _STREAM_PARSE_THRESHOLD_BYTES:
+        # Великий файл: розбір потоком прямо з тимчасового файлу завантаження
+        return partial(load_graph_stream, file.file, timings=timings, summary=summary)
+    with timings.span("read"):
+        content = await file.read()
+    return partial(load_graph, content, timings=timings, summary=summary)
+
+
+def _check_size(file: UploadFile) -> int:
     max_mb = int(os.environ.get("MAX_UPLOAD_SIZE_MB", "10"))
-    content = await file.read()
-    if len(content) > max_mb * 1024 * 1024:
-        return JSONResponse(
-            status_code=400,
-            content={"ok": False, "errors": [f"Файл перевищує максимальний розмір {max_mb} MB."]},
-        )
+    size = _upload_size(file)
+    _upload_bytes.observe(size)
+    if size > max_mb * 1024 * 1024:
+        raise _RequestError(400, [f"Файл перевищує максимальний розмір {max_mb} MB."], kind="too_large")
+    return size
 
-    # --- Парсинг JSON ---
+
+def _upload_size(file: UploadFile) -> int:
+    if file.size is not None:
+        return file.size
+    file.file.seek(0, os.SEEK_END)
+    size = file.file.tell()
+    file.file.seek(0)
+    return size
+
+
+def _prepare_content(
+    loader: Callable[[], ParseResult],
+    project_name: str,
+    version: str,
+    source: str,
+    timings: Timings,
+    options: OutputOptions,
+) -> _Prepared:
+    # --- Парсинг і валідація ---
     try:
-        data = json.loads(content)
-    except (json.JSONDecodeError, UnicodeDecodeError):
-        return JSONResponse(
-            status_code=400,
-            content={"ok": False, "errors": ["Невалідний JSON у завантаженому файлі."]},
-        )
+        parse_result = loader()
+    except GraphValidationError as exc:
+        raise _RequestError(422, exc.errors, exc.warnings, kind="validation")
+    except GraphError as exc:
+        raise _RequestError(400, exc.errors, kind="invalid_graph")
+    _device_count.observe(len(parse_result.devices))
 
-    if not isinstance(data, dict):
-        return JSONResponse(
-            status_code=400,
-            content={"ok": False, "errors": ["JSON повинен бути об'єктом {}."]},
+    ctx = build_ctx(project_name, version, source, reproducible_time() if options.reproducible else None)
+    params = {k: ctx[k] for k in ("project_name", "version", "source")}
+    if options.reproducible:
+        # Час фіксований і входить у вміст — отже, і в ключ
+        params["timestamp"] = ctx["timestamp"]
+    with timings.span("hash"):
+        key = cache_key(parse_result.devices, parse_result.warnings, {**params, **options.cache_params()})
+    return _Prepared(parse_result=parse_result, ctx=ctx, cache_key=key, timings=timings, options=options)
+
+
+async def _read_previous(previous: UploadFile) -> bytes:
+    max_mb = int(os.environ.get("MAX_UPLOAD_SIZE_MB", "10"))
+    if _upload_size(previous) > max_mb * 1024 * 1024:
+        raise _RequestError(400, [f"Попередній файл перевищує максимальний розмір {max_mb} MB."], kind="too_large")
+    return await previous.read()
+
+
+async def _read_upload(file: UploadFile) -> bytes:
+    _check_size(file)
+    return await file.read()
+
+
+def _page_content(
+    stored: StoredResult,
+    offset: int,
+    limit: int,
+    status: Optional[str],
+    type_key: Optional[str],
+    query: Optional[str],
+    timings: Timings,
+) -> Tuple[int, list]:
+    with timings.span("page"):
+        return stored.page(offset, limit, status, type_key, query)
+
+
+def _validate_content(loader: Callable[[], ParseResult], summary: ErrorSummary) -> dict:
+    """Тіло відповіді /validate (виконується у пулі генерації)."""
+    try:
+        parse_result = loader()
+    except GraphError as exc:
+        raise _RequestError(400, exc.errors, kind="invalid_graph")
+    warnings = parse_result.warnings
+    return {
+        "ok": summary.total == 0,
+        "devices": len(parse_result.devices),
+        "checked": summary.checked,
+        "aborted": summary.aborted,
+        "error_count": summary.total,
+        "errors": summary.to_list(),
+        "warning_count": len(warnings),
+        "warnings": warnings[:summary.sample_size],
+    }
+
+
+def _graph_content(content: bytes, timings: Timings) -> dict:
+    """Тіло відповіді /graph (виконується у пулі генерації)."""
+    with timings.span("graph"):
+        try:
+            graph = load_connections(content)
+        except GraphError as exc:
+            raise _RequestError(400, exc.errors, kind="invalid_graph")
+    with timings.span("cycles"):
+        cycles = find_cycles(graph)
+    with timings.span("routes"):
+        routes = find_routes(graph)
+    return {"ok": True, **GraphAnalysis(graph, cycles, routes).to_dict()}
+
+
+def _diff_content(prepared: _Prepared, previous: bytes, text: bool) -> dict:
+    """Тіло відповіді /diff (виконується у пулі генерації)."""
+    timings = prepared.timings
+    with timings.span("previous"):
+        try:
+            if previous.startswith(b"PK"):
+                old = load_archive(previous)
+            else:
+                old = Snapshot(map_devices(load_graph(previous).devices))
+        except GraphValidationError as exc:
+            raise _RequestError(422, [f"Попередній граф: {e}" for e in exc.errors], kind="validation")
+        except GraphError as exc:
+            raise _RequestError(400, exc.errors, kind="invalid_previous")
+
+    new = prepared.map_result
+    with timings.span("diff"):
+        result = diff_maps(old.map_result, new)
+        files = changed_files(old.map_result, new, old_files=old.files, ctx=prepared.ctx)
+    content = {
+        "ok": True,
+        "changed": result.changed or any(files.values()),
+        **result.to_dict(),
+        "files": {name: "changed" if flag else "unchanged" for name, flag in files.items()},
+        "warnings": prepared.warnings,
+    }
+    if text:
+        names = [name for name, flag in files.items() if flag]
+        with timings.span("text_diff"):
+            new_files = {name: "".join(REGISTRY.get(name).render(new, prepared.ctx)) for name in names}
+            old_files = old.files or {
+                name: "".join(REGISTRY.get(name).render(old.map_result, prepared.ctx)) for name in names
+            }
+            content["text"] = text_diff(old_files, new_files, names)
+    return content
+
+
+def _generate_content(prepared: _Prepared, incremental: bool) -> dict:
+    """Тіло відповіді /generate (виконується у пулі генерації)."""
+    # Інкрементальний режим залежить від історії проекту — кеш не використовується
+    incremental_result: Optional[IncrementalResult] = None
+    cached = None if incremental else _cache.get(prepared.cache_key)
+    if cached is None:
+        # --- Генерація SCL + CSV прямо в ZIP (з UTF-8 BOM для TIA Portal) ---
+        try:
+            if incremental:
+                incremental_result = _incremental_generate(prepared)
+            files = incremental_result.files if incremental_result else None
+            archive = b"".join(_iter_output(prepared, files))
+        except Exception as exc:
+            raise _RequestError(500, [f"Внутрішня помилка: {type(exc).__name__}"])
+        _generated_bytes.observe(len(archive))
+        cached = CachedGeneration(
+            archive=archive,
+            summary=_build_counts(prepared),
+            zip_filename=output_filename(prepared.ctx, prepared.options),
         )
+        if not incremental:
+            _cache.put(prepared.cache_key, cached)
 
-    # --- Обов'язкові поля ---
-    missing = []
-    if "devices" not in data:
-        missing.append("Відсутнє поле 'devices'.")
-    if "deviceTypes" not in data:
-        missing.append("Відсутнє поле 'deviceTypes'.")
-    if missing:
-        return JSONResponse(status_code=400, content={"ok": False, "errors": missing})
-
-    # --- Валідація пристроїв ---
-    parse_result = parse_graph(data)
-    if parse_result.errors:
-        return JSONResponse(
-            status_code=422,
-            content={
-                "ok": False,
-                "errors": parse_result.errors,
-                "warnings": parse_result.warnings,
-            },
+    with prepared.timings.span("base64"):
+        encoded = base64.b64encode(cached.archive).decode("ascii")
+    # raw — один файл без ZIP: file_base64 / file_name замість zip_*
+    if prepared.options.raw:
+        download = {"file_base64": encoded, "file_name": cached.zip_filename}
+    else:
+        download = {"zip_base64": encoded, "zip_filename": cached.zip_filename}
+    content = {"ok": True, **download, "result_id": _remember(prepared), **cached.summary}
+    if incremental_result is not None:
+        content["files"] = {
+            name: "changed" if flag else "unchanged"
+            for name, flag in incremental_result.changed.items()
+            if name in prepared.options.names
+        }
+    return content
+
+
+def _zip_content(prepared: _Prepared, incremental: bool) -> Tuple[dict, "bytes | Iterator[bytes]"]:
+    """Заголовки й тіло /generate.zip: готові байти з кешу або лінивий потік ZIP."""
+    if incremental:
+        try:
+            incremental_result = _incremental_generate(prepared)
+        except Exception as exc:
+            raise _RequestError(500, [f"Внутрішня помилка: {type(exc).__name__}"])
+        headers = _zip_headers(prepared, _build_counts(prepared), output_filename(prepared.ctx, prepared.options))
+        headers["X-Changed-Files"] = ",".join(
+            name for name, flag in incremental_result.changed.items()
+            if flag and name in prepared.options.names
         )
+        return headers, _iter_output(prepared, incremental_result.files)
 
-    # --- Маппінг ---
-    map_result = map_devices(parse_result.devices)
+    cached = _cache.get(prepared.cache_key)
+    if cached is not None:
+        return _zip_headers(prepared, cached.summary, cached.zip_filename), cached.archive
 
-    timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
-    source_name = file.filename or "graph.json"
-    ctx = {
-        "project_name": project_name,
-        "version": version,
-        "timestamp": timestamp,
-        "source": source_name,
-    }
+    summary = _build_counts(prepared)
+    filename = output_filename(prepared.ctx, prepared.options)
+    return _zip_headers(prepared, summary, filename), _stream_and_cache(prepared, summary, filename)
 
-    # --- Генерація SCL + CSV ---
+
+async def _stream_in_executor(
+    chunks: Iterator[bytes],
+    release: Callable[[], None],
+    timings: Timings,
+) -> AsyncIterator[bytes]:
+    """Рендеринг і стиснення кожного шматка ZIP — у пулі генерації, не в event loop."""
+    size = 0
     try:
-        db_mechs = generate_db_mechs(map_result, ctx)
-        db_sim_config = generate_db_sim_config(map_result, ctx)
-        db_sim_mechs = generate_db_sim_mechs(map_result, ctx)
-        mechs_csv = generate_mechs_csv(map_result, ctx)
-    except Exception as exc:
-        return JSONResponse(
-            status_code=500,
-            content={"ok": False, "errors": [f"Внутрішня помилка: {type(exc).__name__}"]},
-        )
+        while True:
+            chunk = await _run(timings, next, chunks, None)
+            if chunk is None:
+                break
+            size += len(chunk)
+            yield chunk
+    finally:
+        release()
+        _generated_bytes.observe(size)
+        _observe("generate.zip", timings, 200)
+
 
-    report_text = _build_report_text(ctx, map_result, parse_result.warnings)
+async def _run(timings: Timings, fn: Callable, *args):
+    """_executor.run з етапом "queue" — скільки задача чекала на вільний потік."""
+    submitted = time.perf_counter()
 
-    # --- ZIP в пам'яті (SCL-файли з UTF-8 BOM для TIA Portal) ---
-    zip_buf = io.BytesIO()
-    with zipfile.ZipFile(zip_buf, "w", zipfile.ZIP_DEFLATED) as zf:
-        zf.writestr("DB_Mechs.scl",        _BOM + db_mechs.encode("utf-8"))
-        zf.writestr("DB_SimConfig.scl",    _BOM + db_sim_config.encode("utf-8"))
-        zf.writestr("DB_SimMechs.scl",     _BOM + db_sim_mechs.encode("utf-8"))
-        zf.writestr("Mechs.csv",           _BOM + mechs_csv.encode("utf-8"))
-        zf.writestr("generation_report.txt", report_text.encode("utf-8"))
-    zip_buf.seek(0)
-    zip_b64 = base64.b64encode(zip_buf.read()).decode("ascii")
+    def call():
+        timings.add("queue", time.perf_counter() - submitted)
+        return fn(*args)
 
-    ts_file = datetime.now().strftime("%Y%m%d_%H%M%S")
-    zip_filename = f"scl_{project_name}_{ts_file}.zip"
+    return await _executor.run(call)
 
+
+def _request_timings(request: Request) -> Timings:
+    """Таймінги запиту; "upload" — прийом і розбір multipart до виклику обробника."""
+    timings = Timings(started=request.scope.get("codegen.started"))
+    timings.add("upload", time.perf_counter() - timings.started)
+    return timings
+
+
+def _finish(endpoint: str, response: Response, timings: Timings, error: Optional[str] = None) -> Response:
+    response.headers["Server-Timing"] = timings.server_timing()
+    _observe(endpoint, timings, response.status_code, error)
+    return response
+
+
+def _observe(endpoint: str, timings: Timings, status: int, error: Optional[str] = None) -> None:
+    for stage, seconds in timings.items():
+        _stage_seconds.observe(seconds, stage)
+    _request_seconds.observe(timings.elapsed(), endpoint)
+    _requests_total.inc(endpoint, str(status))
+    if error is not None:
+        _errors_total.inc(endpoint, error)
+
+
+_BUSY_MESSAGE = "Сервіс перевантажений, повторіть запит пізніше."
+
+
+def _busy_response() -> JSONResponse:
     return JSONResponse(
-        status_code=200,
-        content={
-            "ok": True,
-            "zip_base64": zip_b64,
-            "zip_filename": zip_filename,
-            "devices": _build_device_rows(map_result, parse_result.warnings),
-            "constants": {k: map_result.counts.get(k, -1) for k in _CONST_ORDER},
-            "warnings": parse_result.warnings,
-            "gap_slots": map_result.gap_slots,
-        },
+        status_code=503,
+        content={"ok": False, "errors": [_BUSY_MESSAGE]},
+        headers={"Retry-After": _RETRY_AFTER_SECONDS},
+    )
+
+
+def _incremental_generate(prepared: _Prepared) -> IncrementalResult:
+    """Генерація відносно попереднього стану того ж проекту (project_name + файл)."""
+    key = (prepared.ctx["project_name"], prepared.ctx["source"])
+    with _incremental_lock:
+        generator = _incremental.pop(key, None) or IncrementalGenerator()
+        _incremental[key] = generator
+        while len(_incremental) > _INCREMENTAL_MAX_PROJECTS:
+            _incremental.popitem(last=False)
+    return generator.generate(prepared.map_result, prepared.ctx)
+
+
+def _iter_output(
+    prepared: _Prepared,
+    files: Optional[Dict[str, str]] = None,
+    job: Optional[Job] = None,
+) -> Iterator[bytes]:
+    """Архів (або файл у режимі raw) шматками; рендеряться лише вибрані файли —
+    у пулі або прямо в потоки членів архіву. З job кожен записаний файл
+    публікується як подія задачі."""
+    options = prepared.options
+    if files is not None:
+        files = {name: text for name, text in files.items() if name in options.names}
+    members = emit_members(
+        prepared.map_result, prepared.ctx, prepared.warnings, files, prepared.timings, _render_pool,
+        options.registry, options.report,
     )
+    if job is not None:
+        members = track_members(members, job)
+    return iter_archive(members, options, prepared.timings, prepared.ctx["generated"])
+
+
+def _output_options(
+    outputs: Optional[str],
+    archive: Optional[str],
+    reproducible: Optional[bool] = None,
+) -> OutputOptions:
+    if reproducible is None:
+        reproducible = _REPRODUCIBLE_DEFAULT
+    try:
+        return output_options(outputs, archive, reproducible)
+    except OptionsError as exc:
+        raise _RequestError(400, [str(exc)], kind="invalid_options")
+
+
+def _etag(prepared: _Prepared) -> Optional[str]:
+    """Відтворюваний вміст визначається ключем кешу (граф + параметри + час)."""
+    return f'"{prepared.cache_key}"' if prepared.options.reproducible else None
+
+
+def _etag_matches(request: Request, etag: str) -> bool:
+    header = request.headers.get("if-none-match")
+    if not header:
+        return False
+    tags = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    return etag in tags or "*" in tags
+
+
+def _media_type(options: OutputOptions) -> str:
+    if not options.raw:
+        return "application/zip"
+    if options.names[0].endswith(".csv"):
+        return "text/csv; charset=utf-8"
+    return "text/plain; charset=utf-8"
+
+
+def _stream_and_cache(prepared: _Prepared, summary: dict, filename: str) -> Iterator[bytes]:
+    """Віддає ZIP потоком і паралельно збирає його для кешу (поки вкладається в бюджет)."""
+    chunks: List[bytes] = []
+    size = 0
+    keep = _cache.enabled
+    for chunk in _iter_output(prepared):
+        if keep:
+            chunks.append(chunk)
+            size += len(chunk)
+            if size > _cache.max_bytes:
+                keep = False
+                chunks = []
+        yield chunk
+    if keep:
+        _cache.put(prepared.cache_key, CachedGeneration(b"".join(chunks), summary, filename))
+
+
+def _zip_headers(prepared: _Prepared, summary: dict, filename: str) -> dict:
+    counts = summary["counts"]
+    headers = {
+        "Content-Disposition": f"attachment; filename*=UTF-8''{quote(filename)}",
+        "X-Constants": json.dumps(summary["constants"]),
+        "X-Devices-Count": str(counts["ok"] + counts["skip"]),
+        "X-Warnings-Count": str(counts["warn"]),
+        "X-Gap-Slots-Count": str(summary["gap_count"]),
+    }
+    result_id = _remember(prepared)
+    if result_id is not None:
+        headers["X-Result-Id"] = result_id
+    return headers
+
+
+def _get_batch_pool() -> ProcessPoolExecutor:
+    global _batch_pool
+    if _batch_pool is None:
+        _batch_pool = ProcessPoolExecutor(max_workers=_BATCH_WORKERS)
+    return _batch_pool
+
+
+def _rejected(source: str, error: str) -> ProjectOutput:
+    return ProjectOutput(source=source, project_name=PurePosixPath(source).stem, ok=False, errors=[error])
+
+
+def _read_batch_inputs(
+    files: List[UploadFile],
+    max_bytes: int,
+    timings: Timings,
+) -> Tuple[List[Tuple[bytes, str]], List[ProjectOutput]]:
+    """Читання частин запиту й розпакування ZIP — у пулі генерації, не в event loop."""
+    inputs: List[Tuple[bytes, str]] = []
+    rejected: List[ProjectOutput] = []
+    with timings.span("read"):
+        for upload in files:
+            source = upload.filename or "graph.json"
+            upload.file.seek(0)
+            content = upload.file.read()
+            if source.lower().endswith(".zip"):
+                inputs += _expand_batch_zip(content, source, max_bytes, rejected)
+            elif len(content) > max_bytes:
+                rejected.append(_rejected(source, f"Файл перевищує максимальний розмір {max_bytes // (1024 * 1024)} MB."))
+            else:
+                inputs.append((content, source))
+    return inputs, rejected
+
+
+def _expand_batch_zip(
+    content: bytes,
+    source: str,
+    max_bytes: int,
+    rejected: List[ProjectOutput],
+) -> List[Tuple[bytes, str]]:
+    """Розпаковує *.json з ZIP-архіву графів; проблемні записи — у rejected."""
+    try:
+        zf = zipfile.ZipFile(io.BytesIO(content))
+    except zipfile.BadZipFile:
+        rejected.append(_rejected(source, "Невалідний ZIP-архів."))
+        return []
+    inputs = []
+    with zf:
+        for info in zf.infolist():
+            if info.is_dir() or not info.filename.lower().endswith(".json"):
+                continue
+            if info.file_size > max_bytes:
+                rejected.append(_rejected(
+                    info.filename,
+                    f"Файл перевищує максимальний розмір {max_bytes // (1024 * 1024)} MB.",
+                ))
+                continue
+            inputs.append((zf.read(info), info.filename))
+    return inputs
+
+
+def _unique_project_names(sources: List[str]) -> List[str]:
+    """Назва проекту = ім'я файлу без розширення; повтори отримують суфікс _2, _3, …"""
+    seen: Dict[str, int] = {}
+    names = []
+    for source in sources:
+        stem = PurePosixPath(source).stem or "graph"
+        seen[stem] = seen.get(stem, 0) + 1
+        names.append(stem if seen[stem] == 1 else f"{stem}_{seen[stem]}")
+    return names
+
+
+def _build_counts(prepared: _Prepared) -> dict:
+    """Компактна частина відповіді /generate і заголовків /generate.zip —
+    лічильники без рядків пристроїв (ті — в GET /results/{id}/devices)."""
+    map_result = prepared.map_result
+    with prepared.timings.span("summary"):
+        simulated = sum(len(devs) for devs in map_result.by_type.values() if devs and devs[0].has_simulator)
+        return {
+            "counts": {
+                "ok": simulated,
+                "skip": len(map_result.devices) - simulated,
+                "warn": len(prepared.warnings),
+            },
+            "constants": {k: map_result.counts.get(k, -1) for k in CONST_ORDER},
+            "gap_ranges": [list(r) for r in map_result.gap_ranges],
+            "gap_count": map_result.gap_count,
+        }
+
+
+def _remember(prepared: _Prepared) -> Optional[str]:
+    """Зберігає пристрої генерації для GET /results/{id}/devices; повертає
+    result_id (None — сховище вимкнене). Якщо маппінг ще не виконано
+    (влучання в кеш), він відкладається до першого запиту сторінки."""
+    mapped = prepared.__dict__.get("map_result")
+    stored = _results.put(
+        prepared.cache_key,
+        lambda: StoredResult(prepared.parse_result.devices, prepared.warnings, mapped),
+    )
+    return prepared.cache_key if stored else None
+
+
+def _build_summary(prepared: _Prepared) -> dict:
+    map_result = prepared.map_result
+    with prepared.timings.span("summary"):
+        return {
+            "devices": _build_device_rows(map_result, prepared.warnings),
+            "constants": {k: map_result.counts.get(k, -1) for k in CONST_ORDER},
+            "warnings": prepared.warnings,
+            "gap_ranges": [list(r) for r in map_result.gap_ranges],
+            "gap_count": map_result.gap_count,
+        }
 
 
 # ---------------------------------------------------------------------------
@@ -155,57 +1150,130 @@ async def generate(
 # ---------------------------------------------------------------------------
 
 def _build_device_rows(map_result, non_mech_warnings: list) -> list:
-    rows = []
-    for dev in sorted(map_result.devices, key=lambda d: d.id):
-        status = "skip" if not dev.has_simulator else "ok"
-        rows.append({
-            "status":       status,
-            "id":           dev.id,
-            "display_name": dev.name,
-            "type_name":    dev.raw_type,
-            "tia_type":     dev.tia_type,
-            "slot_id":      dev.id,
-            "typed_index":  dev.typed_index,
-            "has_simulator": dev.has_simulator,
-        })
-    for w in non_mech_warnings:
-        rows.append({"status": "warn", "message": w})
+    rows = [device_row(dev) for dev in map_result.devices]
+    rows.extend(warning_row(w) for w in non_mech_warnings)
     return rows
 
 
-def _build_report_text(ctx: dict, map_result, warnings: list) -> str:
-    lines = [
-        f"Generated: {ctx['timestamp']}",
-        f"Source: {ctx['source']}",
-        f"Project: {ctx['project_name']} v{ctx['version']}",
-        "",
-        "Devices:",
-    ]
+# ---------------------------------------------------------------------------
+# Jobs
+# ---------------------------------------------------------------------------
 
-    for dev in sorted(map_result.devices, key=lambda d: d.id):
-        if dev.has_simulator:
-            status = "[OK]  "
-            suffix = ""
+def _save_job_input(file: UploadFile) -> Job:
+    """Нова задача з копією graph.json: файл завантаження живе лише до кінця запиту."""
+    try:
+        job = _jobs.create()
+    except JobLimitError as exc:
+        raise _RequestError(503, [str(exc)], kind="jobs_full")
+    try:
+        _jobs.save(job, job.input_path, read_chunks(file.file))
+    except JobLimitError as exc:
+        _jobs.discard(job)
+        raise _RequestError(503, [str(exc)], kind="jobs_full")
+    return job
+
+
+async def _run_job(
+    job: Job,
+    project_name: str,
+    version: str,
+    source: str,
+    options: OutputOptions,
+    release: Callable[[], None],
+) -> None:
+    timings = Timings()
+    try:
+        run = _run(timings, _job_content, job, project_name, version, source, options, timings)
+        status, error = await supervise(job, run)
+    except Exception:
+        status, error = 500, "internal"
+    finally:
+        release()
+    _observe("job", timings, status, error)
+
+
+def _job_content(
+    job: Job,
+    project_name: str,
+    version: str,
+    source: str,
+    options: OutputOptions,
+    timings: Timings,
+) -> Tuple[int, Optional[str]]:
+    """Задача від розбору до артефакту на диску; повертає (код, вид помилки) для метрик."""
+    job.start()
+    try:
+        size = job.input_path.stat().st_size
+        with open(job.input_path, "rb") as f:
+            if size > _STREAM_PARSE_THRESHOLD_BYTES:
+                loader = partial(load_graph_stream, ProgressReader(f, job, "read", size), timings=timings)
+            else:
+                loader = partial(load_graph, f.read(), timings=timings)
+            prepared = _prepare_content(loader, project_name, version, source, timings, options)
+        _jobs.remove_file(job, job.input_path)
+        job.publish("parsed", devices=len(prepared.parse_result.devices), warnings=len(prepared.warnings))
+
+        cached = _cache.get(prepared.cache_key)
+        if cached is not None:
+            summary, filename, chunks = cached.summary, cached.zip_filename, [cached.archive]
         else:
-            status = "[SKIP]"
-            suffix = " (no simulator)"
-        lines.append(
-            f"  {status} id={dev.id:<3} {dev.raw_type:<6} \"{dev.name}\""
-            f"  -> {dev.tia_type}, SlotId={dev.id}, TypedIndex={dev.typed_index}{suffix}"
-        )
+            summary = _build_counts(prepared)
+            filename = output_filename(prepared.ctx, prepared.options)
+            chunks = _iter_output(prepared, job=job)
+        job.publish("mapped", cached=cached is not None, constants=summary["constants"])
+        size = _jobs.save(job, job.artifact_path, chunks, progress="written")
+    except _RequestError as exc:
+        job.fail(exc.errors, exc.warnings)
+        return exc.status_code, exc.kind
+    except JobLimitError as exc:
+        job.fail([str(exc)])
+        return 507, "jobs_full"
+    except Exception as exc:
+        job.fail([f"Внутрішня помилка: {type(exc).__name__}"])
+        return 500, "internal"
+    _generated_bytes.observe(size)
+    job.complete(filename, _media_type(options), size, result_id=_remember(prepared), **summary)
+    return 200, None
+
 
-    for w in warnings:
-        lines.append(f"  [WARN] {w}")
+async def _iter_job_events(job: Job, cursor: int) -> AsyncIterator[bytes]:
+    while True:
+        for event in job.events_after(cursor):
+            cursor = event.id
+            yield event.sse()
+        if job.finished and not job.events_after(cursor):
+            return
+        if not await job.wait(cursor, _SSE_KEEPALIVE_SECONDS):
+            yield b": keepalive\n\n"
 
-    lines += ["", "Constants:"]
-    for key in _CONST_ORDER:
-        val = map_result.counts.get(key, -1)
-        lines.append(f"  {key:<18} = {val}")
 
-    if map_result.gap_slots:
-        lines += ["", "Warnings:"]
-        slots_str = ", ".join(str(s) for s in map_result.gap_slots)
-        lines.append(f"  [WARN] Порожні слоти у Mechs[]: {slots_str}")
+def _job_not_found() -> JSONResponse:
+    return JSONResponse(status_code=404, content={"ok": False, "errors": ["Задачу не знайдено або її термін минув."]})
 
-    lines += ["", "Files:", "  DB_Mechs.scl     OK", "  DB_SimConfig.scl OK", "  DB_SimMechs.scl  OK", "  Mechs.csv        OK", ""]
-    return "\n".join(lines)
+
+# ---------------------------------------------------------------------------
+# Session
+# ---------------------------------------------------------------------------
+
+async def _session_message(state: MappingSession, text: Optional[str]) -> dict:
+    """Відповідь на одне повідомлення сеансу; text None — двійковий кадр."""
+    timings = Timings()
+    if text is None:
+        _observe("session", timings, 400, "not_text")
+        return {"op": "error", "errors": ["Повідомлення мають бути текстовими кадрами (JSON), не двійковими."]}
+    max_mb = int(os.environ.get("MAX_UPLOAD_SIZE_MB", "10"))
+    if len(text) > max_mb * 1024 * 1024:
+        reply = {"op": "error", "errors": [f"Повідомлення перевищує максимальний розмір {max_mb} MB."]}
+        _observe("session", timings, 400, "too_large")
+        return reply
+    try:
+        with _executor.admit():
+            reply = await _run(timings, state.handle, text, timings)
+    except QueueFullError:
+        _observe("session", timings, 503, "busy")
+        return {"op": "error", "errors": [_BUSY_MESSAGE]}
+    if reply["op"] == "error":
+        _observe("session", timings, 400, "invalid_message")
+    else:
+        _observe("session", timings, 200)
+    return reply
@@ -0,0 +1,74 @@
+"""Unit-тести для generator/archive.py."""
+import io
+import zipfile
+
+from generator.archive import iter_zip
+
+
+def _unzip(chunks) -> zipfile.ZipFile:
+    return zipfile.ZipFile(io.BytesIO(b"".join(chunks)))
+
+
+# ── Архів збирається з потоку шматків ────────────────────────────────────────
+def test_iter_zip_roundtrip():
+    members = [("a.scl", b"\xef\xbb\xbfDATA_BLOCK"), ("b.txt", "Звіт".encode("utf-8"))]
+    zf = _unzip(iter_zip(members))
+    assert zf.namelist() == ["a.scl", "b.txt"]
+    assert zf.read("b.txt").decode("utf-8") == "Звіт"
+    assert zf.testzip() is None
+
+
+# ── Ледачий генератор: файл рендериться лише коли до нього дійшла черга ─────
+def test_iter_zip_lazy_members():
+    rendered = []
+
+    def members():
+        for name in ("x.scl", "y.scl"):
+            rendered.append(name)
+            yield name, name.encode("ascii") * 1000
+
+    chunks = iter_zip(members())
+    first = next(chunks)
+    assert first
+    assert rendered == ["x.scl"]
+    rest = list(chunks)
+    assert rendered == ["x.scl", "y.scl"]
+    assert _unzip([first, *rest]).read("y.scl") == b"y.scl" * 1000
+
+
+# ── Порожній архів — валідний ZIP ────────────────────────────────────────────
+def test_iter_zip_empty():
+    assert _unzip(iter_zip([])).namelist() == []
+
+
+# ── Фіксована дата членів — архів залежить лише від вмісту ──────────────────
+def test_iter_zip_fixed_date_time():
+    def members():
+        yield "a.scl", b"DATA_BLOCK" * 100
+        yield "b.txt", lambda sink: sink.write(b"report" * 100)
+
+    date_time = (2024, 5, 1, 12, 0, 0)
+    first = b"".join(iter_zip(members(), compresslevel=9, date_time=date_time))
+    assert b"".join(iter_zip(members(), compresslevel=9, date_time=date_time)) == first
+    zf = _unzip([first])
+    assert [info.date_time for info in zf.infolist()] == [date_time, date_time]
+    assert all(info.compress_type == zipfile.ZIP_DEFLATED for info in zf.infolist())
+    assert zf.testzip() is None
+
+
+# ── Рівень стиснення діє і на члени з фіксованою датою ──────────────────────
+def test_iter_zip_fixed_date_time_keeps_level():
+    text = b"".join(b"%d;Noria %d;TYPE_NORIA\n" % (i, i * 7919 % 1000) for i in range(3000))
+
+    def members():
+        yield "a.csv", text
+        yield "b.scl", lambda sink: sink.write(text)
+
+    def sizes(level, date_time):
+        zf = _unzip(iter_zip(members(), compresslevel=level, date_time=date_time))
+        return [info.compress_size for info in zf.infolist()]
+
+    fast, best = sizes(1, None), sizes(9, None)
+    assert fast[0] > best[0]
+    assert sizes(1, (2024, 5, 1, 12, 0, 0)) == fast
+    assert sizes(9, (2024, 5, 1, 12, 0, 0)) == best
@@ -0,0 +1,30 @@
+"""Smoke-тести для bench/ (синтетичні графи та прогін бенчмарку)."""
+import json
+
+from bench.run import bench_size
+from bench.synth import make_graph, make_graph_bytes
+from generator.pipeline import load_graph
+
+
+def test_make_graph_deterministic():
+    assert make_graph(50, seed=1) == make_graph(50, seed=1)
+    assert make_graph(50, seed=1) != make_graph(50, seed=2)
+
+
+def test_make_graph_valid_with_gaps():
+    graph = make_graph(500)
+    ids = sorted(int(d["id"]) for d in graph["devices"])
+    assert len(ids) == len(set(ids)) == 500
+    assert ids[-1] > 500                       # є прогалини в id
+    result = load_graph(make_graph_bytes(500))
+    assert result.warnings                     # є не-механізми (Silo)
+    assert len({d.type_key for d in result.devices}) > 5
+
+
+def test_bench_size_stages():
+    run = bench_size(20, repeat=1, client=None)
+    assert run["devices"] == 20
+    assert {"parse_graph", "map_devices", "generate_db_mechs", "zip_base64"} <= set(run["stages"])
+    for stage in run["stages"].values():
+        assert stage["median_ms"] >= 0 and stage["peak_kb"] >= 0
+    json.dumps(run)
@@ -0,0 +1,65 @@
+"""Unit-тести для generator/cache.py."""
+from generator.cache import CachedGeneration, GenerationCache, cache_key
+from generator.parser import RawDevice
+
+
+def _dev(id_: int, name: str, type_key: str) -> RawDevice:
+    return RawDevice(id=id_, name=name, type_key=type_key, raw_type=type_key.capitalize())
+
+
+def _entry(size: int) -> CachedGeneration:
+    return CachedGeneration(archive=b"x" * size, summary={}, zip_filename="a.zip")
+
+
+# ── Ключ не залежить від порядку пристроїв ───────────────────────────────────
+def test_key_order_independent():
+    a = [_dev(1, "N", "noria"), _dev(2, "R", "redler")]
+    params = {"project_name": "P", "version": "1.0.0"}
+    assert cache_key(a, [], params) == cache_key(list(reversed(a)), [], params)
+
+
+# ── Ключ залежить від параметрів і вмісту ────────────────────────────────────
+def test_key_changes():
+    devs = [_dev(1, "N", "noria")]
+    base = cache_key(devs, [], {"project_name": "P", "version": "1.0.0"})
+    assert base != cache_key(devs, [], {"project_name": "P", "version": "1.0.1"})
+    assert base != cache_key([_dev(1, "N2", "noria")], [], {"project_name": "P", "version": "1.0.0"})
+    assert base != cache_key(devs, ["warn"], {"project_name": "P", "version": "1.0.0"})
+
+
+# ── Лічильники влучань / промахів ────────────────────────────────────────────
+def test_hits_misses():
+    cache = GenerationCache(max_entries=4, max_bytes=1000)
+    assert cache.get("k") is None
+    cache.put("k", _entry(10))
+    assert cache.get("k") is not None
+    stats = cache.stats()
+    assert (stats["hits"], stats["misses"], stats["entries"], stats["bytes"]) == (1, 1, 1, 10)
+
+
+# ── Витіснення LRU за кількістю ──────────────────────────────────────────────
+def test_lru_eviction_by_entries():
+    cache = GenerationCache(max_entries=2, max_bytes=1000)
+    cache.put("a", _entry(1))
+    cache.put("b", _entry(1))
+    cache.get("a")              # a — найсвіжіший
+    cache.put("c", _entry(1))
+    assert cache.get("b") is None
+    assert cache.get("a") is not None
+
+
+# ── Витіснення за бюджетом байтів; завеликий запис не кешується ──────────────
+def test_eviction_by_bytes():
+    cache = GenerationCache(max_entries=10, max_bytes=100)
+    cache.put("a", _entry(60))
+    cache.put("b", _entry(60))
+    assert cache.get("a") is None
+    assert cache.stats()["bytes"] == 60
+    assert cache.put("huge", _entry(101)) is False
+
+
+# ── Нульовий розмір вимикає кеш ──────────────────────────────────────────────
+def test_disabled():
+    cache = GenerationCache(max_entries=0)
+    assert cache.put("a", _entry(1)) is False
+    assert cache.get("a") is None
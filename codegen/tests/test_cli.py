@@ -0,0 +1,143 @@
+"""Unit-тести для generator/cli.py."""
+import json
+import pathlib
+import shutil
+
+from generator import cli
+from generator.cli import EXIT_INPUT, EXIT_OK, EXIT_VALIDATION, EXIT_WRITE, generate_file, main
+from generator.incremental import IncrementalGenerator
+
+FIXTURES = pathlib.Path(__file__).parent / "fixtures"
+
+ALL_FILES = ["DB_Mechs.scl", "DB_SimConfig.scl", "DB_SimMechs.scl", "Mechs.csv", "generation_report.txt"]
+
+
+def _copy(tmp_path, name="graph_full.json", dest="graph.json"):
+    path = tmp_path / dest
+    shutil.copy(FIXTURES / name, path)
+    return path
+
+
+# ── generate_file ────────────────────────────────────────────────────────────
+def test_generate_file_writes_all(tmp_path):
+    out = generate_file(_copy(tmp_path), tmp_path / "out", "P", "1.0.0")
+    assert out.code == EXIT_OK
+    assert out.written == ALL_FILES
+    assert (tmp_path / "out" / "DB_Mechs.scl").read_bytes().startswith(b"\xef\xbb\xbf")
+    assert not list((tmp_path / "out").glob("*.tmp"))
+
+
+def test_generate_file_invalid_json(tmp_path):
+    out = generate_file(_copy(tmp_path, "graph_invalid.json"), tmp_path / "out", "P", "1.0.0")
+    assert out.code == EXIT_INPUT
+    assert not (tmp_path / "out").exists()
+
+
+def test_generate_file_missing(tmp_path):
+    out = generate_file(tmp_path / "nope.json", tmp_path / "out", "P", "1.0.0")
+    assert out.code == EXIT_INPUT
+
+
+def test_generate_file_validation_error(tmp_path):
+    src = tmp_path / "graph.json"
+    src.write_text(json.dumps({"deviceTypes": [], "devices": [
+        {"name": "A", "id": "1", "type": "noria"},
+        {"name": "B", "id": "1", "type": "noria"},
+    ]}))
+    out = generate_file(src, tmp_path / "out", "P", "1.0.0")
+    assert out.code == EXIT_VALIDATION
+    assert out.errors
+
+
+# ── Інкрементальний режим (--watch) ──────────────────────────────────────────
+def test_generate_file_incremental_writes_changed_only(tmp_path):
+    src = _copy(tmp_path)
+    gen = IncrementalGenerator()
+    first = generate_file(src, tmp_path / "out", "P", "1.0.0", incremental=gen)
+    assert first.written == ALL_FILES
+
+    data = json.loads(src.read_text(encoding="utf-8"))
+    data["devices"].append({"name": "Засувка 9", "id": "99", "type": "gate2P"})
+    src.write_text(json.dumps(data), encoding="utf-8")
+
+    second = generate_file(src, tmp_path / "out", "P", "1.0.0", incremental=gen, skip_key=first.key)
+    assert "DB_SimMechs.scl" not in second.written
+    assert "DB_Mechs.scl" in second.written and "generation_report.txt" in second.written
+
+
+def test_generate_file_write_error_resets_incremental(tmp_path, monkeypatch):
+    src = _copy(tmp_path)
+    gen = IncrementalGenerator()
+    real_write = cli._write_atomic
+
+    def failing(path, write):
+        if path.name == "DB_SimConfig.scl":
+            raise OSError(28, "No space left on device")
+        real_write(path, write)
+
+    monkeypatch.setattr(cli, "_write_atomic", failing)
+    first = generate_file(src, tmp_path / "out", "P", "1.0.0", incremental=gen)
+    assert first.code == EXIT_WRITE and "DB_SimConfig.scl" not in first.written
+
+    # Наступний цикл дописує все, що не потрапило на диск
+    monkeypatch.setattr(cli, "_write_atomic", real_write)
+    second = generate_file(src, tmp_path / "out", "P", "1.0.0", incremental=gen)
+    assert second.code == EXIT_OK and second.written == ALL_FILES
+
+
+def test_generate_file_skip_key(tmp_path):
+    src = _copy(tmp_path)
+    first = generate_file(src, tmp_path / "out", "P", "1.0.0")
+    second = generate_file(src, tmp_path / "out", "P", "1.0.0", skip_key=first.key)
+    assert second.code == EXIT_OK
+    assert second.written == []
+
+
+# ── Відтворюваний режим: однакові файли й MANIFEST.sha256 ───────────────────
+def test_generate_file_reproducible(tmp_path, monkeypatch):
+    monkeypatch.setenv("SOURCE_DATE_EPOCH", "1700000000")
+    src = _copy(tmp_path)
+    gen = IncrementalGenerator()
+    first = generate_file(src, tmp_path / "a", "P", "1.0.0", incremental=gen, reproducible=True)
+    assert first.written == [*ALL_FILES, "MANIFEST.sha256"]
+    generate_file(src, tmp_path / "b", "P", "1.0.0", reproducible=True)
+    for name in first.written:
+        assert (tmp_path / "a" / name).read_bytes() == (tmp_path / "b" / name).read_bytes()
+    assert "Generated: 2023-11-14 22:13:20" in (tmp_path / "a" / "generation_report.txt").read_text("utf-8")
+
+    # Незмінені файли не перезаписуються, але маніфест їх і далі містить
+    third = generate_file(src, tmp_path / "a", "P", "1.0.0", incremental=gen, reproducible=True)
+    assert "DB_Mechs.scl" not in third.written
+    assert (tmp_path / "a" / "MANIFEST.sha256").read_bytes() == (tmp_path / "b" / "MANIFEST.sha256").read_bytes()
+
+
+def test_main_invalid_source_date_epoch(tmp_path, monkeypatch):
+    monkeypatch.setenv("SOURCE_DATE_EPOCH", "soon")
+    assert main([str(_copy(tmp_path)), "--no-color"]) == EXIT_INPUT
+
+
+# ── main ─────────────────────────────────────────────────────────────────────
+def test_main_single_file_next_to_input(tmp_path):
+    src = _copy(tmp_path)
+    assert main([str(src), "--no-color"]) == EXIT_OK
+    assert (tmp_path / "DB_Mechs.scl").exists()
+
+
+def test_main_glob_per_file_subdirs(tmp_path):
+    _copy(tmp_path, dest="a.json")
+    _copy(tmp_path, dest="b.json")
+    code = main([str(tmp_path / "*.json"), "--output-dir", str(tmp_path / "out"), "-j", "1", "--no-color"])
+    assert code == EXIT_OK
+    assert (tmp_path / "out" / "a" / "DB_Mechs.scl").exists()
+    assert "Project: b v1.0.0" in (tmp_path / "out" / "b" / "generation_report.txt").read_text(encoding="utf-8")
+
+
+def test_main_worst_exit_code(tmp_path):
+    good = _copy(tmp_path, dest="a.json")
+    bad = _copy(tmp_path, "graph_invalid.json", dest="b.json")
+    assert main([str(good), str(bad), "--output-dir", str(tmp_path / "out"), "--no-color"]) == EXIT_INPUT
+    assert (tmp_path / "out" / "a" / "DB_Mechs.scl").exists()
+
+
+def test_main_missing_pattern(tmp_path):
+    assert main([str(tmp_path / "*.json"), "--no-color"]) == EXIT_INPUT
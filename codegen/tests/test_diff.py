@@ -0,0 +1,122 @@
+"""Unit-тести для generator/diff.py."""
+import io
+import zipfile
+
+import pytest
+
+from generator.archive import iter_zip
+from generator.diff import changed_files, devices_from_report, diff_maps, load_archive, text_diff
+from generator.mapper import map_devices
+from generator.parser import RawDevice
+from generator.pipeline import GraphError, build_ctx, build_report_text, load_graph, render_members
+
+
+def _dev(id_: int, name: str, type_key: str) -> RawDevice:
+    return RawDevice(id=id_, name=name, type_key=type_key, raw_type=type_key.capitalize())
+
+
+def _base():
+    return [
+        _dev(1, "N1", "noria"),
+        _dev(2, "N2", "noria"),
+        _dev(3, "R1", "redler"),
+        _dev(5, "F1", "fan"),
+    ]
+
+
+# ── Один прохід: додані, видалені, переіндексовані, змінений тип ─────────────
+def test_diff_maps():
+    old = map_devices(_base())
+    new = map_devices([
+        _dev(2, "N2 нова", "noria"),   # N1 видалено → N2 зсувається 1 → 0
+        _dev(3, "R1", "fan"),          # тип змінено
+        _dev(5, "F1", "fan"),          # Fan[0] → Fan[1]
+        _dev(7, "G1", "gate2p"),
+    ])
+    diff = diff_maps(old, new)
+    assert [d.id for d in diff.removed] == [1]
+    assert [d.id for d in diff.added] == [7]
+    assert [(a.typed_index, b.typed_index) for a, b in diff.reindexed] == [(1, 0), (0, 1)]
+    assert [(a.type_key, b.type_key) for a, b in diff.retyped] == [("redler", "fan")]
+    assert [b.name for _, b in diff.renamed] == ["N2 нова"]
+    assert diff.unchanged == 0
+    assert diff.constants["MECHS_COUNT"] == (5, 7)
+    assert diff.constants["NORIAS_COUNT"] == (1, 0)
+
+    data = diff.to_dict()
+    assert data["summary"] == {"added": 1, "removed": 1, "reindexed": 2, "retyped": 1, "renamed": 1, "unchanged": 0}
+    assert data["reindexed"][0] == {"id": 2, "name": "N2 нова", "type": "Noria",
+                                    "old_typed_index": 1, "new_typed_index": 0}
+
+
+def test_diff_same_graph():
+    diff = diff_maps(map_devices(_base()), map_devices(list(reversed(_base()))))
+    assert not diff.changed
+    assert diff.unchanged == 4
+    assert not any(changed_files(map_devices(_base()), map_devices(_base())).values())
+
+
+def test_changed_files_rename_only():
+    renamed = _base()
+    renamed[2] = _dev(3, "R1 нова", "redler")
+    files = changed_files(map_devices(_base()), map_devices(renamed))
+    assert files == {"DB_Mechs.scl": True, "DB_SimConfig.scl": True, "DB_SimMechs.scl": False, "Mechs.csv": False}
+
+
+# ── Попередній архів: пристрої зі звіту, тексти файлів ──────────────────────
+def _archive(devices) -> bytes:
+    result = map_devices(devices)
+    ctx = build_ctx("P", "1.0.0", "graph.json")
+    return b"".join(iter_zip(render_members(result, ctx, [])))
+
+
+def test_load_archive_roundtrip():
+    devices = _base() + [RawDevice(9, 'Засувка "A"', "gate2p", "gate2P")]
+    snapshot = load_archive(_archive(devices))
+    assert snapshot.map_result == map_devices(devices)
+    assert set(snapshot.files) == {"DB_Mechs.scl", "DB_SimConfig.scl", "DB_SimMechs.scl", "Mechs.csv"}
+
+
+def test_devices_from_report():
+    result = map_devices(_base())
+    text = build_report_text(build_ctx("P", "1.0.0", "g.json"), result, [])
+    assert [(d.id, d.name, d.type_key) for d in devices_from_report(text)] == \
+        [(d.id, d.name, d.type_key) for d in _base()]
+
+
+def test_archive_sim_overrides():
+    """simConfig немає у звіті: DB_SimConfig.scl порівнюється з архівом за текстом."""
+    graph = b'{"deviceTypes": [], "devices": [' \
+        b'{"id": 1, "name": "N1", "type": "noria", "simConfig": {"StartupTime_ms": 9999}},' \
+        b'{"id": 2, "name": "R1", "type": "redler"}]}'
+    result = map_devices(load_graph(graph).devices)
+    ctx = build_ctx("P", "1.0.0", "graph.json")
+    snapshot = load_archive(b"".join(iter_zip(render_members(result, ctx, []))))
+
+    files = changed_files(snapshot.map_result, result, old_files=snapshot.files, ctx=ctx)
+    assert not any(files.values())
+
+    plain = map_devices(load_graph(graph.replace(b', "simConfig": {"StartupTime_ms": 9999}', b"")).devices)
+    files = changed_files(snapshot.map_result, plain, old_files=snapshot.files, ctx=ctx)
+    assert files["DB_SimConfig.scl"] and not files["DB_Mechs.scl"]
+
+
+@pytest.mark.parametrize("content", [b"PK not a zip", None])
+def test_load_archive_errors(content):
+    if content is None:
+        buf = io.BytesIO()
+        with zipfile.ZipFile(buf, "w") as zf:
+            zf.writestr("Mechs.csv", "x")
+        content = buf.getvalue()
+    with pytest.raises(GraphError):
+        load_archive(content)
+
+
+# ── Текстовий diff: без рядків з часом генерації ─────────────────────────────
+def test_text_diff():
+    old = {"a.scl": "// Generated: 1\nX := 1;\nY := 2;\n", "b.csv": "same\n"}
+    new = {"a.scl": "// Generated: 2\nX := 1;\nY := 3;\n", "b.csv": "same\n"}
+    out = text_diff(old, new)
+    assert list(out) == ["a.scl"]
+    assert "-Y := 2;\n+Y := 3;\n" in out["a.scl"]
+    assert "Generated" not in out["a.scl"]
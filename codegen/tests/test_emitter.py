@@ -0,0 +1,105 @@
+"""Unit-тести для generator/emitter.py."""
+import io
+import time
+import zipfile
+
+import pytest
+
+from generator.archive import iter_zip
+from generator.emitter import BOM, compile_block, compile_indexed, emit, literal, writer
+from generator.metrics import Timings
+
+
+# ── compile_block ────────────────────────────────────────────────────────────
+def test_compile_block_constants_and_fields():
+    tpl = compile_block(["// {name}", "Mechs[{id}] := {tia};"], ["id", "name"], tia="TYPE_FAN")
+    assert tpl.render((7, "Fan 7")) == "// Fan 7\nMechs[7] := TYPE_FAN;\n"
+
+
+def test_compile_block_keeps_format_spec():
+    tpl = compile_block(["[{id:<3}] {kind:>4}|"], ["id"], kind="OK")
+    assert tpl.render((5,)) == "[5  ]   OK|\n"
+
+
+def test_compile_block_escapes_braces():
+    tpl = compile_block([literal("a := {1, 2};"), "{{x}} {id}"], ["id"])
+    assert tpl.render((3,)) == "a := {1, 2};\n{x} 3\n"
+    # Значення константи з дужками не стає полем шаблону
+    assert compile_block(["{c}"], [], c="{0}").render(()) == "{0}\n"
+
+
+def test_compile_block_unknown_field():
+    with pytest.raises(KeyError):
+        compile_block(["{missing}"], ["id"])
+
+
+def test_render_all():
+    tpl = compile_block(["{id}:{name}"], ["id", "name"])
+    assert "".join(tpl.render_all([(1, "a"), (2, "b")])) == "1:a\n2:b\n"
+
+
+# ── compile_indexed ──────────────────────────────────────────────────────────
+def test_compile_indexed_matches_compile_block():
+    head = ["// {name} ({id})"]
+    body = ["{arr}[{idx}].A := 1;", literal("{arr}") + "[{idx}].B := {c};", ""]
+    fields = ["id", "name", "idx"]
+    indexed = compile_indexed(head, body, fields, "idx", arr="Fan", c=2)
+    plain = compile_block(head + body, fields, arr="Fan", c=2)
+    records = [(1, "F1", 0), (7, "F2", 1)]
+    assert list(indexed.render_all(records)) == list(plain.render_all(records))
+    assert indexed.render((3, "F3", 12)) == "// F3 (3)\nFan[12].A := 1;\n{arr}[12].B := 2;\n\n"
+
+
+@pytest.mark.parametrize("body", [["{id}"], ["{idx:>3}"]])
+def test_compile_indexed_body_only_index(body):
+    with pytest.raises(KeyError):
+        compile_indexed([], body, ["id", "idx"], "idx")
+
+
+# ── emit ─────────────────────────────────────────────────────────────────────
+def test_emit_bom_and_batches():
+    sink = io.BytesIO()
+    emit((f"{i}\n" for i in range(1000)), sink, bom=True)
+    data = sink.getvalue()
+    assert data.startswith(BOM)
+    assert data[len(BOM):].decode("utf-8") == "".join(f"{i}\n" for i in range(1000))
+
+
+def test_emit_utf8_without_bom():
+    sink = io.BytesIO()
+    emit(["Засувка\n"], sink)
+    assert sink.getvalue() == "Засувка\n".encode("utf-8")
+
+
+def test_writer_is_lazy():
+    calls = []
+
+    def pieces():
+        calls.append(1)
+        return ["x\n"]
+
+    write = writer(pieces)
+    assert calls == []
+    sink = io.BytesIO()
+    write(sink)
+    assert sink.getvalue() == b"x\n" and calls == [1]
+
+
+# ── Запис у ZIP ──────────────────────────────────────────────────────────────
+def test_iter_zip_with_writer_members():
+    members = [("a.txt", writer(lambda: ["а\n"] * 3, bom=True)), ("b.bin", b"raw")]
+    data = b"".join(iter_zip(members))
+    with zipfile.ZipFile(io.BytesIO(data)) as zf:
+        assert zf.read("a.txt") == BOM + "а\nа\nа\n".encode("utf-8")
+        assert zf.read("b.bin") == b"raw"
+
+
+def test_nested_spans_count_self_time():
+    t = Timings()
+    with t.span("render"):
+        time.sleep(0.01)
+        with t.span("zip"):
+            time.sleep(0.03)
+    spans = dict(t.items())
+    assert spans["zip"] >= 0.02
+    assert 0.01 <= spans["render"] < spans["zip"]
@@ -0,0 +1,51 @@
+"""Unit-тести для generator/executor.py."""
+import asyncio
+import threading
+
+import pytest
+
+from generator.executor import GenerationExecutor, QueueFullError
+
+
+# ── Допуск обмежений workers + queue_size ────────────────────────────────────
+def test_capacity_and_rejection():
+    ex = GenerationExecutor(workers=1, queue_size=1)
+    assert ex.try_acquire()
+    assert ex.try_acquire()
+    assert not ex.try_acquire()
+    assert ex.stats()["rejected"] == 1
+    ex.release()
+    assert ex.try_acquire()
+
+
+# ── admit(): слот звільняється при виході, QueueFullError коли місць немає ───
+def test_admit_context_manager():
+    ex = GenerationExecutor(workers=1, queue_size=0)
+    with ex.admit():
+        assert ex.stats()["in_flight"] == 1
+        with pytest.raises(QueueFullError):
+            ex.admit()
+    assert ex.stats()["in_flight"] == 0
+
+
+# ── detach(): слот тримається до явного release ─────────────────────────────
+def test_admit_detach():
+    ex = GenerationExecutor(workers=1, queue_size=0)
+    with ex.admit() as admission:
+        release = admission.detach()
+    assert ex.stats()["in_flight"] == 1
+    release()
+    assert ex.stats()["in_flight"] == 0
+
+
+# ── run(): функція виконується в окремому потоці ─────────────────────────────
+def test_run_off_event_loop():
+    ex = GenerationExecutor(workers=1)
+
+    async def main():
+        return await ex.run(lambda x: (threading.current_thread().name, x * 2), 21)
+
+    name, value = asyncio.run(main())
+    assert value == 42
+    assert name.startswith("codegen")
+    ex.shutdown()
@@ -0,0 +1,140 @@
+"""Unit-тести для generator/graph.py."""
+import json
+
+import pytest
+
+from bench.synth import make_graph
+from generator.graph import analyze, build_graph, find_cycles, find_routes, load_connections
+from generator.pipeline import GraphError
+
+
+def _dev(id_, name, type_, ports=("Вхід", "Вихід"), internal=None):
+    dev = {
+        "id": str(id_), "name": name, "type": type_,
+        "ports": [{"direction": "in" if p.startswith(("Вхід", "Засувка")) else "out", "name": p, "port_order": i}
+                  for i, p in enumerate(ports)],
+    }
+    if internal is not None:
+        dev["internal_connections"] = [{"in_port": a, "out_port": b} for a, b in internal]
+    return dev
+
+
+def _conn(src, dst, src_port="Вихід", dst_port="Вхід"):
+    return {"source_device": src, "source_port": src_port, "target_device": dst, "target_port": dst_port}
+
+
+def _plant():
+    """Яма → норія → розвилка на два редлери → силоси; Silo 2 досяжний лише через R2."""
+    return {
+        "deviceTypes": [],
+        "devices": [
+            _dev(1, "Pit", "receivingPit", ("Вихід",)),
+            _dev(2, "Noria", "noria", ("Вхід", "Вихід", "Вихід 2"), [("Вхід", "Вихід"), ("Вхід", "Вихід 2")]),
+            _dev(3, "R1", "redler"),
+            _dev(4, "R2", "redler"),
+            _dev(5, "Silo 1", "silos", ("Вхід", "Вихід")),
+            _dev(6, "Silo 2", "Silo", ("Вхід",)),
+            _dev(7, "R3", "redler"),
+        ],
+        "connections": [
+            _conn("Pit", "Noria"),
+            _conn("Noria", "R1"),
+            _conn("Noria", "R2", "Вихід 2"),
+            _conn("R1", "Silo 1"),
+            _conn("R2", "Silo 2"),
+            _conn("R2", "Silo 1"),
+            _conn("Silo 1", "R3"),          # через силос маршрут далі не йде
+        ],
+    }
+
+
+# ── Індекс ───────────────────────────────────────────────────────────────────
+def test_index():
+    graph = build_graph(_plant())
+    assert len(graph) == 7
+    assert len(graph.port_name) == 13
+    assert graph.connections == 7
+    assert graph.issues == []
+    assert graph.id_of("R2") == 4 and graph.id_of("nope") is None
+    assert graph.successors("Noria") == ["R1", "R2"]
+    assert [graph.port_name[p] for p in graph.ports_of(graph.by_name["Noria"])] == ["Вхід", "Вихід", "Вихід 2"]
+
+
+def test_missing_internal_connections_connect_all():
+    graph = build_graph({"devices": [_dev(1, "V", "valve3P", ("Вхід", "Вихід", "Вихід 2"))]})
+    inp = graph.port(0, "Вхід")
+    assert [graph.port_name[p] for p in graph.edges[inp]] == ["Вихід", "Вихід 2"]
+
+
+# ── Діагностика ──────────────────────────────────────────────────────────────
+def test_issues():
+    data = _plant()
+    data["devices"].append(_dev(8, "R1", "redler"))
+    data["devices"][2]["internal_connections"] = [{"in_port": "Вихід", "out_port": "Вхід"},
+                                                  {"in_port": "Вхід", "out_port": "Бічний"}]
+    data["connections"] += [
+        _conn("R1", "Redler 9"),
+        _conn("R1", "R2", dst_port="Засувка"),
+        _conn("R1", "R2", "Вхід", "Вихід"),
+        "bad",
+    ]
+    kinds = [issue.kind for issue in build_graph(data).issues]
+    assert kinds == ["direction", "dangling", "duplicate_name",
+                     "unknown_device", "dangling", "direction", "invalid"]
+
+
+def test_load_connections_errors():
+    with pytest.raises(GraphError):
+        load_connections(b"{")
+    with pytest.raises(GraphError):
+        load_connections(b"[]")
+    assert len(load_connections(json.dumps(_plant()).encode())) == 7
+
+
+# ── Цикли ────────────────────────────────────────────────────────────────────
+def test_cycles():
+    data = _plant()
+    assert find_cycles(build_graph(data)) == []
+    data["connections"].append(_conn("R3", "Noria"))
+    data["connections"].append(_conn("R2", "R2"))
+    assert find_cycles(build_graph(data)) == [["Noria", "R1", "R2", "Silo 1", "R3"]]
+
+    data = _plant()
+    data["connections"].append(_conn("R3", "R3"))
+    assert find_cycles(build_graph(data)) == [["R3"]]
+
+
+# ── Маршрути ─────────────────────────────────────────────────────────────────
+def test_routes():
+    routes = find_routes(build_graph(_plant()))
+    assert [(r.source, r.target, r.devices) for r in routes] == [
+        ("Pit", "Silo 1", ["Pit", "Noria", "R1", "Silo 1"]),
+        ("Pit", "Silo 2", ["Pit", "Noria", "R2", "Silo 2"]),
+    ]
+    assert routes[1].to_dict()["hops"][1] == {"device": "Noria", "in_port": "Вхід", "out_port": "Вихід 2"}
+    assert routes[0].hops[0].in_port is None and routes[0].hops[-1].out_port is None
+
+
+def test_routes_custom_types():
+    routes = find_routes(build_graph(_plant()), sources={"noria"}, targets={"redler"})
+    assert [r.target for r in routes] == ["R1", "R2"]
+
+
+def test_analysis_dict():
+    data = _plant()
+    data["connections"].append(_conn("R3", "Noria"))
+    result = analyze(build_graph(data)).to_dict()
+    assert result["summary"] == {"devices": 7, "ports": 13, "connections": 8,
+                                 "issues": 1, "cycles": 1, "routes": 2}
+    assert result["issues"][0]["kind"] == "cycle"
+    json.dumps(result)
+
+
+# ── Масштаб: ланцюжок без рекурсії ───────────────────────────────────────────
+def test_long_chain_ring():
+    data = make_graph(20000)
+    first, last = data["connections"][0]["source_device"], data["connections"][-1]["target_device"]
+    data["connections"].append(_conn(last, first))
+    result = analyze(build_graph(data))
+    assert len(result.cycles) == 1 and len(result.cycles[0]) == 20000
+    assert result.routes and all(r.devices[0] == r.source for r in result.routes)
@@ -0,0 +1,75 @@
+"""Unit-тести для generator/incremental.py."""
+from generator.generators.db_mechs import generate_db_mechs
+from generator.generators.db_sim_config import generate_db_sim_config
+from generator.incremental import IncrementalGenerator
+from generator.mapper import map_devices
+from generator.parser import RawDevice
+
+CTX = {"project_name": "P", "version": "1.0.0", "timestamp": "T", "source": "graph.json"}
+
+
+def _dev(id_: int, name: str, type_key: str) -> RawDevice:
+    return RawDevice(id=id_, name=name, type_key=type_key, raw_type=type_key.capitalize())
+
+
+def _base():
+    return [
+        _dev(1, "N1", "noria"),
+        _dev(2, "N2", "noria"),
+        _dev(3, "R1", "redler"),
+        _dev(4, "G1", "gate2p"),
+        _dev(5, "F1", "fan"),
+    ]
+
+
+# ── Перша генерація: всі файли змінені, вміст = повна генерація ─────────────
+def test_first_generation_matches_full():
+    r = map_devices(_base())
+    inc = IncrementalGenerator().generate(r, CTX)
+    assert all(inc.changed.values())
+    assert inc.files["DB_Mechs.scl"] == generate_db_mechs(r, CTX)
+    assert inc.files["DB_SimConfig.scl"] == generate_db_sim_config(r, CTX)
+
+
+# ── Той самий граф: нічого не змінено, секції не рендеряться ───────────────
+def test_same_graph_unchanged():
+    gen = IncrementalGenerator()
+    gen.generate(map_devices(_base()), CTX)
+    inc = gen.generate(map_devices(_base()), {**CTX, "timestamp": "T2"})
+    assert not any(inc.changed.values())
+    assert inc.rendered_sections == 0
+
+
+# ── reset: усі файли знову змінені, секції використовуються повторно ──────
+def test_reset_marks_all_changed():
+    gen = IncrementalGenerator()
+    gen.generate(map_devices(_base()), CTX)
+    gen.reset()
+    inc = gen.generate(map_devices(_base()), CTX)
+    assert all(inc.changed.values())
+    assert inc.rendered_sections == 0
+
+
+# ── Додано засувку: перерендерено лише секції gate2p ────────────────────────
+def test_added_gate_rerenders_only_gate_sections():
+    gen = IncrementalGenerator()
+    gen.generate(map_devices(_base()), CTX)
+    r = map_devices(_base() + [_dev(6, "G2", "gate2p")])
+    inc = gen.generate(r, CTX)
+    assert inc.changed_types == ["gate2p"]
+    assert inc.rendered_sections == 2          # DB_Mechs + DB_SimConfig
+    assert inc.files["DB_Mechs.scl"] == generate_db_mechs(r, CTX)
+    assert inc.files["DB_SimConfig.scl"] == generate_db_sim_config(r, CTX)
+    assert inc.changed["Mechs.csv"] is True    # GATES2P_COUNT 0 → 1
+    assert inc.changed["DB_SimMechs.scl"] is False
+
+
+# ── Видалено тип повністю: оголошення масиву зникає ─────────────────────────
+def test_removed_type():
+    gen = IncrementalGenerator()
+    gen.generate(map_devices(_base()), CTX)
+    r = map_devices([d for d in _base() if d.type_key != "fan"])
+    inc = gen.generate(r, CTX)
+    assert inc.changed["DB_SimMechs.scl"] is True
+    assert inc.files["DB_Mechs.scl"] == generate_db_mechs(r, CTX)
+    assert "Fan" not in inc.files["DB_SimConfig.scl"]
@@ -0,0 +1,182 @@
+"""Unit-тести для generator/jobs.py."""
+import asyncio
+import io
+import threading
+import zipfile
+
+import pytest
+
+from generator.archive import iter_zip
+from generator.jobs import (
+    DONE,
+    FAILED,
+    PROGRESS_STEP,
+    RUNNING,
+    Job,
+    JobLimitError,
+    JobStore,
+    ProgressReader,
+    read_chunks,
+    supervise,
+    track_members,
+)
+from generator.mapper import map_devices
+from generator.parser import RawDevice
+from generator.pipeline import build_ctx, emit_members
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _finished(store, size=0):
+    job = store.create()
+    store.save(job, job.artifact_path, [b"x" * size])
+    job.complete("a.zip", "application/zip", size)
+    return job
+
+
+# ── Журнал подій і SSE ───────────────────────────────────────────────────────
+def test_events_and_states(tmp_path):
+    job = Job("j", tmp_path)
+    job.start()
+    job.publish("parsed", devices=3)
+    job.complete("a.zip", "application/zip", 10, result_id="r")
+    assert job.state == DONE and job.finished
+    assert [e.id for e in job.events] == [1, 2, 3]
+    assert job.events_after(1)[0].sse() == b'id: 2\nevent: parsed\ndata: {"devices": 3}\n\n'
+    assert job.status()["last_event"] == {"event": "done", "filename": "a.zip", "size": 10, "result_id": "r"}
+
+    failed = Job("f", tmp_path)
+    failed.fail(["Помилка"], ["Попередження"])
+    assert failed.state == FAILED and failed.errors == ["Помилка"]
+    assert failed.events[-1].data == {"errors": ["Помилка"], "warnings": ["Попередження"]}
+
+
+def test_wait_wakes_from_thread(tmp_path):
+    job = Job("j", tmp_path)
+
+    async def main():
+        assert not await job.wait(0, 0.01)
+        threading.Timer(0.05, job.start).start()
+        assert await job.wait(0, 5)
+        assert job.state == RUNNING
+        assert await job.wait(0, 0)        # подія вже є — без очікування
+        assert not job._waiters
+
+    asyncio.run(main())
+
+
+@pytest.mark.parametrize("error", [RuntimeError("cannot schedule new futures after shutdown"),
+                                   asyncio.CancelledError()])
+def test_supervise_fails_unfinished_job(tmp_path, error):
+    job = Job("j", tmp_path)
+
+    async def broken():
+        raise error
+
+    with pytest.raises(type(error)):
+        asyncio.run(supervise(job, broken()))
+    assert job.state == FAILED and job.finished_at is not None
+    assert job.errors[0].startswith("Задачу не виконано (")
+    assert job.events[-1].event == "failed"
+
+
+def test_supervise_keeps_finished_job(tmp_path):
+    job = Job("j", tmp_path)
+
+    async def finish():
+        job.complete("a.zip", "application/zip", 1)
+        return "ok"
+
+    assert asyncio.run(supervise(job, finish())) == "ok"
+    assert job.state == DONE and len(job.events) == 1
+
+
+# ── Файли задачі й прогрес ───────────────────────────────────────────────────
+def test_save_progress_events(tmp_path):
+    store = JobStore(tmp_path)
+    job = store.create()
+    chunks = [b"a" * (PROGRESS_STEP // 2)] * 3
+    assert store.save(job, job.artifact_path, chunks, progress="written") == 3 * PROGRESS_STEP // 2
+    assert [e.data["bytes"] for e in job.events] == [PROGRESS_STEP, 3 * PROGRESS_STEP // 2]
+    assert job.artifact_path.stat().st_size == store.disk_bytes == job.disk_bytes
+
+
+def test_remove_file_releases_space(tmp_path):
+    store = JobStore(tmp_path)
+    job = store.create()
+    store.save(job, job.input_path, read_chunks(io.BytesIO(b"{}" * 100), 64))
+    assert store.disk_bytes == 200
+    store.remove_file(job, job.input_path)
+    assert store.disk_bytes == 0 and not job.input_path.exists()
+
+
+def test_progress_reader(tmp_path):
+    job = Job("j", tmp_path)
+    data = b"x" * (PROGRESS_STEP + 10)
+    reader = ProgressReader(io.BytesIO(data), job, "read", len(data))
+    assert b"".join(read_chunks(reader, PROGRESS_STEP // 2)) == data
+    assert [e.data for e in job.events] == [
+        {"bytes": PROGRESS_STEP, "total": len(data)},
+        {"bytes": len(data), "total": len(data)},
+    ]
+
+
+def test_track_members(tmp_path):
+    job = Job("j", tmp_path)
+    result = map_devices([RawDevice(1, "N1", "noria", "Noria")])
+    ctx = build_ctx("P", "1.0.0", "graph.json")
+    archive = b"".join(iter_zip(track_members(emit_members(result, ctx, []), job)))
+    files = [e.data for e in job.events]
+    assert [f["name"] for f in files] == zipfile.ZipFile(io.BytesIO(archive)).namelist()
+    with zipfile.ZipFile(io.BytesIO(archive)) as zf:
+        assert [f["bytes"] for f in files] == [info.file_size for info in zf.infolist()]
+    assert [f["index"] for f in files] == list(range(1, len(files) + 1))
+
+
+# ── Сховище: TTL, кількість, диск ────────────────────────────────────────────
+def test_ttl_removes_files(tmp_path):
+    clock = _Clock()
+    store = JobStore(tmp_path, ttl=10, clock=clock)
+    running = store.create()
+    job = _finished(store, 5)
+    clock.now = 9
+    assert store.get(job.id) is job
+    clock.now = 10
+    assert store.get(job.id) is None
+    assert not job.directory.exists() and store.disk_bytes == 0
+    assert store.get(running.id) is running      # незавершені не старіють
+
+
+def test_max_jobs_evicts_finished(tmp_path):
+    store = JobStore(tmp_path, max_jobs=2)
+    old = _finished(store)
+    running = store.create()
+    store.create()
+    assert store.get(old.id) is None and store.get(running.id) is running
+    with pytest.raises(JobLimitError):
+        store.create()
+
+
+def test_disk_limit(tmp_path):
+    store = JobStore(tmp_path, max_bytes=100)
+    old = _finished(store, 60)
+    job = store.create()
+    store.save(job, job.artifact_path, [b"x" * 30, b"x" * 30])   # витісняє old
+    assert store.get(old.id) is None and store.disk_bytes == 60
+    with pytest.raises(JobLimitError):
+        store.save(job, job.input_path, [b"x" * 50])             # job ще виконується
+
+
+def test_clear_and_disabled(tmp_path):
+    store = JobStore(tmp_path)
+    job = _finished(store, 5)
+    store.clear()
+    assert len(store) == 0 and not job.directory.exists()
+    with pytest.raises(JobLimitError):
+        JobStore(tmp_path, max_jobs=0).create()
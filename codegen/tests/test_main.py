@@ -0,0 +1,332 @@
+"""Тести HTTP/WebSocket-рівня main.py (через fastapi.testclient)."""
+import base64
+import io
+import json
+import pathlib
+import zipfile
+
+import pytest
+
+pytest.importorskip("httpx")   # потрібен TestClient
+
+from fastapi.testclient import TestClient  # noqa: E402
+
+import main  # noqa: E402
+from bench.synth import make_graph_bytes  # noqa: E402
+
+FIXTURES = pathlib.Path(__file__).parent / "fixtures"
+
+GRAPH = json.dumps({
+    "deviceTypes": [],
+    "devices": [
+        {"id": "1", "name": "Норія 1", "type": "noria"},
+        {"id": "2", "name": "Редлер 1", "type": "redler"},
+        {"id": "4", "name": "Вентилятор 1", "type": "fan"},
+    ],
+}, ensure_ascii=False)
+
+
+ALL_FILES = ["DB_Mechs.scl", "DB_SimConfig.scl", "DB_SimMechs.scl", "Mechs.csv", "generation_report.txt"]
+
+
+@pytest.fixture(scope="module")
+def client():
+    # with — щоб фонові задачі не скасовувались між запитами разом з event loop
+    # клієнта. Один на модуль: lifespan при виході зупиняє пули генерації процесу.
+    with TestClient(main.app) as c:
+        yield c
+
+
+def _upload(content=GRAPH, name="graph.json"):
+    if isinstance(content, str):
+        content = content.encode()
+    return {"file": (name, content, "application/json")}
+
+
+def _zip_names(data: bytes):
+    return zipfile.ZipFile(io.BytesIO(data)).namelist()
+
+
+# ── /generate і /generate.zip ────────────────────────────────────────────────
+def test_generate_json(client):
+    r = client.post("/generate", files=_upload(), data={"project_name": "P"})
+    assert r.status_code == 200
+    body = r.json()
+    assert body["ok"] and body["zip_filename"].startswith("scl_P_")
+    assert _zip_names(base64.b64decode(body["zip_base64"])) == ALL_FILES
+    assert body["counts"] == {"ok": 3, "skip": 0, "warn": 0}
+    assert "devices" not in body and body["result_id"]
+    assert "Server-Timing" in r.headers
+
+
+def test_generate_zip_headers(client):
+    r = client.post("/generate.zip", files=_upload(), data={"project_name": "P"})
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "application/zip"
+    assert r.headers["content-disposition"].startswith("attachment; filename*=UTF-8''scl_P_")
+    assert json.loads(r.headers["x-constants"])["MECHS_COUNT"] == 4
+    assert r.headers["x-devices-count"] == "3" and r.headers["x-warnings-count"] == "0"
+    assert r.headers["x-gap-slots-count"] == "2"           # слоти 0 і 3
+    assert r.headers["x-result-id"]
+    assert _zip_names(r.content) == ALL_FILES
+
+
+def test_generate_zip_raw_and_outputs(client):
+    r = client.post("/generate.zip", files=_upload(), data={"outputs": "Mechs.csv", "archive": "raw"})
+    assert r.status_code == 200
+    assert r.headers["content-type"] == "text/csv; charset=utf-8"
+    assert r.headers["content-disposition"].endswith("''Mechs.csv")
+    assert b"NORIAS_COUNT" in r.content
+
+    r = client.post("/generate.zip", files=_upload(), data={"outputs": "Mechs.csv,DB_Mechs.scl", "archive": "raw"})
+    assert r.status_code == 400 and r.json()["ok"] is False
+    r = client.post("/generate.zip", files=_upload(), data={"outputs": "nope.txt"})
+    assert r.status_code == 400
+
+
+def test_generate_zip_reproducible_etag(client, monkeypatch):
+    monkeypatch.setenv("SOURCE_DATE_EPOCH", "1700000000")
+    data = {"project_name": "P", "reproducible": "true"}
+    first = client.post("/generate.zip", files=_upload(), data=data)
+    second = client.post("/generate.zip", files=_upload(), data=data)
+    assert first.status_code == second.status_code == 200
+    etag = first.headers["etag"]
+    assert etag == second.headers["etag"] and first.content == second.content
+    assert "MANIFEST.sha256" in _zip_names(first.content)
+
+    cached = client.post("/generate.zip", files=_upload(), data=data, headers={"If-None-Match": etag})
+    assert cached.status_code == 304 and cached.content == b"" and cached.headers["etag"] == etag
+    other = client.post("/generate.zip", files=_upload(), data=data, headers={"If-None-Match": '"x"'})
+    assert other.status_code == 200
+    # Без reproducible ETag немає
+    assert "etag" not in client.post("/generate.zip", files=_upload()).headers
+
+
+def test_generate_zip_incremental(client):
+    data = {"project_name": "Inc", "incremental": "true"}
+    first = client.post("/generate.zip", files=_upload(), data=data)
+    assert first.headers["x-changed-files"].split(",") == ALL_FILES[:-1]   # без звіту
+    second = client.post("/generate.zip", files=_upload(), data=data)
+    assert "DB_Mechs.scl" not in second.headers["x-changed-files"]
+
+
+@pytest.mark.parametrize("content, status", [
+    ("{", 400),
+    (json.dumps({"deviceTypes": [], "devices": [{"id": "1", "name": "A", "type": "laser"}]}), 422),
+])
+def test_generate_errors(client, content, status):
+    r = client.post("/generate.zip", files=_upload(content))
+    assert r.status_code == status
+    assert r.json()["ok"] is False and r.json()["errors"]
+
+
+def test_generate_too_large(client, monkeypatch):
+    monkeypatch.setenv("MAX_UPLOAD_SIZE_MB", "0")
+    r = client.post("/generate", files=_upload())
+    assert r.status_code == 400 and "максимальний розмір" in r.json()["errors"][0]
+
+
+def test_generate_streaming_parse(client, monkeypatch):
+    # Великий граф (з дробовими координатами) розбирається потоково
+    monkeypatch.setattr(main, "_STREAM_PARSE_THRESHOLD_BYTES", 1024)
+    raw = make_graph_bytes(500, seed=3)
+    streamed = client.post("/generate.zip", files=_upload(raw), data={"project_name": "S"})
+    assert streamed.status_code == 200
+    monkeypatch.setattr(main, "_STREAM_PARSE_THRESHOLD_BYTES", 1 << 30)
+    loaded = client.post("/generate.zip", files=_upload(raw), data={"project_name": "S"})
+    assert streamed.headers["x-constants"] == loaded.headers["x-constants"]
+
+
+# ── /generate/summary ────────────────────────────────────────────────────────
+def test_generate_summary(client):
+    r = client.post("/generate/summary", files=_upload())
+    assert r.status_code == 200
+    body = r.json()
+    assert [d["id"] for d in body["devices"]] == [1, 2, 4]
+    assert body["gap_ranges"] == [[0, 0], [3, 3]] and body["gap_count"] == 2
+    assert body["constants"]["MECHS_COUNT"] == 4
+
+
+# ── /results/{id}/devices ────────────────────────────────────────────────────
+def test_results_paging(client):
+    raw = make_graph_bytes(250, seed=1)
+    result_id = client.post("/generate.zip", files=_upload(raw)).headers["x-result-id"]
+    page = client.get(f"/results/{result_id}/devices", params={"offset": 0, "limit": 100}).json()
+    rest = client.get(f"/results/{result_id}/devices", params={"offset": 100, "limit": 1000}).json()
+    assert page["ok"] and page["total"] == rest["total"] > 100
+    assert len(page["devices"]) == 100 and len(rest["devices"]) == page["total"] - 100
+    ids = [d["id"] for d in page["devices"] + rest["devices"] if d["status"] != "warn"]
+    assert ids == sorted(ids)
+
+    noria = client.get(f"/results/{result_id}/devices", params={"type": "noria", "limit": 5}).json()
+    assert noria["devices"] and all(d["tia_type"] == "TYPE_NORIA" for d in noria["devices"])
+    warn = client.get(f"/results/{result_id}/devices", params={"status": "warn"}).json()
+    assert warn["total"] and all(d["status"] == "warn" for d in warn["devices"])
+
+    # Пошук і список типів — для таблиці веб-інтерфейсу
+    assert "noria" in page["types"] and "silo" not in page["types"]   # Silo — не-механізм
+    found = client.get(f"/results/{result_id}/devices", params={"q": " NORIA ", "type": page["types"][0]}).json()
+    assert all("noria" in f"{d['display_name']} {d['type_name']}".lower() for d in found["devices"])
+
+
+@pytest.mark.parametrize("path, params, status", [
+    ("/results/nope/devices", {}, 404),
+    (None, {"status": "bad"}, 400),
+    (None, {"type": "laser"}, 400),
+])
+def test_results_errors(client, path, params, status):
+    if path is None:
+        result_id = client.post("/generate", files=_upload()).json()["result_id"]
+        path = f"/results/{result_id}/devices"
+    r = client.get(path, params=params)
+    assert r.status_code == status and r.json()["ok"] is False
+
+
+# ── /validate ────────────────────────────────────────────────────────────────
+def test_validate(client):
+    assert client.post("/validate", files=_upload()).json()["ok"] is True
+
+    devices = [{"id": f"{i}a", "name": f"D{i}", "type": "noria"} for i in range(10)]
+    bad = json.dumps({"deviceTypes": [], "devices": devices})
+    r = client.post("/validate", files=_upload(bad), data={"sample": "2", "max_errors": "4"})
+    assert r.status_code == 200
+    body = r.json()
+    assert body["ok"] is False and body["aborted"] is True and body["error_count"] == 4
+    assert len(body["errors"][0]["sample"]) == 2
+
+    assert client.post("/validate", files=_upload("[1]")).status_code == 400
+
+
+# ── /diff ────────────────────────────────────────────────────────────────────
+def test_diff_against_graph_and_archive(client):
+    graph = json.loads(GRAPH)
+    graph["devices"].append({"id": "3", "name": "Засувка", "type": "gate2P"})
+    new = json.dumps(graph, ensure_ascii=False).encode()
+
+    r = client.post("/diff", files={**_upload(new), "previous": ("old.json", GRAPH.encode())},
+                    data={"text": "true"})
+    assert r.status_code == 200
+    body = r.json()
+    assert body["changed"] and [d["id"] for d in body["added"]] == [3]
+    assert body["files"]["DB_Mechs.scl"] == "changed"
+    assert body["text"]["DB_Mechs.scl"].startswith("--- a/DB_Mechs.scl")
+
+    archive = client.post("/generate.zip", files=_upload()).content
+    same = client.post("/diff", files={**_upload(), "previous": ("old.zip", archive)}).json()
+    assert same["changed"] is False and set(same["files"].values()) == {"unchanged"}
+
+    bad = client.post("/diff", files={**_upload(), "previous": ("old.json", b"{")})
+    assert bad.status_code == 400
+
+
+# ── /graph ───────────────────────────────────────────────────────────────────
+def test_graph(client):
+    r = client.post("/graph", files=_upload(make_graph_bytes(30, seed=2)))
+    assert r.status_code == 200
+    body = r.json()
+    assert body["ok"] and body["summary"]["devices"] == 30
+    assert body["summary"]["connections"] == 29
+    assert client.post("/graph", files=_upload("{")).status_code == 400
+
+
+# ── /generate/batch ──────────────────────────────────────────────────────────
+def test_generate_batch(client):
+    inner = io.BytesIO()
+    with zipfile.ZipFile(inner, "w") as zf:
+        zf.writestr("b.json", GRAPH)
+    files = [
+        ("files", ("a.json", GRAPH.encode(), "application/json")),
+        ("files", ("broken.json", b"{", "application/json")),
+        ("files", ("more.zip", inner.getvalue(), "application/zip")),
+    ]
+    r = client.post("/generate/batch", files=files)
+    assert r.status_code == 200
+    assert (r.headers["x-batch-succeeded"], r.headers["x-batch-failed"]) == ("2", "1")
+    with zipfile.ZipFile(io.BytesIO(r.content)) as zf:
+        report = json.loads(zf.read("batch_report.json"))
+        archives = [n for n in zf.namelist() if n.endswith(".zip")]
+    assert len(archives) == 2 and report["ok"] is False
+    assert {p["source"]: p["ok"] for p in report["projects"]} == {"a.json": True, "broken.json": False, "b.json": True}
+
+
+# ── /jobs і SSE ──────────────────────────────────────────────────────────────
+def _sse(text: str):
+    events = []
+    for block in text.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if not line.startswith(":"))
+        events.append((int(fields["id"]), fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def test_job_events_and_artifact(client):
+    r = client.post("/jobs", files=_upload(), data={"project_name": "J"})
+    assert r.status_code == 202
+    job = r.json()
+
+    events = _sse(client.get(job["events"]).text)       # потік закривається після done
+    names = [name for _, name, _ in events]
+    assert names[0] == "state" and names[-1] == "done" and "parsed" in names and "file" in names
+    assert [i for i, _, _ in events] == list(range(1, len(events) + 1))
+
+    resumed = _sse(client.get(job["events"], headers={"Last-Event-ID": "2"}).text)
+    assert resumed == events[2:]
+
+    status = client.get(job["status"]).json()
+    assert status["state"] == "done" and status["events"] == len(events)
+    artifact = client.get(job["artifact"])
+    assert artifact.status_code == 200 and _zip_names(artifact.content) == ALL_FILES
+    assert events[-1][2]["size"] == len(artifact.content)
+
+
+def test_job_failure_and_unknown(client):
+    job = client.post("/jobs", files=_upload("{")).json()
+    events = _sse(client.get(job["events"]).text)
+    assert events[-1][1] == "failed"
+    r = client.get(job["artifact"])
+    assert r.status_code == 409 and r.json()["state"] == "failed"
+    assert client.get("/jobs/nope").status_code == 404
+    assert client.get("/jobs/nope/events").status_code == 404
+
+
+# ── Перевантаження: 503 + Retry-After ────────────────────────────────────────
+def test_busy_returns_503(client):
+    executor = main._executor
+    held = 0
+    while executor.try_acquire():
+        held += 1
+    try:
+        for path in ("/generate", "/generate.zip", "/validate", "/jobs"):
+            r = client.post(path, files=_upload())
+            assert r.status_code == 503, path
+            assert r.headers["retry-after"] == main._RETRY_AFTER_SECONDS
+            assert r.json() == {"ok": False, "errors": [main._BUSY_MESSAGE]}
+    finally:
+        for _ in range(held):
+            executor.release()
+    assert client.post("/generate", files=_upload()).status_code == 200
+    assert 'codegen_errors_total{endpoint="generate",kind="busy"}' in client.get("/metrics").text
+
+
+def test_health(client):
+    body = client.get("/health").json()
+    assert body["status"] == "ok" and body["executor"]["in_flight"] == 0
+
+
+# ── WebSocket /session ───────────────────────────────────────────────────────
+def test_session_snapshot_and_delta(client):
+    with client.websocket_connect("/session?project_name=P") as ws:
+        ws.send_text(GRAPH)
+        snapshot = ws.receive_json()
+        assert snapshot["op"] == "snapshot" and len(snapshot["devices"]) == 3
+        ws.send_text(json.dumps({"op": "remove", "id": 4, "seq": 1}))
+        delta = ws.receive_json()
+        assert delta["removed"] == [4] and delta["seq"] == 1
+
+
+def test_session_binary_frame_is_error(client):
+    with client.websocket_connect("/session") as ws:
+        ws.send_bytes(GRAPH.encode())
+        reply = ws.receive_json()
+        assert reply["op"] == "error" and "текстовими" in reply["errors"][0]
+        ws.send_text(GRAPH)                      # сеанс живий і далі
+        assert ws.receive_json()["op"] == "snapshot"
@@ -0,0 +1,29 @@
+"""Unit-тести для generator/manifest.py."""
+import hashlib
+import io
+
+from generator.manifest import MANIFEST_NAME, parse_manifest, render_manifest, with_manifest
+
+
+def test_with_manifest_hashes_written_members():
+    members = [("a.scl", lambda sink: (sink.write(b"DATA"), sink.write(b"_BLOCK"))), ("b.csv", b"1;2")]
+    written = {}
+    for name, data in with_manifest(members):
+        if callable(data):
+            buf = io.BytesIO()
+            data(buf)
+            data = buf.getvalue()
+        written[name] = data
+
+    assert list(written) == ["a.scl", "b.csv", MANIFEST_NAME]
+    assert written["a.scl"] == b"DATA_BLOCK"
+    assert parse_manifest(written[MANIFEST_NAME].decode("utf-8")) == {
+        "a.scl": hashlib.sha256(b"DATA_BLOCK").hexdigest(),
+        "b.csv": hashlib.sha256(b"1;2").hexdigest(),
+    }
+
+
+def test_render_manifest_sha256sum_format():
+    text = render_manifest([("Mechs.csv", "ab" * 32)])
+    assert text == "ab" * 32 + "  Mechs.csv\n"
+    assert parse_manifest(text + "\n") == {"Mechs.csv": "ab" * 32}
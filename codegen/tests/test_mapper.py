@@ -1,7 +1,7 @@
 """Unit-тести для generator/mapper.py."""
 import pytest
 
-from generator.mapper import map_devices
+from generator.mapper import format_ranges, map_devices
 from generator.parser import RawDevice
 
 
@@ -13,7 +13,7 @@ def _dev(id_: int, name: str, type_key: str) -> RawDevice:
 def test_empty():
     r = map_devices([])
     assert r.mechs_count == 0
-    assert r.devices == []
+    assert r.devices == ()
     assert r.gap_slots == []
 
 
@@ -43,6 +43,26 @@ def test_gap_slots():
     devs = [_dev(1, "Noria", "noria"), _dev(5, "Fan", "fan")]
     r = map_devices(devs)
     assert set(r.gap_slots) == {0, 2, 3, 4}
+    assert r.gap_ranges == ((0, 0), (2, 4))
+    assert r.gap_count == 4
+
+
+def test_gap_ranges_sparse_ids():
+    devs = [_dev(3, "Noria", "noria"), _dev(1_000_000, "Fan", "fan"), _dev(4, "Redler", "redler")]
+    r = map_devices(devs)
+    assert r.gap_ranges == ((0, 2), (5, 999_999))
+    assert r.gap_count == 999_998
+
+
+def test_gap_ranges_none():
+    r = map_devices([_dev(0, "Noria", "noria"), _dev(1, "Fan", "fan")])
+    assert r.gap_ranges == ()
+    assert r.gap_slots == []
+
+
+def test_format_ranges():
+    assert format_ranges([(0, 0), (2, 4)]) == "0, 2..4"
+    assert format_ranges([]) == ""
 
 
 # ── Константи ─────────────────────────────────────────────────────────────────
@@ -82,6 +102,22 @@ def test_has_simulator_noria():
     assert r.devices[0].has_simulator is True
 
 
+# ── Порядок і незмінність ────────────────────────────────────────────────────
+def test_devices_and_groups_sorted_by_id():
+    devs = [_dev(9, "F", "fan"), _dev(2, "N2", "noria"), _dev(7, "N7", "noria"), _dev(1, "F1", "fan")]
+    r = map_devices(devs)
+    assert [d.id for d in r.devices] == [1, 2, 7, 9]
+    assert [d.id for d in r.by_type["fan"]] == [1, 9]
+    assert [d.typed_index for d in r.by_type["noria"]] == [0, 1]
+
+
+def test_mapped_device_frozen():
+    r = map_devices([_dev(1, "Noria", "noria")])
+    with pytest.raises(AttributeError):
+        r.devices[0].typed_index = 5
+    assert not hasattr(r.devices[0], "__dict__")
+
+
 # ── by_type grouping ─────────────────────────────────────────────────────────
 def test_by_type_grouping():
     devs = [
@@ -0,0 +1,79 @@
+"""Unit-тести для generator/metrics.py."""
+import time
+
+import pytest
+
+from generator.metrics import Registry, Timings, span
+
+
+# ── Timings ──────────────────────────────────────────────────────────────────
+def test_timings_accumulates_repeated_stage():
+    t = Timings()
+    t.add("zip", 0.010)
+    t.add("zip", 0.005)
+    with t.span("map"):
+        time.sleep(0.001)
+    spans = dict(t.items())
+    assert spans["zip"] == pytest.approx(0.015)
+    assert spans["map"] > 0
+
+
+def test_server_timing_header():
+    t = Timings(started=time.perf_counter())
+    t.add("parse", 0.0123)
+    header = t.server_timing()
+    assert header.startswith("parse;dur=12.3, total;dur=")
+    assert t.server_timing(total=False) == "parse;dur=12.3"
+
+
+def test_span_without_timings():
+    with span(None, "parse"):
+        pass
+
+
+# ── Histogram / Counter ──────────────────────────────────────────────────────
+def test_histogram_render_cumulative():
+    reg = Registry()
+    h = reg.histogram("t_seconds", "Тест", ["stage"], buckets=[0.1, 1])
+    h.observe(0.05, "parse")
+    h.observe(0.5, "parse")
+    h.observe(5, "parse")
+    text = reg.render()
+    assert '# TYPE t_seconds histogram' in text
+    assert 't_seconds_bucket{stage="parse",le="0.1"} 1' in text
+    assert 't_seconds_bucket{stage="parse",le="1"} 2' in text
+    assert 't_seconds_bucket{stage="parse",le="+Inf"} 3' in text
+    assert 't_seconds_count{stage="parse"} 3' in text
+    assert h.count("parse") == 3
+
+
+def test_histogram_bound_inclusive():
+    reg = Registry()
+    h = reg.histogram("b", "Тест", buckets=[10])
+    h.observe(10)
+    assert 'b_bucket{le="10"} 1' in reg.render()
+
+
+def test_counter_labels_and_escaping():
+    reg = Registry()
+    c = reg.counter("errors_total", "Помилки", ["kind"])
+    c.inc("validation")
+    c.inc("validation")
+    c.inc('a"b')
+    text = reg.render()
+    assert 'errors_total{kind="validation"} 2' in text
+    assert 'errors_total{kind="a\\"b"} 1' in text
+
+
+def test_label_count_mismatch():
+    reg = Registry()
+    c = reg.counter("x_total", "x", ["kind"])
+    with pytest.raises(ValueError):
+        c.inc()
+
+
+def test_duplicate_metric_name():
+    reg = Registry()
+    reg.counter("x_total", "x")
+    with pytest.raises(ValueError):
+        reg.histogram("x_total", "x")
@@ -4,7 +4,7 @@ import pathlib
 
 import pytest
 
-from generator.parser import ParseResult, parse_graph
+from generator.parser import ErrorSummary, ParseResult, parse_graph
 
 FIXTURES = pathlib.Path(__file__).parent / "fixtures"
 
@@ -132,3 +132,43 @@ def test_numeric_id_as_int():
     result = parse_graph(data)
     assert result.errors == []
     assert result.devices[0].id == 1
+
+
+# ── Агрегація помилок (POST /validate) ──────────────────────────────────────
+def _bad_graph():
+    devices = [{"name": f"N{i}", "id": f"{i}a", "type": "noria"} for i in range(50)]
+    devices += [
+        {"name": "Dup", "id": "1", "type": "noria"},
+        {"name": "Dup2", "id": "1", "type": "noria"},
+        {"name": "X", "id": "2", "type": "conveyor"},
+        {"name": "S", "id": "3", "type": "Silo"},
+    ]
+    return _graph(devices)
+
+
+def test_error_summary_groups_by_kind():
+    summary = ErrorSummary(sample_size=2)
+    result = parse_graph(_bad_graph(), summary)
+    assert result.errors == []                    # повідомлення — лише в summary
+    assert len(result.devices) == 1 and len(result.warnings) == 1
+    assert (summary.total, summary.checked, summary.aborted) == (52, 54, False)
+    kinds = summary.to_list()
+    assert [(k["kind"], k["count"]) for k in kinds] == [
+        ("invalid_id", 50), ("duplicate_id", 1), ("unsupported_type", 1),
+    ]
+    assert [s["id"] for s in kinds[0]["sample"]] == ["0a", "1a"]
+    assert kinds[1]["sample"][0]["name"] == "Dup2"
+
+
+def test_error_summary_fail_fast():
+    summary = ErrorSummary(max_errors=3)
+    parse_graph(_bad_graph(), summary)
+    assert (summary.total, summary.checked, summary.aborted) == (3, 3, True)
+
+
+def test_error_summary_matches_errors():
+    plain = parse_graph(_bad_graph())
+    summary = ErrorSummary(sample_size=100)
+    parse_graph(_bad_graph(), summary)
+    messages = [s["message"] for k in summary.to_list() for s in k["sample"]]
+    assert sorted(messages) == sorted(plain.errors)
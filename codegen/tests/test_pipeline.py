@@ -0,0 +1,165 @@
+"""Unit-тести для generator/pipeline.py."""
+import hashlib
+import io
+import json
+import pathlib
+import zipfile
+
+import pytest
+
+from generator.manifest import MANIFEST_NAME, parse_manifest
+from generator.mapper import map_devices
+from generator.pipeline import (
+    SOURCE_DATE_EPOCH_ENV,
+    ZIP_EPOCH,
+    GraphError,
+    GraphValidationError,
+    OptionsError,
+    build_ctx,
+    default_options,
+    emit_members,
+    iter_archive,
+    load_graph,
+    output_filename,
+    output_options,
+    reproducible_time,
+    run_project,
+    zip_filename,
+)
+
+FIXTURES = pathlib.Path(__file__).parent / "fixtures"
+
+
+# ── load_graph: формат і обов'язкові поля ────────────────────────────────────
+def test_load_graph_invalid_json():
+    with pytest.raises(GraphError) as exc:
+        load_graph((FIXTURES / "graph_invalid.json").read_bytes())
+    assert not isinstance(exc.value, GraphValidationError)
+
+
+def test_load_graph_missing_fields():
+    with pytest.raises(GraphError) as exc:
+        load_graph(b"{}")
+    assert len(exc.value.errors) == 2
+
+
+def test_load_graph_validation_error():
+    data = {"deviceTypes": [], "devices": [{"name": "X", "id": "-1", "type": "noria"}]}
+    with pytest.raises(GraphValidationError):
+        load_graph(json.dumps(data).encode())
+
+
+# ── run_project: повний конвеєр ──────────────────────────────────────────────
+def test_run_project_ok():
+    out = run_project((FIXTURES / "graph_full.json").read_bytes(), "graph.json", "P", "1.0.0")
+    assert out.ok
+    assert out.constants["MECHS_COUNT"] == 5
+    names = zipfile.ZipFile(io.BytesIO(out.archive)).namelist()
+    assert "DB_Mechs.scl" in names and "generation_report.txt" in names
+
+
+# ── run_project: помилка повертається, а не кидається ────────────────────────
+def test_run_project_error_does_not_raise():
+    out = run_project(b"not json", "bad.json", "bad", "1.0.0")
+    assert not out.ok
+    assert out.archive == b""
+    assert out.report()["errors"] == ["Невалідний JSON у завантаженому файлі."]
+
+
+# ── Вибір файлів і режим архіву ──────────────────────────────────────────────
+def test_output_options_default():
+    options = output_options()
+    assert options == default_options()
+    assert options.report and options.archive == "deflate"
+    assert options.cache_params() == {}
+
+
+def test_output_options_subset_by_name_or_stage():
+    options = output_options("report, mechs_csv,DB_MECHS.SCL", "Fast")
+    # Порядок архіву, а не порядок у запиті; звіт — останнім
+    assert options.names == ("DB_Mechs.scl", "Mechs.csv", "generation_report.txt")
+    assert options.registry.names() == ["DB_Mechs.scl", "Mechs.csv"]
+    assert options.cache_params() == {"outputs": list(options.names), "archive": "fast"}
+
+
+@pytest.mark.parametrize("outputs, archive", [
+    ("Nope.scl", None),
+    (None, "zstd"),
+    (None, "raw"),                     # raw — лише один файл
+    ("Mechs.csv,DB_Mechs.scl", "raw"),
+])
+def test_output_options_errors(outputs, archive):
+    with pytest.raises(OptionsError):
+        output_options(outputs, archive)
+
+
+def _members(options, ctx=None):
+    parse_result = load_graph((FIXTURES / "graph_full.json").read_bytes())
+    ctx = ctx or build_ctx("P", "1.0.0", "graph.json")
+    return emit_members(map_devices(parse_result.devices), ctx, parse_result.warnings,
+                        registry=options.registry, report=options.report)
+
+
+def test_iter_archive_subset_only_renders_selected():
+    options = output_options("Mechs.csv", "max")
+    zf = zipfile.ZipFile(io.BytesIO(b"".join(iter_archive(_members(options), options))))
+    assert zf.namelist() == ["Mechs.csv"]
+    assert zf.getinfo("Mechs.csv").compress_type == zipfile.ZIP_DEFLATED
+
+
+def test_iter_archive_stored():
+    options = output_options(archive="stored")
+    zf = zipfile.ZipFile(io.BytesIO(b"".join(iter_archive(_members(options), options))))
+    assert all(info.compress_type == zipfile.ZIP_STORED for info in zf.infolist())
+    assert "  Mechs.csv        OK" in zf.read("generation_report.txt").decode("utf-8")
+
+
+def test_iter_archive_raw():
+    options = output_options("mechs_csv", "raw")
+    data = b"".join(iter_archive(_members(options), options))
+    assert data.startswith(b"\xef\xbb\xbf") and b"NORIAS_COUNT" in data
+    assert output_filename({}, options) == "Mechs.csv"
+
+
+# ── Відтворюваний режим ─────────────────────────────────────────────────────
+def test_reproducible_time(monkeypatch):
+    monkeypatch.delenv(SOURCE_DATE_EPOCH_ENV, raising=False)
+    assert reproducible_time() == ZIP_EPOCH
+    monkeypatch.setenv(SOURCE_DATE_EPOCH_ENV, "1700000000")
+    assert reproducible_time().strftime("%Y-%m-%d %H:%M:%S") == "2023-11-14 22:13:20"
+    monkeypatch.setenv(SOURCE_DATE_EPOCH_ENV, "0")       # раніше за ZIP — 1980-01-01
+    assert reproducible_time() == ZIP_EPOCH
+    monkeypatch.setenv(SOURCE_DATE_EPOCH_ENV, "yesterday")
+    with pytest.raises(ValueError):
+        reproducible_time()
+
+
+def test_output_options_reproducible_cache_params():
+    assert output_options(reproducible=True).cache_params() == {"reproducible": True}
+    assert output_options("Mechs.csv", reproducible=True).cache_params()["outputs"] == ["Mechs.csv"]
+
+
+def test_iter_archive_reproducible_byte_identical(monkeypatch):
+    monkeypatch.setenv(SOURCE_DATE_EPOCH_ENV, "1700000000")
+    options = output_options(reproducible=True)
+
+    def archive():
+        ctx = build_ctx("P", "1.0.0", "graph.json", reproducible_time())
+        return b"".join(iter_archive(_members(options, ctx), options, generated=ctx["generated"]))
+
+    first = archive()
+    assert archive() == first
+    zf = zipfile.ZipFile(io.BytesIO(first))
+    assert zf.namelist() == [*options.names, MANIFEST_NAME]
+    assert {info.date_time for info in zf.infolist()} == {(2023, 11, 14, 22, 13, 20)}
+    assert "// Generated: 2023-11-14 22:13:20" in zf.read("DB_Mechs.scl").decode("utf-8-sig")
+    manifest = parse_manifest(zf.read(MANIFEST_NAME).decode("utf-8"))
+    assert list(manifest) == list(options.names)
+    assert manifest["Mechs.csv"] == hashlib.sha256(zf.read("Mechs.csv")).hexdigest()
+    assert zip_filename(build_ctx("P", "1", "g", reproducible_time())) == "scl_P_20231114_221320.zip"
+
+
+def test_iter_archive_default_has_no_manifest():
+    options = output_options()
+    zf = zipfile.ZipFile(io.BytesIO(b"".join(iter_archive(_members(options), options))))
+    assert MANIFEST_NAME not in zf.namelist()
@@ -0,0 +1,116 @@
+"""Unit-тести для generator/registry.py та паралельного рендерингу."""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from generator.incremental import IncrementalGenerator
+from generator.mapper import map_devices
+from generator.metrics import Timings
+from generator.parser import RawDevice
+from generator.pipeline import REPORT_NAME, build_report_text, emit_members, render_members
+from generator.registry import REGISTRY, GeneratorRegistry, OutputSpec
+
+CTX = {"project_name": "P", "version": "1.0.0", "timestamp": "T", "source": "graph.json"}
+
+
+def _result(*types):
+    return map_devices([
+        RawDevice(id=i, name=f"D{i}", type_key=t, raw_type=t.capitalize())
+        for i, t in enumerate(types, start=1)
+    ])
+
+
+def _iter_tags(result, ctx):
+    for dev in result.devices:
+        yield f"{dev.name};{dev.id}\n"
+
+
+def _custom_registry() -> GeneratorRegistry:
+    registry = GeneratorRegistry()
+    for spec in REGISTRY:
+        registry.register(spec)
+    registry.register(OutputSpec("HMI_Tags.csv", "hmi_tags", _iter_tags, bom=False))
+    return registry
+
+
+# ── Реєстр ───────────────────────────────────────────────────────────────────
+def test_default_registry_order():
+    assert REGISTRY.names() == ["DB_Mechs.scl", "DB_SimConfig.scl", "DB_SimMechs.scl", "Mechs.csv"]
+
+
+def test_register_duplicate_name_or_stage():
+    registry = GeneratorRegistry()
+    registry.register(OutputSpec("a.txt", "a", _iter_tags))
+    with pytest.raises(ValueError):
+        registry.register(OutputSpec("a.txt", "b", _iter_tags))
+    with pytest.raises(ValueError):
+        registry.register(OutputSpec("b.txt", "a", _iter_tags))
+
+
+def test_unknown_dependency():
+    with pytest.raises(ValueError):
+        OutputSpec("a.txt", "a", _iter_tags, depends=("nodes",))
+
+
+# ── Новий вихід без змін у конвеєрі ─────────────────────────────────────────
+def test_custom_output_in_archive_and_report():
+    result = _result("noria", "fan")
+    members = dict(render_members(result, CTX, [], registry=_custom_registry()))
+    assert list(members)[-2:] == ["HMI_Tags.csv", REPORT_NAME]
+    assert members["HMI_Tags.csv"] == b"D1;1\nD2;2\n"
+    assert "  HMI_Tags.csv     OK" in members[REPORT_NAME].decode("utf-8")
+
+
+def test_report_files_from_registry():
+    text = build_report_text(CTX, _result("noria"), [], ["DB_Mechs.scl", "HMI_Tags.csv"])
+    assert text.endswith("Files:\n  DB_Mechs.scl OK\n  HMI_Tags.csv OK\n")
+    assert "  DB_SimConfig.scl OK\n  DB_SimMechs.scl  OK\n" in build_report_text(CTX, _result("noria"), [])
+
+
+# ── Паралельний рендеринг ───────────────────────────────────────────────────
+def test_parallel_matches_sequential():
+    result = _result("noria", "redler", "gate2p", "fan", "noria")
+    timings = Timings()
+    with ThreadPoolExecutor(4) as pool:
+        parallel = list(render_members(result, CTX, ["w"], timings=timings, pool=pool))
+    assert parallel == list(render_members(result, CTX, ["w"]))
+    assert {"db_mechs", "db_sim_config", "mechs_csv", "report"} <= dict(timings.items()).keys()
+
+
+def test_parallel_render_timings_on_consumer_thread():
+    """Timings не потокобезпечний: тривалості паралельних рендерів записує споживач."""
+    threads = set()
+
+    class _Recording(Timings):
+        def add(self, name, seconds):
+            threads.add(threading.get_ident())
+            super().add(name, seconds)
+
+    timings = _Recording()
+    with ThreadPoolExecutor(4) as pool:
+        list(render_members(_result("noria", "fan"), CTX, [], timings=timings, pool=pool))
+    assert threads == {threading.get_ident()}
+    assert "db_mechs" in dict(timings.items())
+
+
+def test_parallel_render_error_propagates():
+    def broken(result, ctx):
+        raise RuntimeError("boom")
+        yield  # pragma: no cover
+
+    registry = GeneratorRegistry()
+    registry.register(OutputSpec("bad.txt", "bad", broken))
+    with ThreadPoolExecutor(2) as pool, pytest.raises(RuntimeError):
+        list(emit_members(_result("fan"), CTX, [], pool=pool, registry=registry))
+
+
+# ── Інкрементальний режим бере файли з реєстру ──────────────────────────────
+def test_incremental_custom_output():
+    gen = IncrementalGenerator(_custom_registry())
+    first = gen.generate(_result("noria", "fan"), CTX)
+    assert first.files["HMI_Tags.csv"] == "D1;1\nD2;2\n"
+    again = gen.generate(_result("noria", "fan"), CTX)
+    assert again.changed["HMI_Tags.csv"] is False
+    renamed = gen.generate(map_devices([RawDevice(id=1, name="X", type_key="noria", raw_type="Noria")]), CTX)
+    assert renamed.changed["HMI_Tags.csv"] is True
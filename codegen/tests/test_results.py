@@ -0,0 +1,98 @@
+"""Unit-тести для generator/results.py."""
+from generator.mapper import map_devices
+from generator.parser import RawDevice
+from generator.results import ResultStore, StoredResult, device_row
+
+
+def _devices():
+    return [
+        RawDevice(1, "N1", "noria", "Noria"),
+        RawDevice(2, "S1", "separator", "Separator"),
+        RawDevice(3, "N2", "noria", "Noria"),
+        RawDevice(5, "S2", "separator", "Separator"),
+    ]
+
+
+WARNINGS = ['Пристрій "Silo" (id=4): тип "Silo" є не-механізмом → пропущено.']
+
+
+# ── Сторінки й фільтри ───────────────────────────────────────────────────────
+def test_page_all():
+    stored = StoredResult(_devices(), WARNINGS)
+    total, rows = stored.page(0, 10)
+    assert total == 5
+    assert [r.get("id") for r in rows] == [1, 2, 3, 5, None]
+    assert rows[-1] == {"status": "warn", "message": WARNINGS[0]}
+    assert rows[1] == device_row(map_devices(_devices()).devices[1])
+
+
+def test_page_offset_limit():
+    stored = StoredResult(_devices(), WARNINGS)
+    assert stored.page(1, 2)[1] == [device_row(d) for d in map_devices(_devices()).devices[1:3]]
+    assert stored.page(10, 5) == (5, [])
+
+
+def test_page_filters():
+    stored = StoredResult(_devices(), WARNINGS)
+    assert [r["id"] for r in stored.page(0, 10, status="skip")[1]] == [2, 5]
+    assert [r["id"] for r in stored.page(0, 10, status="ok", type_key="noria")[1]] == [1, 3]
+    assert stored.page(0, 10, status="ok", type_key="separator") == (0, [])
+    assert stored.page(0, 10, status="warn")[0] == 1
+    assert stored.page(0, 10, type_key="noria")[0] == 2     # попередження не мають типу
+
+
+def test_page_query_and_types():
+    stored = StoredResult(_devices(), WARNINGS)
+    assert [r["id"] for r in stored.page(0, 10, query="n2")[1]] == [3]
+    assert [r["id"] for r in stored.page(0, 10, query="separator")[1]] == [2, 5]
+    assert stored.page(0, 10, query="не-механізм") == (1, [{"status": "warn", "message": WARNINGS[0]}])
+    assert stored.page(0, 10, status="ok", query="s") == (0, [])
+    assert stored.types == ["noria", "separator"]
+
+
+def test_lazy_mapping():
+    stored = StoredResult(_devices(), [])
+    assert "map_result" not in stored.__dict__
+    stored.page(0, 1)
+    assert stored.map_result == map_devices(_devices())
+
+    mapped = map_devices(_devices())
+    assert StoredResult([], [], mapped).map_result is mapped
+
+
+# ── Сховище: TTL і кількість ─────────────────────────────────────────────────
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_store_ttl_and_refresh():
+    clock = _Clock()
+    store = ResultStore(ttl=10, max_entries=4, clock=clock)
+    first = StoredResult(_devices(), [])
+    assert store.put("a", lambda: first)
+    clock.now = 8
+    assert store.put("a", lambda: StoredResult([], []))   # наявний запис: термін подовжено
+    assert store.get("a") is first
+    clock.now = 17
+    assert store.get("a") is first
+    clock.now = 18
+    assert store.get("a") is None
+    assert len(store) == 0
+
+
+def test_store_max_entries():
+    store = ResultStore(ttl=10, max_entries=2)
+    for key in "abc":
+        store.put(key, lambda: StoredResult([], []))
+    assert store.get("a") is None
+    assert store.get("b") is not None and store.get("c") is not None
+
+
+def test_store_disabled():
+    store = ResultStore(ttl=10, max_entries=0)
+    assert not store.put("a", lambda: StoredResult([], []))
+    assert store.get("a") is None
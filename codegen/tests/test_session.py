@@ -0,0 +1,144 @@
+"""Unit-тести для generator/session.py."""
+import json
+import random
+
+import pytest
+
+from generator.mapper import map_devices
+from generator.pipeline import build_ctx, load_graph
+from generator.results import device_row
+from generator.session import MappingSession, SessionError
+
+TYPES = ["noria", "redler", "gate2P", "fan", "silo"]
+
+
+def _graph(devices):
+    return json.dumps({
+        "deviceTypes": [],
+        "devices": [{"id": str(i), "name": f"D{i}", "type": t} for i, t in devices],
+    })
+
+
+def _session(devices):
+    session = MappingSession(build_ctx("P", "1.0.0", "session"))
+    snapshot = session.load(_graph(devices))
+    return session, snapshot
+
+
+def _rows(session):
+    return [device_row(d) for d in session.map_result().devices]
+
+
+# ── Початковий граф ──────────────────────────────────────────────────────────
+def test_snapshot_matches_full_mapping():
+    devices = [(1, "noria"), (2, "silo"), (4, "redler"), (7, "noria")]
+    session, snapshot = _session(devices)
+    expected = map_devices(load_graph(_graph(devices).encode()).devices)
+    assert snapshot["devices"] == [device_row(d) for d in expected.devices]
+    assert snapshot["constants"] == expected.counts
+    assert snapshot["gap_ranges"] == [[0, 0], [2, 3], [5, 6]]
+    assert snapshot["gap_count"] == expected.gap_count == 5
+    assert snapshot["warnings"] == ['Пристрій "D2" (id=2): тип "silo" є не-механізмом → пропущено.']
+
+
+# ── Дельти ───────────────────────────────────────────────────────────────────
+def test_add_shifts_only_same_type():
+    session, _ = _session([(1, "noria"), (3, "redler"), (5, "noria")])
+    delta = session.apply({"op": "add", "device": {"id": 2, "name": "N", "type": "noria"}})
+    assert [(r["id"], r["typed_index"]) for r in delta["rows"]] == [(2, 1), (5, 2)]
+    assert delta["constants"] == {"NORIAS_COUNT": 2}
+    assert delta["gaps"] == {"added": [], "removed": [[2, 2]]}
+    assert delta["gap_count"] == 2
+
+
+def test_remove_and_retype():
+    session, _ = _session([(1, "noria"), (2, "noria"), (3, "noria"), (6, "fan")])
+    delta = session.apply({"op": "remove", "id": 6})
+    assert delta["removed"] == [6] and delta["rows"] == []
+    assert delta["constants"] == {"MECHS_COUNT": 3}           # FANS_COUNT: 0 і для одного, і для жодного
+    assert delta["gaps"] == {"added": [], "removed": [[4, 5]]}
+
+    delta = session.apply({"op": "retype", "id": 1, "type": "fan"})
+    assert [(r["id"], r["tia_type"], r["typed_index"]) for r in delta["rows"]] == \
+        [(1, "TYPE_FAN", 0), (2, "TYPE_NORIA", 0), (3, "TYPE_NORIA", 1)]
+    assert delta["removed"] == []
+
+
+def test_rename_and_non_mechanisms():
+    session, _ = _session([(1, "noria"), (2, "silo")])
+    delta = session.apply({"op": "rename", "id": 1, "name": "Норія"})
+    assert [r["display_name"] for r in delta["rows"]] == ["Норія"] and "warnings" not in delta
+
+    delta = session.apply({"op": "retype", "id": 1, "type": "silo"})
+    assert delta["removed"] == [1] and delta["gaps"]["added"] == [] and len(delta["warnings"]) == 2
+    delta = session.apply({"op": "retype", "id": 2, "type": "redler"})
+    assert [(r["id"], r["display_name"]) for r in delta["rows"]] == [(2, "D2")]
+    assert delta["gaps"] == {"added": [[0, 1]], "removed": []}
+
+
+@pytest.mark.parametrize("message", [
+    {"op": "add", "device": {"id": 1, "name": "X", "type": "fan"}},      # id зайнятий
+    {"op": "add", "device": {"id": 9, "name": "X", "type": "laser"}},
+    {"op": "remove", "id": 42},
+    {"op": "retype", "id": 1, "type": None},
+    {"op": "rename", "id": "x", "name": "X"},
+    {"op": "explode"},
+])
+def test_errors_leave_state(message):
+    session, snapshot = _session([(1, "noria"), (2, "fan")])
+    with pytest.raises(SessionError):
+        session.apply(message)
+    assert _rows(session) == snapshot["devices"]
+
+
+def test_handle_protocol():
+    session = MappingSession(build_ctx("P", "1.0.0", "session"))
+    assert session.handle("{")["op"] == "error" and not session.loaded
+    assert session.handle(_graph([(1, "noria")]))["op"] == "snapshot"
+    assert session.handle(json.dumps({"op": "remove", "id": 5, "seq": 7})) == \
+        {"op": "error", "errors": ["remove: пристрій з id=5 відсутній."], "seq": 7}
+    assert session.handle(json.dumps({"op": "remove", "id": 1, "seq": 8}))["seq"] == 8
+
+
+# ── Узгодженість із повним маппінгом ─────────────────────────────────────────
+def test_random_edits_match_full_mapping():
+    rng = random.Random(7)
+    devices = {i: rng.choice(TYPES) for i in rng.sample(range(200), 120)}
+    session, _ = _session(sorted(devices.items()))
+    rows = {r["id"]: r for r in _rows(session)}
+    gaps = set(session.gap_ranges)
+    for _ in range(300):
+        dev_id = rng.randrange(220)
+        if dev_id not in devices:
+            devices[dev_id] = rng.choice(TYPES)
+            message = {"op": "add", "device": {"id": dev_id, "name": f"D{dev_id}", "type": devices[dev_id]}}
+        elif rng.random() < 0.4:
+            del devices[dev_id]
+            message = {"op": "remove", "id": dev_id}
+        else:
+            devices[dev_id] = rng.choice(TYPES)
+            message = {"op": "retype", "id": dev_id, "type": devices[dev_id]}
+        delta = session.apply(message)
+        for dev_id in delta["removed"]:
+            del rows[dev_id]
+        rows.update((r["id"], r) for r in delta["rows"])
+        gaps.difference_update(tuple(g) for g in delta["gaps"]["removed"])
+        gaps.update(tuple(g) for g in delta["gaps"]["added"])
+
+        expected = map_devices(load_graph(_graph(sorted(devices.items())).encode()).devices)
+        assert [rows[i] for i in sorted(rows)] == [device_row(d) for d in expected.devices]
+        assert session.counts() == expected.counts
+        assert sorted(gaps) == list(session.gap_ranges) == list(expected.gap_ranges)
+        assert session.gap_count == expected.gap_count
+        assert session.map_result() == expected
+
+
+def test_render_reuses_sections():
+    session, _ = _session([(1, "noria"), (2, "fan"), (3, "redler")])
+    first = session.render()
+    assert set(first["files"].values()) == {"changed"}
+    session.apply({"op": "rename", "id": 2, "name": "Вентилятор"})
+    second = session.render(text=True)
+    assert second["rendered_sections"] == 2                # секція fan у DB_Mechs і DB_SimConfig
+    assert second["files"]["Mechs.csv"] == "unchanged"
+    assert "Вентилятор" in second["texts"]["DB_Mechs.scl"]
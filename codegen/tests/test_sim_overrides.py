@@ -0,0 +1,153 @@
+"""Перевизначення DB_SimConfig для окремих пристроїв (simConfig / side-car файл)."""
+import io
+import json
+import pathlib
+import shutil
+
+import pytest
+
+from generator.cache import cache_key
+from generator.cli import EXIT_OK, EXIT_VALIDATION, generate_file
+from generator.generators.db_sim_config import generate_db_sim_config
+from generator.incremental import IncrementalGenerator
+from generator.mapper import map_devices
+from generator.parser import ParseResult, RawDevice, apply_sim_overrides, parse_graph, sim_literal
+from generator.pipeline import GraphError, GraphValidationError, load_graph, load_graph_stream, load_sim_overrides
+
+FIXTURES = pathlib.Path(__file__).parent / "fixtures"
+
+CTX = {"project_name": "P", "version": "1.0.0", "timestamp": "T", "source": "graph.json"}
+
+
+def _graph(*devices):
+    return {"deviceTypes": [], "devices": list(devices)}
+
+
+def _parse(*devices) -> ParseResult:
+    return parse_graph(_graph(*devices))
+
+
+# ── Розбір simConfig ─────────────────────────────────────────────────────────
+def test_parse_keeps_only_non_default_fields_in_udt_order():
+    result = _parse({"id": 1, "name": "N", "type": "noria",
+                     "simConfig": {"ManualReset": True, "Enable": True, "StartupTime_ms": 6000}})
+    assert result.errors == []
+    # Enable = TRUE збігається зі значенням за замовчуванням — не зберігається
+    assert result.devices[0].sim_config == (("StartupTime_ms", "6000"), ("ManualReset", "TRUE"))
+
+
+def test_parse_without_overrides():
+    result = _parse({"id": 1, "name": "N", "type": "noria"})
+    assert result.devices[0].sim_config == ()
+
+
+@pytest.mark.parametrize("sim, fragment", [
+    ({"Speed": 1}, 'невідоме поле симулятора "Speed"'),
+    ({"Enable": 1}, "некоректне значення Enable"),
+    ({"StartupTime_ms": "5s"}, "некоректне значення StartupTime_ms"),
+    ({"StartupTime_ms": True}, "некоректне значення StartupTime_ms"),
+    ([1, 2], "повинно бути об'єктом"),
+])
+def test_parse_invalid(sim, fragment):
+    result = _parse({"id": 1, "name": "N", "type": "noria", "simConfig": sim})
+    assert result.devices == []
+    assert any(fragment in e for e in result.errors), result.errors
+
+
+def test_parse_type_without_simulator():
+    result = _parse({"id": 1, "name": "S", "type": "separator", "simConfig": {"Enable": True}})
+    assert any("не має симулятора" in e for e in result.errors)
+
+
+@pytest.mark.parametrize("default, value, expected", [
+    ("FALSE", True, "TRUE"),
+    ("FALSE", "true", "TRUE"),
+    ("3000", 5000, "5000"),
+    ("3000", "-7", "-7"),
+    ("3000", 1.5, None),
+    ("T#5S", "T#10S", "T#10S"),
+    ("1.0", 2.5, "2.5"),
+    ("T#5S", "1; Mechs[0].Enable := FALSE", None),   # без ін'єкції в SCL
+])
+def test_sim_literal(default, value, expected):
+    assert sim_literal(default, value) == expected
+
+
+# ── Рендеринг ────────────────────────────────────────────────────────────────
+def test_render_overrides_only_overridden_lines():
+    devices = [
+        RawDevice(1, "N1", "noria", "Noria"),
+        RawDevice(2, "N2", "noria", "Noria", sim_config=(("StartupTime_ms", "6000"),)),
+        RawDevice(3, "N3", "noria", "Noria"),
+    ]
+    base = generate_db_sim_config(map_devices([RawDevice(d.id, d.name, d.type_key, d.raw_type) for d in devices]), CTX)
+    text = generate_db_sim_config(map_devices(devices), CTX)
+    diff = [(a, b) for a, b in zip(base.splitlines(), text.splitlines()) if a != b]
+    assert diff == [("    Noria[1].StartupTime_ms := 4000;", "    Noria[1].StartupTime_ms := 6000;")]
+
+
+def test_same_overrides_share_one_block():
+    sim = (("Enable", "FALSE"),)
+    devices = [RawDevice(i, f"F{i}", "fan", "Fan", sim_config=sim) for i in range(3)]
+    text = generate_db_sim_config(map_devices(devices), CTX)
+    assert [f"    Fan[{i}].Enable := FALSE;" in text for i in range(3)] == [True] * 3
+    assert "Enable := TRUE" not in text
+
+
+# ── Потоковий розбір і кеш ───────────────────────────────────────────────────
+def test_stream_reads_sim_config():
+    raw = json.dumps(_graph(
+        {"id": 1, "name": "N", "type": "noria", "ports": [], "simConfig": {"StopTime_ms": 100}},
+    )).encode()
+    assert load_graph_stream(io.BytesIO(raw)).devices == load_graph(raw).devices
+
+
+def test_cache_key():
+    plain = [RawDevice(1, "N", "noria", "Noria")]
+    overridden = [RawDevice(1, "N", "noria", "Noria", sim_config=(("StopTime_ms", "100"),))]
+    params = {"project_name": "P"}
+    assert cache_key(plain, [], params) != cache_key(overridden, [], params)
+
+
+# ── Інкрементальна регенерація ───────────────────────────────────────────────
+def test_incremental_override_touches_only_sim_config():
+    base = [RawDevice(1, "N1", "noria", "Noria"), RawDevice(2, "F1", "fan", "Fan")]
+    gen = IncrementalGenerator()
+    gen.generate(map_devices(base), CTX)
+    changed = [base[0], RawDevice(2, "F1", "fan", "Fan", sim_config=(("Enable", "FALSE"),))]
+    r = map_devices(changed)
+    inc = gen.generate(r, CTX)
+    assert inc.rendered_sections == 1
+    assert inc.files["DB_SimConfig.scl"] == generate_db_sim_config(r, CTX)
+    assert {name for name, flag in inc.changed.items() if flag} == {"DB_SimConfig.scl"}
+
+
+# ── Side-car файл ────────────────────────────────────────────────────────────
+def test_side_car_overrides_graph_values():
+    result = _parse({"id": 1, "name": "N", "type": "noria", "simConfig": {"StopTime_ms": 100, "ManualReset": True}})
+    apply_sim_overrides(result, {"1": {"StopTime_ms": 3000}, "9": {"Enable": False}})
+    assert result.errors == []
+    # StopTime_ms повернуто до значення за замовчуванням
+    assert result.devices[0].sim_config == (("ManualReset", "TRUE"),)
+    assert any("id=9" in w for w in result.warnings)
+
+
+def test_load_sim_overrides_errors():
+    with pytest.raises(GraphError):
+        load_sim_overrides(_parse({"id": 1, "name": "N", "type": "noria"}), b"{")
+    with pytest.raises(GraphValidationError) as exc:
+        load_sim_overrides(_parse({"id": 1, "name": "N", "type": "noria"}), b'{"1": {"Speed": 1}}')
+    assert "Speed" in exc.value.errors[0]
+
+
+def test_cli_side_car(tmp_path):
+    graph = tmp_path / "graph.json"
+    shutil.copy(FIXTURES / "graph_full.json", graph)
+    overrides = tmp_path / "sim.json"
+    overrides.write_text(json.dumps({"1": {"StartupTime_ms": 7000}}))
+    out = generate_file(graph, tmp_path / "out", "P", "1.0.0", sim_overrides=overrides)
+    assert out.code == EXIT_OK
+    assert "Noria[0].StartupTime_ms := 7000;" in (tmp_path / "out" / "DB_SimConfig.scl").read_text("utf-8-sig")
+
+    overrides.write_text(json.dumps({"1": {"Enable": "maybe"}}))
+    assert generate_file(graph, tmp_path / "out2", "P", "1.0.0", sim_overrides=overrides).code == EXIT_VALIDATION
@@ -0,0 +1,158 @@
+"""Unit-тести для generator/streaming.py (потоковий розбір graph.json)."""
+import io
+import json
+import pathlib
+import random
+
+import pytest
+
+from generator.parser import ErrorSummary
+from generator.pipeline import GraphError, GraphValidationError, load_graph, load_graph_stream
+from generator.streaming import GraphScanner, NotAnObjectError, StreamingJSONError
+
+FIXTURES = pathlib.Path(__file__).parent / "fixtures"
+
+
+def _scan(raw: bytes, chunk_size: int = 7):
+    scanner = GraphScanner(io.BytesIO(raw), chunk_size=chunk_size)
+    return scanner, list(scanner.iter_devices())
+
+
+# ── Лише id/name/type; ports та інші піддерева пропускаються ────────────────
+def test_extracts_only_device_fields():
+    _, devices = _scan((FIXTURES / "graph_full.json").read_bytes())
+    assert len(devices) == 6
+    assert devices[0] == {"name": "Noria", "id": "1", "type": "noria"}
+
+
+# ── Рядки з дужками, лапками та escape-послідовностями на межах шматків ─────
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 5, 64])
+def test_tricky_strings_any_chunk_size(chunk_size):
+    raw = json.dumps({
+        "deviceTypes": [{"name": "]}{["}],
+        "devices": [
+            {"ports": [{"name": "\"]}"}], "id": 10, "name": "Н\\\"xА", "type": "noria"},
+            7,
+        ],
+        "connections": [[[]], {"a": [1.5e3, -2, True, None]}],
+    }, ensure_ascii=False).encode()
+    scanner, devices = _scan(raw, chunk_size)
+    assert devices == [{"id": 10, "name": "Н\\\"xА", "type": "noria"}, None]
+    assert scanner.keys == {"deviceTypes", "devices", "connections"}
+    assert scanner.devices_is_list is True
+
+
+# ── Числа й літерали на межах шматків ("1." / "2e-" / "tr") ─────────────────
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 5, 64])
+def test_numbers_and_literals_any_chunk_size(chunk_size):
+    device = {
+        "id": 1, "pos_x": 1.5, "pos_y": -0.25e-3, "name": "N", "type": "noria",
+        "simConfig": {"t": 2.25e-3, "big": -12E+5, "zero": 0, "on": True, "off": False, "none": None},
+    }
+    raw = json.dumps({"devices": [device, -0.25e-3, True, None, 10]}).encode()
+    for offset in range(chunk_size):    # зсуваємо межі шматків по всьому документу
+        _, devices = _scan(b" " * offset + raw, chunk_size)
+        assert devices == [{k: device[k] for k in ("id", "name", "type", "simConfig")}, None, None, None, None]
+
+
+def test_fuzz_matches_json_loads():
+    rng = random.Random(6)
+
+    def number():
+        return rng.choice([
+            round(rng.uniform(-5000, 5000), rng.randint(0, 6)),
+            rng.uniform(-1, 1) * 10 ** rng.randint(-12, 12),
+            rng.randint(-10 ** 6, 10 ** 6),
+        ])
+
+    def value(depth=0):
+        kind = rng.randrange(6 if depth < 3 else 3)
+        if kind == 0:
+            return number()
+        if kind == 1:
+            return rng.choice([True, False, None])
+        if kind == 2:
+            return rng.choice(["", "x", "]}{[", "Н\"", "a" * rng.randint(1, 40)])
+        if kind == 3:
+            return [value(depth + 1) for _ in range(rng.randint(0, 4))]
+        return {f"k{i}": value(depth + 1) for i in range(rng.randint(0, 4))}
+
+    for _ in range(30):
+        doc = {
+            "devices": [
+                {"id": number(), "pos_x": number(), "pos_y": number(), "name": value(),
+                 "type": value(), "simConfig": value(), "ports": value()}
+                for _ in range(rng.randint(0, 8))
+            ],
+            "connections": value(),
+        }
+        raw = json.dumps(doc, ensure_ascii=False, indent=rng.choice([None, 1])).encode()
+        expected = [{k: d[k] for k in ("id", "name", "type", "simConfig")}
+                    for d in json.loads(raw)["devices"]]
+        for chunk_size in (1, 2, 3, 7, 64, 4096):
+            assert _scan(raw, chunk_size)[1] == expected
+
+
+# ── Невалідний JSON ─────────────────────────────────────────────────────────
+@pytest.mark.parametrize("raw", [
+    b"{x", b'{"devices": [}', b'{"devices": [1, 2]', b'{"a": 1} extra', b'{"a": "unterminated',
+    b'{"a": [1, 2}', b"\xff",
+])
+def test_invalid_json(raw):
+    with pytest.raises(StreamingJSONError):
+        _scan(raw)
+
+
+# ── Валідний JSON, але не об'єкт ─────────────────────────────────────────────
+def test_not_an_object():
+    with pytest.raises(NotAnObjectError):
+        _scan(b"[1, 2, 3]")
+
+
+# ── load_graph_stream дає той самий результат, що й load_graph ───────────────
+@pytest.mark.parametrize("raw", [
+    (FIXTURES / "graph_full.json").read_bytes(),
+    (FIXTURES / "graph_empty.json").read_bytes(),
+    b'\xef\xbb\xbf{"devices": [], "deviceTypes": []}',
+])
+def test_stream_matches_load_graph(raw):
+    expected = load_graph(raw)
+    got = load_graph_stream(io.BytesIO(raw))
+    assert got.devices == expected.devices
+    assert got.warnings == expected.warnings
+
+
+@pytest.mark.parametrize("raw, exc_type", [
+    ((FIXTURES / "graph_invalid.json").read_bytes(), GraphError),
+    (b"{}", GraphError),
+    (b'{"devices": 5, "deviceTypes": []}', GraphValidationError),
+    (b'{"devices": [{"id": "1", "type": "Pump"}], "deviceTypes": []}', GraphValidationError),
+])
+def test_stream_errors_match_load_graph(raw, exc_type):
+    with pytest.raises(exc_type) as expected:
+        load_graph(raw)
+    with pytest.raises(exc_type) as got:
+        load_graph_stream(io.BytesIO(raw))
+    assert type(got.value) is type(expected.value)
+    assert got.value.errors == expected.value.errors
+
+
+# ── З ErrorSummary: помилки агрегуються, дострокова зупинка обриває читання ──
+@pytest.mark.parametrize("raw", [
+    b'{"devices": [{"id": "1a", "type": "noria"}, {"id": "2", "type": "Pump"}], "deviceTypes": []}',
+    b'{"devices": 5, "deviceTypes": []}',
+])
+def test_stream_summary_matches_load_graph(raw):
+    expected, got = ErrorSummary(), ErrorSummary()
+    load_graph(raw, summary=expected)
+    load_graph_stream(io.BytesIO(raw), summary=got)
+    assert got.to_list() == expected.to_list()
+
+
+def test_stream_fail_fast_stops_reading():
+    devices = ",".join(f'{{"id": "{i}a", "type": "noria"}}' for i in range(1000))
+    raw = ('{"devices": [' + devices + '], "connections": [').encode()   # обірваний файл
+    summary = ErrorSummary(max_errors=5)
+    result = load_graph_stream(io.BytesIO(raw), summary=summary)
+    assert result.devices == []
+    assert (summary.total, summary.checked, summary.aborted) == (5, 5, True)
@@ -0,0 +1,98 @@
+"""Unit-тести для generator/type_registry.py."""
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+import pytest
+
+from generator.defaults import SIM_CONFIG_DEFAULTS, TYPE_MAPPING, TYPE_ORDER
+from generator.type_registry import TYPES, TypeConfigError, builtin_types, load_types
+
+ROOT = Path(__file__).parent.parent
+
+CONVEYOR = {"tia_type": "TYPE_CONVEYOR", "array_name": "Conveyor",
+            "count_const": "CONVEYORS_COUNT", "label": "конвеєрів"}
+
+
+# ── Вбудовані типи = generator.defaults ─────────────────────────────────────
+def test_builtin_matches_defaults():
+    assert TYPES.order == TYPE_ORDER
+    assert TYPES.simulated == ["redler", "noria", "gate2p", "fan"]
+    for code, info in enumerate(TYPES.types):
+        assert info.code == code
+        assert info.tia_type == TYPE_MAPPING[info.key]["tia_type"]
+        assert info.sim_defaults == tuple(SIM_CONFIG_DEFAULTS.get(info.key, ()))
+    assert TYPES.csv_order[0] == "gate2p"
+
+
+def test_resolve_case_insensitive():
+    assert TYPES.resolve("Noria") is TYPES.by_key["noria"]
+    assert TYPES.resolve("gate2P").code == TYPES.by_key["gate2p"].code
+    assert TYPES.resolve("Silo") is None          # не-механізм
+    assert TYPES.resolve("rocket") is None
+
+
+# ── Розширення конфігурацією ────────────────────────────────────────────────
+def test_extend_new_type_derives_fields():
+    types = builtin_types().extend({"types": {"Conveyor": {**CONVEYOR, "has_simulator": True}}})
+    info = types.by_key["conveyor"]
+    assert info.code == len(TYPE_ORDER)
+    assert info.udt == "UDT_Conveyor"
+    assert info.sim_config_udt == "UDT_SimConveyorConfig"
+    assert types.order[-1] == types.simulated[-1] == types.csv_order[-1] == "conveyor"
+    assert info.count_comment == "Верхня межа масиву Conveyor[] (кількість конвеєрів - 1)"
+
+
+def test_extend_overrides_existing_and_order():
+    types = builtin_types().extend({
+        "types": {"fan": {"sim_defaults": [["Enable", "FALSE"]]}},
+        "order": ["fan"],
+    })
+    assert types.order[0] == "fan"
+    assert types.by_key["fan"].sim_defaults == (("Enable", "FALSE"),)
+    assert types.by_key["fan"].tia_type == "TYPE_FAN"
+
+
+@pytest.mark.parametrize("config", [
+    {"types": {"conveyor": {"tia_type": "TYPE_CONVEYOR"}}},                       # бракує полів
+    {"types": {"conveyor": {**CONVEYOR, "count_const": "FANS_COUNT"}}},            # дубль константи
+    {"types": {"conveyor": CONVEYOR}, "non_mechanisms": ["conveyor"]},
+    {"order": ["rocket"]},
+    {"types": []},
+])
+def test_extend_errors(config):
+    with pytest.raises(TypeConfigError):
+        builtin_types().extend(config)
+
+
+def test_load_types_file(tmp_path):
+    path = tmp_path / "types.json"
+    path.write_text(json.dumps({"types": {"conveyor": CONVEYOR}}), encoding="utf-8")
+    assert "conveyor" in load_types(path).by_key
+    path.write_text("not json", encoding="utf-8")
+    with pytest.raises(TypeConfigError):
+        load_types(path)
+
+
+# ── Новий тип без змін коду: CODEGEN_TYPES_FILE ─────────────────────────────
+def test_types_file_env_end_to_end(tmp_path):
+    path = tmp_path / "types.json"
+    path.write_text(json.dumps({"types": {"conveyor": CONVEYOR}}), encoding="utf-8")
+    script = (
+        "from generator.parser import parse_graph\n"
+        "from generator.mapper import map_devices\n"
+        "from generator.generators.db_mechs import generate_db_mechs\n"
+        "from generator.generators.mechs_csv import generate_mechs_csv\n"
+        "r = map_devices(parse_graph({'devices': [{'id': 1, 'name': 'K1', 'type': 'Conveyor'}]}).devices)\n"
+        "ctx = {'project_name': 'P', 'version': '1', 'timestamp': 'T', 'source': 'S'}\n"
+        "print(generate_db_mechs(r, ctx))\n"
+        "print(generate_mechs_csv(r, ctx))\n"
+    )
+    env = {**os.environ, "CODEGEN_TYPES_FILE": str(path)}
+    out = subprocess.run([sys.executable, "-c", script], cwd=ROOT, env=env,
+                         capture_output=True, text=True, check=True).stdout
+    assert 'Conveyor : ARRAY [0.."CONVEYORS_COUNT"] OF "UDT_Conveyor";' in out
+    assert 'Mechs[1].DeviceType := "TYPE_CONVEYOR";' in out
+    assert "CONVEYORS_COUNT;Mechs_;UInt;0;" in out